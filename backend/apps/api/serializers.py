@@ -2,35 +2,12 @@
 Сериализаторы для API.
 """
 
-import re
+from collections import defaultdict
+from decimal import Decimal
 from rest_framework import serializers
 from apps.products.models import Product, ProductImage, Brand
 
 
-def convert_absolute_urls_to_relative(html_content: str) -> str:
-    """
-    Преобразует абсолютные URL в HTML контенте в относительные.
-    Это нужно для корректной работы через nginx/proxy.
-    """
-    if not html_content:
-        return html_content
-
-    # Заменяем http://localhost:8000/media/... на /media/...
-    # и http://backend:8000/media/... на /media/...
-    patterns = [
-        r'http://localhost:8000(/media/[^"\'>\s]+)',
-        r'http://backend:8000(/media/[^"\'>\s]+)',
-        r'https://localhost:8000(/media/[^"\'>\s]+)',
-        r'https://backend:8000(/media/[^"\'>\s]+)',
-    ]
-
-    result = html_content
-    for pattern in patterns:
-        result = re.sub(pattern, r'\1', result)
-
-    return result
-
-
 class RelativeImageField(serializers.ImageField):
     """
     Кастомное поле для изображений, возвращающее относительный URL.
@@ -46,6 +23,7 @@ class RelativeImageField(serializers.ImageField):
 
 
 from apps.categories.models import Category
+from apps.core.content import rewrite_media_urls
 from apps.core.models import SiteSettings
 from apps.sync1c.models import IntegrationSource, SyncLog
 from apps.users.models import User, DeliveryAddress
@@ -73,13 +51,15 @@ class IntegrationSourceSerializer(serializers.ModelSerializer):
         model = IntegrationSource
         fields = (
             'id', 'name', 'code', 'is_active', 'show_on_site',
-            'json_file_path', 'media_dir_path',
+            'json_file_path', 'media_dir_path', 'delta_dir_path', 'last_delta_sequence',
             'default_price_type', 'default_price_type_name',
             'default_warehouse', 'default_warehouse_name',
             'import_status', 'import_status_display', 'last_import_started', 'last_import_completed',
             'import_error_message', 'auto_sync_enabled', 'data_sync_interval', 'last_data_sync',
-            'next_data_sync', 'full_sync_interval', 'last_full_sync', 'next_full_sync', 'last_error_time'
+            'next_data_sync', 'full_sync_interval', 'last_full_sync', 'next_full_sync', 'last_error_time',
+            'sync_heartbeat_at', 'pending_sync_type', 'sync_task_id'
         )
+        read_only_fields = ('sync_heartbeat_at', 'pending_sync_type', 'sync_task_id')
 
 
 class CategoryManagementSerializer(serializers.ModelSerializer):
@@ -351,7 +331,7 @@ class SyncLogSerializer(serializers.ModelSerializer):
             'id', 'source', 'source_name', 'source_code', 'sync_type', 'sync_type_display',
             'status', 'status_display', 'started_at', 'finished_at', 'duration', 'duration_formatted',
             'total_products', 'processed_products', 'created_products', 'updated_products',
-            'errors_count', 'source_file_path', 'source_file_size', 'source_file_modified',
+            'deleted_products', 'errors_count', 'source_file_path', 'source_file_size', 'source_file_modified',
             'message', 'error_details', 'progress_percentage'
         ]
     
@@ -492,8 +472,8 @@ class JobDetailSerializer(serializers.ModelSerializer):
     content = serializers.SerializerMethodField()
 
     def get_content(self, obj):
-        """Преобразует абсолютные URL в контенте в относительные."""
-        return convert_absolute_urls_to_relative(obj.content)
+        """HTML с относительными URL медиа, подготовленный при сохранении."""
+        return obj.rendered_content or rewrite_media_urls(obj.content)
 
     class Meta:
         model = Job
@@ -584,8 +564,8 @@ class NewsDetailSerializer(serializers.ModelSerializer):
     content = serializers.SerializerMethodField()
 
     def get_content(self, obj):
-        """Преобразует абсолютные URL в контенте в относительные."""
-        return convert_absolute_urls_to_relative(obj.content)
+        """HTML с относительными URL медиа, подготовленный при сохранении."""
+        return obj.rendered_content or rewrite_media_urls(obj.content)
 
     class Meta:
         model = News
@@ -677,10 +657,10 @@ class OrderListSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'order_number', 'user', 'status', 'status_display',
             'customer_name', 'customer_phone', 'delivery_address', 'delivery_comment', 'comment',
-            'payment_method', 'payment_method_display', 'total_amount',
+            'payment_method', 'payment_method_display', 'total_amount', 'stock_shortage',
             'items', 'items_count', 'created_at', 'updated_at'
         )
-        read_only_fields = ('id', 'order_number', 'user', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'order_number', 'user', 'stock_shortage', 'created_at', 'updated_at')
 
 
 class OrderDetailSerializer(serializers.ModelSerializer):
@@ -696,10 +676,10 @@ class OrderDetailSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'order_number', 'user', 'user_email', 'status', 'status_display',
             'customer_name', 'customer_phone', 'customer_email', 'delivery_address', 'delivery_comment',
-            'comment', 'payment_method', 'payment_method_display', 'total_amount',
+            'comment', 'payment_method', 'payment_method_display', 'total_amount', 'stock_shortage',
             'items', 'created_at', 'updated_at'
         )
-        read_only_fields = ('id', 'order_number', 'user', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'order_number', 'user', 'stock_shortage', 'created_at', 'updated_at')
 
 
 class OrderCreateSerializer(serializers.ModelSerializer):
@@ -728,64 +708,100 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Каждый товар должен иметь product_id")
             if 'quantity' not in item:
                 raise serializers.ValidationError("Каждый товар должен иметь quantity")
+            try:
+                item['product_id'] = int(item['product_id'])
+            except (TypeError, ValueError):
+                raise serializers.ValidationError("Некорректный product_id")
             if item['quantity'] <= 0:
                 raise serializers.ValidationError("Количество должно быть больше 0")
 
         return value
 
     def create(self, validated_data):
-        """Создание заказа с товарами."""
+        """
+        Создание заказа с товарами.
+
+        Все товары загружаются одним запросом и блокируются до конца транзакции,
+        позиции заказа записываются одним bulk_create, поэтому число запросов
+        не зависит от размера корзины.
+        """
         from django.db import transaction
+        from apps.orders import reservations
+        from apps.orders.numbering import generate_order_number
 
         items_data = validated_data.pop('items')
         user = self.context['request'].user
 
-        # Вычисляем общую сумму заказа
-        total_amount = 0
-        order_items = []
-
-        for item_data in items_data:
-            try:
-                product = Product.objects.get(id=item_data['product_id'])
-            except Product.DoesNotExist:
-                raise serializers.ValidationError(
-                    f"Товар с ID {item_data['product_id']} не найден"
-                )
-
-            # Проверяем наличие товара
-            if not product.in_stock:
-                raise serializers.ValidationError(
-                    f"Товар '{product.name}' отсутствует в наличии"
-                )
-
-            quantity = item_data['quantity']
-            price = product.price
-            subtotal = price * quantity
-            total_amount += subtotal
-
-            order_items.append({
-                'product': product,
-                'price': price,
-                'quantity': quantity,
-                'subtotal': subtotal
-            })
+        # Номер берется до транзакции, чтобы строка счетчика номеров за день
+        # не оставалась заблокированной на все время оформления заказа
+        order_number = generate_order_number()
 
         # Оборачиваем создание заказа и товаров в транзакцию,
         # чтобы signal.on_commit() сработал ПОСЛЕ создания всех OrderItems
         with transaction.atomic():
+            # Блокируем товары в одном порядке, чтобы параллельные заказы не взаимоблокировались
+            products = {
+                product.id: product
+                for product in Product.objects.select_for_update().filter(
+                    id__in={item_data['product_id'] for item_data in items_data}
+                ).order_by('id')
+            }
+
+            # Вычисляем общую сумму заказа
+            total_amount = 0
+            order_items = []
+
+            for item_data in items_data:
+                product = products.get(item_data['product_id'])
+                if product is None:
+                    raise serializers.ValidationError(
+                        f"Товар с ID {item_data['product_id']} не найден"
+                    )
+
+                # Проверяем наличие товара
+                if not product.in_stock:
+                    raise serializers.ValidationError(
+                        f"Товар '{product.name}' отсутствует в наличии"
+                    )
+
+                quantity = item_data['quantity']
+                price = product.price
+                # bulk_create не вызывает OrderItem.save(), поэтому сумма считается здесь
+                subtotal = price * quantity
+                total_amount += subtotal
+
+                order_items.append(OrderItem(
+                    product=product,
+                    price=price,
+                    quantity=quantity,
+                    subtotal=subtotal
+                ))
+
             # Создаем заказ
             order = Order.objects.create(
                 user=user,
+                order_number=order_number,
                 total_amount=total_amount,
                 **validated_data
             )
 
             # Создаем товары заказа
-            for item_data in order_items:
-                OrderItem.objects.create(
-                    order=order,
-                    **item_data
-                )
+            for order_item in order_items:
+                order_item.order = order
+            OrderItem.objects.bulk_create(order_items)
+
+            # Резервируем остатки одним условным UPDATE; при нехватке откатывается весь заказ
+            if reservations.is_enabled():
+                quantities = defaultdict(Decimal)
+                for order_item in order_items:
+                    quantities[order_item.product_id] += Decimal(str(order_item.quantity))
+                try:
+                    reservations.reserve_stock(order, quantities)
+                except reservations.InsufficientStock as e:
+                    names = ', '.join(f"'{product.name}'" for product in e.products)
+                    raise serializers.ValidationError(
+                        f"Недостаточно товара в наличии: {names}"
+                    )
 
         return order
 
@@ -824,7 +840,9 @@ class BrandSerializer(serializers.ModelSerializer):
     products_count = serializers.SerializerMethodField()
 
     def get_products_count(self, obj):
-        """Получить количество товаров бренда."""
+        """Получить количество товаров бренда (из аннотации queryset, если она есть)."""
+        if hasattr(obj, 'products_count'):
+            return obj.products_count
         return obj.products.count()
 
     class Meta:
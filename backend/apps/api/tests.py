@@ -0,0 +1,112 @@
+"""
+Тесты бюджетов запросов к базе для публичных представлений API.
+
+Каждое представление с query_budget вызывается с пустым кэшем, на наборе
+данных, где N+1 был бы заметен: несколько объектов со связанными записями.
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core.models import SiteSettings
+from apps.core.testing import QueryBudgetTestMixin
+from apps.jobs.models import Job, JobMedia
+from apps.news.models import News, NewsCategory, NewsMedia
+from apps.products.models import Brand, Product, ProductImage
+
+OBJECTS = 3
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = get_user_model().objects.create_user(
+            username='editor', email='editor@example.com', password='editor-password', role='moderator'
+        )
+        get_user_model().objects.filter(pk=cls.manager.pk).update(is_active=True)
+
+        SiteSettings.objects.get_or_create(pk=1)
+
+        brands = [Brand.objects.create(name=f'Бренд {index}', logo=f'brands/{index}.png') for index in range(OBJECTS)]
+        for index in range(OBJECTS):
+            product = Product.objects.create(
+                code=f'SKU-{index}', name=f'Товар {index}', price=100, brand=brands[index]
+            )
+            for order in range(2):
+                ProductImage.objects.create(
+                    product=product, image=f'products/{index}-{order}.jpg', is_main=order == 0, order=order
+                )
+
+        category = NewsCategory.objects.create(name='Акции')
+        cls.news = []
+        cls.jobs = []
+        for index in range(OBJECTS):
+            news = News.objects.create(
+                title=f'Новость {index}',
+                short_description='Кратко',
+                content='<p>Текст</p>',
+                category=category,
+                author=cls.manager,
+                is_published=True,
+                published_at=timezone.now()
+            )
+            job = Job.objects.create(
+                title=f'Вакансия {index}',
+                short_description='Кратко',
+                content='<p>Описание</p>',
+                author=cls.manager
+            )
+            for order in range(2):
+                NewsMedia.objects.create(news=news, video_url=f'https://example.com/news/{index}/{order}')
+                JobMedia.objects.create(job=job, video_url=f'https://example.com/jobs/{index}/{order}')
+            cls.news.append(news)
+            cls.jobs.append(job)
+
+    def login_manager(self):
+        """Вход по JWT: пользователь тоже читается из базы, кэш пуст."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.manager)}')
+
+    def test_brands(self):
+        response = self.assertWithinQueryBudget('/api/brands/')
+        self.assertEqual(len(response.data), OBJECTS)
+
+    def test_site_settings(self):
+        self.assertWithinQueryBudget('/api/settings/')
+        self.assertWithinQueryBudget('/api/settings/1/')
+
+    def test_product_images(self):
+        response = self.assertWithinQueryBudget('/api/images/')
+        self.assertEqual(response.data['count'], OBJECTS * 2)
+
+        image = ProductImage.objects.first()
+        self.assertWithinQueryBudget(f'/api/images/{image.pk}/')
+
+    def test_jobs(self):
+        self.assertWithinQueryBudget('/api/jobs/')
+        self.assertWithinQueryBudget(f'/api/jobs/{self.jobs[0].slug}/')
+
+    def test_jobs_for_manager(self):
+        self.login_manager()
+
+        self.assertWithinQueryBudget('/api/jobs/')
+        self.assertWithinQueryBudget(f'/api/jobs/{self.jobs[0].slug}/')
+
+    def test_news(self):
+        self.assertWithinQueryBudget('/api/news/')
+        self.assertWithinQueryBudget(f'/api/news/{self.news[0].slug}/')
+        response = self.assertWithinQueryBudget('/api/news/popular/')
+        self.assertEqual(len(response.data), OBJECTS)
+        self.assertWithinQueryBudget('/api/news/recent/')
+
+    def test_news_for_manager(self):
+        self.login_manager()
+
+        self.assertWithinQueryBudget('/api/news/')
+        self.assertWithinQueryBudget(f'/api/news/{self.news[0].slug}/')
+        self.assertWithinQueryBudget('/api/news/popular/')
+        self.assertWithinQueryBudget('/api/news/recent/')
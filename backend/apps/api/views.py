@@ -7,14 +7,13 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.pagination import LimitOffsetPagination
-from django.core.management import call_command
 from django.utils import timezone
-import threading
 from rest_framework import permissions
 from rest_framework.permissions import IsAdminUser, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Q, Count, Avg, Prefetch
+from django.db import transaction
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_headers
@@ -29,9 +28,12 @@ from apps.products.models import Product, ProductImage, Brand
 from apps.categories.models import Category
 from apps.core.models import SiteSettings
 from apps.sync1c.models import IntegrationSource, SyncLog
+from apps.sync1c.runner import start_source_sync
 from apps.users.models import User, DeliveryAddress
 from apps.jobs.models import Job, JobMedia
 from apps.news.models import News, NewsCategory, NewsMedia
+from apps.core.content import get_public_content
+from apps.news.views_counter import forget_news, get_popular_news_ids, record_view
 from apps.orders.models import Order, OrderItem
 # TODO: Обновить после миграции на новую систему уведомлений
 # from apps.notifications.models import NotificationSettings, WhatsAppOperator
@@ -70,17 +72,21 @@ class IntegrationSourceViewSet(mixins.CreateModelMixin,
         """
         Запускает полный импорт данных для конкретного источника (данные + медиа).
         """
-        return self._run_sync(request, pk, skip_media=False, sync_type='running_full')
+        return self._run_sync(request, pk, skip_media=False)
 
     @action(detail=True, methods=['post'])
     def quick_sync(self, request, pk=None):
         """
         Запускает быструю синхронизацию данных для конкретного источника (только данные).
         """
-        return self._run_sync(request, pk, skip_media=True, sync_type='running_data')
+        return self._run_sync(request, pk, skip_media=True)
 
-    def _run_sync(self, request, pk, skip_media, sync_type):
-        """Общий метод для запуска синхронизации."""
+    def _run_sync(self, request, pk, skip_media):
+        """
+        Общий метод для запуска синхронизации.
+        Если источник уже синхронизируется, запрос объединяется с текущим
+        и будет выполнен сразу после него (см. apps.sync1c.runner).
+        """
         source = self.get_object()
         
         if not source.is_active:
@@ -90,57 +96,20 @@ class IntegrationSourceViewSet(mixins.CreateModelMixin,
             }, status=400)
 
         try:
-            # Обновляем статус
-            source.import_status = sync_type
-            source.last_import_started = timezone.now()
-            source.import_error_message = None
-            source.save()
-            
-            # Запускаем импорт в отдельном потоке
-            def run_import():
-                try:
-                    # Запускаем команду с нужными параметрами
-                    if skip_media:
-                        call_command('import_1c_data', source.code, '--skip-media')
-                    else:
-                        call_command('import_1c_data', source.code)
-                    
-                    # При успешном завершении обновляем статус
-                    source.refresh_from_db()
-                    source.import_status = 'completed'
-                    source.last_import_completed = timezone.now()
-                    source.import_error_message = None
-                    
-                    # Обновляем время последней синхронизации
-                    if skip_media:
-                        source.last_data_sync = timezone.now()
-                        source.schedule_next_data_sync()
-                    else:
-                        source.last_full_sync = timezone.now()
-                        source.schedule_next_full_sync()
-                        # При полной синхронизации также обновляем время данных
-                        source.last_data_sync = timezone.now()
-                        source.schedule_next_data_sync()
-                    
-                    source.save()
-                    
-                except Exception as e:
-                    # При ошибке обновляем статус и сохраняем сообщение об ошибке
-                    source.refresh_from_db()
-                    source.import_status = 'failed'
-                    source.import_error_message = str(e)
-                    source.last_error_time = timezone.now()
-                    source.save()
-                    print(f"Ошибка импорта для источника {source.code}: {e}")
-            
-            thread = threading.Thread(target=run_import)
-            thread.daemon = True
-            thread.start()
+            task_id = start_source_sync(source, skip_media=skip_media)
             
             sync_name = "быстрая синхронизация" if skip_media else "полная синхронизация"
+            if source.is_syncing:
+                message = (
+                    f'Для источника "{source.name}" уже выполняется синхронизация. '
+                    f'{sync_name.capitalize()} будет запущена после ее завершения.'
+                )
+            else:
+                message = f'{sync_name.capitalize()} для источника "{source.name}" поставлена в очередь.'
             return Response({
                 'success': True,
-                'message': f'{sync_name.capitalize()} для источника "{source.name}" запущена в фоновом режиме.'
+                'message': message,
+                'task_id': task_id
             })
             
         except Exception as e:
@@ -440,6 +409,7 @@ class SiteSettingsViewSet(mixins.ListModelMixin,
     """
     queryset = SiteSettings.objects.all()
     serializer_class = SiteSettingsSerializer
+    query_budget = {'list': 2, 'retrieve': 2}
 
     def get_permissions(self):
         """Разрешения: чтение для всех, изменение только для админов."""
@@ -820,6 +790,7 @@ class ProductImageViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = ProductImage.objects.all()
     serializer_class = ProductImageSerializer
     permission_classes = [AllowAny]
+    query_budget = {'list': 3, 'retrieve': 2}
     
     def get_queryset(self):
         """Фильтрация изображений по товару."""
@@ -1037,7 +1008,34 @@ class DeliveryAddressViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class JobViewSet(viewsets.ModelViewSet):
+class PublicContentCacheMixin:
+    """
+    Кэширование публичных ответов list/retrieve для новостей и вакансий.
+
+    Админы и модераторы видят неопубликованный контент, поэтому их запросы
+    не кэшируются. Кэш сбрасывается сигналами при изменении контента.
+    """
+    content_cache_section = None
+
+    def is_content_manager(self):
+        user = self.request.user
+        return user.is_authenticated and user.role in ['admin', 'moderator']
+
+    def get_public_data(self, build, key_suffix=''):
+        """Данные ответа из кэша раздела для обычных пользователей."""
+        if self.is_content_manager():
+            return build()
+        key = self.request.get_full_path() + key_suffix
+        return get_public_content(self.content_cache_section, key, build)
+
+    def list(self, request, *args, **kwargs):
+        return Response(self.get_public_data(lambda: super(PublicContentCacheMixin, self).list(request, *args, **kwargs).data))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.get_public_data(lambda: super(PublicContentCacheMixin, self).retrieve(request, *args, **kwargs).data))
+
+
+class JobViewSet(PublicContentCacheMixin, viewsets.ModelViewSet):
     """
     ViewSet для управления вакансиями.
 
@@ -1052,6 +1050,8 @@ class JobViewSet(viewsets.ModelViewSet):
     """
     permission_classes = [AllowAny]
     lookup_field = 'slug'  # Используем slug вместо pk для URL
+    content_cache_section = 'jobs'
+    query_budget = {'list': 4, 'retrieve': 3}
 
     def get_queryset(self):
         """Возвращает вакансии в зависимости от прав пользователя."""
@@ -1107,7 +1107,7 @@ class NewsCategoryViewSet(viewsets.ModelViewSet):
     lookup_field = 'slug'
 
 
-class NewsViewSet(viewsets.ModelViewSet):
+class NewsViewSet(PublicContentCacheMixin, viewsets.ModelViewSet):
     """
     ViewSet для управления новостями.
 
@@ -1122,6 +1122,8 @@ class NewsViewSet(viewsets.ModelViewSet):
     """
     permission_classes = [AllowAny]
     lookup_field = 'slug'
+    content_cache_section = 'news'
+    query_budget = {'list': 4, 'retrieve': 5, 'popular': 4, 'recent': 4}
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['title', 'short_description', 'content']
     ordering_fields = ['published_at', 'created_at', 'views_count']
@@ -1157,31 +1159,48 @@ class NewsViewSet(viewsets.ModelViewSet):
         """Автоматически привязываем автора при создании."""
         serializer.save(author=self.request.user)
 
+    def perform_destroy(self, instance):
+        """Удаляем новость и убираем ее из рейтинга просмотров."""
+        news_id = instance.pk
+        instance.delete()
+        transaction.on_commit(lambda: forget_news(news_id))
+
     def retrieve(self, request, *args, **kwargs):
-        """Увеличиваем счетчик просмотров при просмотре новости."""
-        instance = self.get_object()
+        """Учитываем просмотр новости (буфер в Redis, без записи в базу)."""
+        data = super().retrieve(request, *args, **kwargs).data
 
-        # Увеличиваем счетчик просмотров только для обычных пользователей
-        if not (request.user.is_authenticated and request.user.role in ['admin', 'moderator']):
-            instance.views_count += 1
-            instance.save(update_fields=['views_count'])
+        # Учитываем просмотры только обычных пользователей
+        if not self.is_content_manager():
+            data = dict(data)
+            data['views_count'] = record_view(data['id'])
 
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        return Response(data)
 
     @action(detail=False, methods=['get'])
     def popular(self, request):
         """Получить популярные новости (топ-10 по просмотрам)."""
-        popular_news = self.get_queryset().order_by('-views_count')[:10]
-        serializer = self.get_serializer(popular_news, many=True)
-        return Response(serializer.data)
+        limit = 10
+        # Берем с запасом: в рейтинге могут быть снятые с публикации новости
+        popular_ids = get_popular_news_ids(limit * 3)
+
+        def build():
+            if popular_ids is None:
+                popular_news = self.get_queryset().order_by('-views_count')[:limit]
+            else:
+                news_by_id = self.get_queryset().in_bulk(popular_ids)
+                popular_news = [news_by_id[news_id] for news_id in popular_ids if news_id in news_by_id][:limit]
+            return self.get_serializer(popular_news, many=True).data
+
+        # Рейтинг меняется с просмотрами, поэтому в ключ кэша входит текущий порядок новостей
+        key_suffix = '#' + ','.join(map(str, popular_ids or []))
+        return Response(self.get_public_data(build, key_suffix))
 
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """Получить последние новости (топ-10)."""
-        recent_news = self.get_queryset().order_by('-published_at')[:10]
-        serializer = self.get_serializer(recent_news, many=True)
-        return Response(serializer.data)
+        return Response(self.get_public_data(
+            lambda: self.get_serializer(self.get_queryset().order_by('-published_at')[:10], many=True).data
+        ))
 
 
 class OrderViewSet(viewsets.ModelViewSet):
@@ -1304,10 +1323,13 @@ class BrandViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = BrandSerializer
     permission_classes = [AllowAny]
     pagination_class = None  # Отключаем пагинацию для брендов
+    query_budget = 2  # Проверяется QueryProfilingMiddleware (apps.core.profiling)
 
     def get_queryset(self):
-        """Возвращает только бренды с логотипами."""
-        return Brand.objects.exclude(logo='').exclude(logo__isnull=True).order_by('name')
+        """Возвращает только бренды с логотипами и числом товаров."""
+        return Brand.objects.exclude(logo='').exclude(logo__isnull=True).annotate(
+            products_count=Count('products')
+        ).order_by('name')
 
 
 class BrandManagementViewSet(mixins.ListModelMixin,
@@ -1320,7 +1342,7 @@ class BrandManagementViewSet(mixins.ListModelMixin,
     Позволяет создавать, редактировать и удалять бренды.
     Доступно только администраторам.
     """
-    queryset = Brand.objects.all().order_by('name')
+    queryset = Brand.objects.annotate(products_count=Count('products')).order_by('name')
     serializer_class = BrandSerializer
     permission_classes = [IsAdminUser]
     pagination_class = None  # Отключаем пагинацию для брендов
@@ -205,6 +205,58 @@ class Category(models.Model):
         if self.parent:
             self.parent.update_visibility()
 
+    @classmethod
+    def hide_empty_categories(cls, category_ids):
+        """
+        Скрывает указанные категории и их родителей, если в них не осталось видимых товаров.
+
+        Пакетный аналог update_visibility() для случая, когда товары только скрывались:
+        дерево категорий и множество категорий с видимыми товарами загружаются
+        одним запросом каждое, а изменения записываются одним UPDATE.
+        Возвращает количество скрытых категорий.
+        """
+        if not category_ids:
+            return 0
+
+        categories = {
+            row['id']: row
+            for row in cls.objects.values('id', 'parent_id', 'is_visible_on_site')
+        }
+        children_map = {}
+        for row in categories.values():
+            children_map.setdefault(row['parent_id'], []).append(row['id'])
+
+        categories_with_products = set(
+            cls.objects.filter(products__is_visible_on_site=True)
+            .values_list('id', flat=True)
+            .distinct()
+        )
+
+        has_content = {}
+
+        def check(category_id):
+            if category_id not in has_content:
+                has_content[category_id] = category_id in categories_with_products or any(
+                    check(child_id) for child_id in children_map.get(category_id, [])
+                )
+            return has_content[category_id]
+
+        # Затронутые категории вместе со всеми родителями
+        to_check = set()
+        for category_id in category_ids:
+            while category_id is not None and category_id not in to_check and category_id in categories:
+                to_check.add(category_id)
+                category_id = categories[category_id]['parent_id']
+
+        to_hide = [
+            category_id for category_id in to_check
+            if categories[category_id]['is_visible_on_site'] and not check(category_id)
+        ]
+        if to_hide:
+            cls.objects.filter(id__in=to_hide).update(is_visible_on_site=False)
+
+        return len(to_hide)
+
     def get_absolute_url(self):
         """Получить URL категории."""
         return f'/category/{self.slug}/'
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+Общие функции публичного контента (новости, вакансии).
+
+HTML контента переписывается один раз при сохранении (rewrite_media_urls),
+а не при каждом чтении. Публичные ответы API кэшируются в общем кэше под
+версией раздела: любое изменение новостей или вакансий меняет версию после
+коммита транзакции, и старые записи кэша больше не читаются.
+
+Свободный slug подбирается одним запросом (allocate_slugs): читаются все
+занятые slug вида "base" и "base-N", и берется наименьший свободный номер.
+Если параллельный запрос успел занять тот же slug, сохранение повторяется
+с новым номером.
+"""
+
+import hashlib
+import logging
+import re
+import uuid
+from collections import defaultdict
+from typing import Callable, Iterable, List
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Абсолютные ссылки на медиа внутри Docker (http(s)://localhost:8000/media/...,
+# http(s)://backend:8000/media/...) заменяются относительными /media/...
+ABSOLUTE_MEDIA_URL_RE = re.compile(r'https?://(?:localhost|backend):8000(/media/[^"\'>\s]+)')
+
+PUBLIC_CONTENT_CACHE_TIMEOUT = 60 * 10  # 10 минут
+
+# Попытки сохранить объект, если выбранный slug занял параллельный запрос
+SLUG_SAVE_ATTEMPTS = 5
+# Место в slug под суффикс "-N"
+SLUG_SUFFIX_RESERVE = 11
+SLUG_BATCH_SIZE = 100
+
+
+def rewrite_media_urls(html_content: str) -> str:
+    """
+    Преобразует абсолютные URL медиа в HTML контенте в относительные.
+    Это нужно для корректной работы через nginx/proxy.
+    """
+    if not html_content:
+        return html_content
+    return ABSOLUTE_MEDIA_URL_RE.sub(r'\1', html_content)
+
+
+def _version_cache_key(section: str) -> str:
+    return f'content:{section}:version'
+
+
+def _get_version(section: str):
+    """Текущая версия раздела или None, если кэш недоступен."""
+    key = _version_cache_key(section)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_public_content(section: str) -> None:
+    """Сбрасывает кэш публичных ответов раздела после коммита транзакции."""
+    def bump():
+        try:
+            cache.set(_version_cache_key(section), uuid.uuid4().hex, None)
+        except Exception as e:
+            logger.warning(f"Не удалось сбросить кэш раздела {section}: {e}")
+
+    transaction.on_commit(bump)
+
+
+def get_public_content(section: str, key: str, build: Callable[[], object]):
+    """
+    Возвращает данные публичного ответа из кэша или строит их через build().
+
+    key - путь запроса с параметрами (фильтры, поиск, пагинация).
+    """
+    try:
+        version = _get_version(section)
+    except Exception as e:
+        logger.warning(f"Кэш раздела {section} недоступен: {e}")
+        return build()
+
+    cache_key = f'content:{section}:{version}:{hashlib.md5(key.encode()).hexdigest()}'
+
+    data = cache.get(cache_key)
+    record_cache_lookup(f'content_{section}', data is not None)
+    if data is None:
+        data = build()
+        cache.set(cache_key, data, PUBLIC_CONTENT_CACHE_TIMEOUT)
+    return data
+
+
+def build_base_slug(text: str, fallback_prefix: str, max_length: int) -> str:
+    """Базовый slug из текста или случайный, если текст не транслитерируется."""
+    base_slug = slugify(text) or f'{fallback_prefix}-{uuid.uuid4().hex[:8]}'
+    return base_slug[:max_length - SLUG_SUFFIX_RESERVE].rstrip('-')
+
+
+def allocate_slugs(model, base_slugs: List[str], exclude_pk=None) -> List[str]:
+    """
+    Подбирает свободные slug для списка базовых slug.
+
+    Одинаковые базовые slug в списке получают разные номера:
+    ['news', 'news'] -> ['news', 'news-1'], если оба свободны.
+    Занятые slug читаются одним запросом на пачку из SLUG_BATCH_SIZE базовых slug.
+    """
+    unique_bases = list(dict.fromkeys(base_slugs))
+    taken_bases = set()
+    taken_suffixes = defaultdict(set)
+
+    def register(slug):
+        taken_bases.add(slug)
+        prefix, _, number = slug.rpartition('-')
+        if prefix and number.isdigit():
+            taken_suffixes[prefix].add(int(number))
+
+    for start in range(0, len(unique_bases), SLUG_BATCH_SIZE):
+        condition = Q()
+        for base in unique_bases[start:start + SLUG_BATCH_SIZE]:
+            condition |= Q(slug=base) | Q(slug__regex=rf'^{re.escape(base)}-[0-9]+$')
+
+        queryset = model._default_manager.filter(condition)
+        if exclude_pk is not None:
+            queryset = queryset.exclude(pk=exclude_pk)
+
+        for slug in queryset.values_list('slug', flat=True):
+            register(slug)
+
+    slugs = []
+    next_suffix = defaultdict(lambda: 1)
+    for base in base_slugs:
+        if base in taken_bases:
+            suffix = next_suffix[base]
+            while suffix in taken_suffixes[base]:
+                suffix += 1
+            next_suffix[base] = suffix + 1
+            slug = f'{base}-{suffix}'
+        else:
+            slug = base
+        register(slug)
+        slugs.append(slug)
+
+    return slugs
+
+
+class PublicContentMixin:
+    """
+    Общее поведение моделей публичного контента (новости, вакансии).
+
+    - slug подбирается при первом сохранении без перебора запросами;
+    - fill_derived_fields() заполняет вычисляемые поля (HTML для сайта и т.п.);
+    - bulk_create_with_slugs() создает объекты пачкой для импорта.
+    """
+
+    # Раздел кэша публичных ответов API
+    content_cache_section = None
+    slug_fallback_prefix = 'item'
+
+    def get_base_slug(self) -> str:
+        max_length = self._meta.get_field('slug').max_length
+        return build_base_slug(self.title, self.slug_fallback_prefix, max_length)
+
+    def fill_derived_fields(self) -> None:
+        """Заполняет поля, вычисляемые из остальных полей."""
+        # HTML для сайта переписывается один раз при сохранении, а не при каждом чтении
+        self.rendered_content = rewrite_media_urls(self.content)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.fill_derived_fields()
+        elif 'content' in update_fields:
+            self.fill_derived_fields()
+            kwargs['update_fields'] = {*update_fields, 'rendered_content'}
+
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        model = type(self)
+        base_slug = self.get_base_slug()
+        self.slug = allocate_slugs(model, [base_slug], exclude_pk=self.pk)[0]
+
+        for attempt in range(1, SLUG_SAVE_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                slug_taken = model._default_manager.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                if attempt == SLUG_SAVE_ATTEMPTS or not slug_taken:
+                    raise
+                logger.info(f"Slug {self.slug} занят параллельным запросом, подбираем другой")
+                self.slug = allocate_slugs(model, [base_slug], exclude_pk=self.pk)[0]
+
+    @classmethod
+    def bulk_create_with_slugs(cls, objs: Iterable, batch_size: int = 500) -> list:
+        """
+        Массовое создание (импорт): slug и вычисляемые поля заполняются
+        без запроса на каждый объект, кэш раздела сбрасывается один раз.
+        """
+        objs = list(objs)
+        without_slug = [obj for obj in objs if not obj.slug]
+        slugs = allocate_slugs(cls, [obj.get_base_slug() for obj in without_slug])
+        for obj, slug in zip(without_slug, slugs):
+            obj.slug = slug
+        for obj in objs:
+            obj.fill_derived_fields()
+
+        with transaction.atomic():
+            created = cls._default_manager.bulk_create(objs, batch_size=batch_size)
+            if cls.content_cache_section:
+                invalidate_public_content(cls.content_cache_section)
+        return created
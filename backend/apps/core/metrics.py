@@ -0,0 +1,356 @@
+"""
+Метрики в формате Prometheus.
+
+Метрики объявляются в этом модуле (Counter, Gauge, Histogram) и пишутся из
+любого процесса: воркеров gunicorn, воркеров Celery, планировщика. Значения
+хранятся в Redis (по хэшу на метрику, HINCRBY/HINCRBYFLOAT), поэтому все
+процессы пишут в общие счетчики, а /metrics отдает сумму по всем процессам.
+Без Redis значения хранятся в памяти процесса.
+
+Внутри metrics_batch() записи копятся и отправляются одним конвейером
+команд Redis: MetricsMiddleware так записывает все метрики запроса за одно
+обращение к Redis. Ошибки Redis не влияют на обработку запроса.
+
+Показатели, которые удобнее посчитать в момент опроса (глубина очередей),
+добавляются функциями-сборщиками через register_collector().
+"""
+
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Dict, List, Tuple
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from apps.core.profiling import get_view_name
+from apps.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY_PREFIX = 'metrics:'
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SYNC_DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+_local = threading.local()
+_local_store: Dict[str, Dict[str, float]] = {}
+_local_store_lock = threading.Lock()
+
+REGISTRY: Dict[str, 'Metric'] = {}
+COLLECTORS: List[Callable[[], List[Tuple]]] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _execute(ops: list) -> None:
+    """Выполняет операции записи в Redis одним конвейером или в памяти процесса."""
+    if not ops:
+        return
+
+    client = get_redis_client()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            for command, key, field, value in ops:
+                getattr(pipe, command)(key, field, value)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"Не удалось записать метрики в Redis: {e}")
+        return
+
+    with _local_store_lock:
+        for command, key, field, value in ops:
+            values = _local_store.setdefault(key, {})
+            values[field] = value if command == 'hset' else values.get(field, 0) + value
+
+
+def _submit(ops: list) -> None:
+    pending = getattr(_local, 'ops', None)
+    if pending is not None:
+        pending.extend(ops)
+    else:
+        _execute(ops)
+
+
+@contextmanager
+def metrics_batch():
+    """Копит записи метрик и отправляет их одним обращением к Redis при выходе."""
+    if getattr(_local, 'ops', None) is not None:
+        yield
+        return
+
+    _local.ops = []
+    try:
+        yield
+    finally:
+        ops, _local.ops = _local.ops, None
+        _execute(ops)
+
+
+class Metric:
+    """Базовый класс метрики с набором меток."""
+
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.key = METRICS_KEY_PREFIX + name
+        REGISTRY[name] = self
+
+    def _labels(self, labels: dict) -> str:
+        """Метки в формате Prometheus: view="list",method="GET"."""
+        return ','.join(f'{name}="{_escape(labels.get(name, ""))}"' for name in self.labelnames)
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        command = 'hincrby' if isinstance(amount, int) else 'hincrbyfloat'
+        _submit([(command, self.key, self._labels(labels), amount)])
+
+
+class Gauge(Metric):
+    """Текущее значение (последнее записанное любым процессом)."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        _submit([('hset', self.key, self._labels(labels), value)])
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам (время выполнения и т.п.)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        # В Redis хранится счетчик каждой корзины, накопительные значения
+        # считаются при выводе
+        le = next((str(bound) for bound in self.buckets if value <= bound), '+Inf')
+        labels_str = self._labels(labels)
+        _submit([
+            ('hincrby', self.key, f'{labels_str}|bucket|{le}', 1),
+            ('hincrbyfloat', self.key, f'{labels_str}|sum', value),
+            ('hincrby', self.key, f'{labels_str}|count', 1),
+        ])
+
+    @contextmanager
+    def time(self, **labels):
+        """Измеряет время выполнения блока."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+def register_collector(func: Callable[[], List[Tuple]]):
+    """
+    Регистрирует функцию, которая при опросе возвращает
+    [(имя, тип, описание, [(метки, значение)])].
+    """
+    COLLECTORS.append(func)
+    return func
+
+
+def _read_all() -> Dict[str, Dict[str, str]]:
+    """Сохраненные значения всех метрик."""
+    client = get_redis_client()
+    if client is None:
+        with _local_store_lock:
+            return {key: dict(values) for key, values in _local_store.items()}
+
+    metrics = list(REGISTRY.values())
+    pipe = client.pipeline(transaction=False)
+    for metric in metrics:
+        pipe.hgetall(metric.key)
+    return {
+        metric.key: {field.decode(): value.decode() for field, value in values.items()}
+        for metric, values in zip(metrics, pipe.execute())
+    }
+
+
+def _format_value(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _render_histogram(metric: Histogram, values: dict) -> List[str]:
+    series = {}
+    for field, value in values.items():
+        labels_str, kind, *rest = field.split('|')
+        entry = series.setdefault(labels_str, {'buckets': {}, 'sum': 0, 'count': 0})
+        if kind == 'bucket':
+            entry['buckets'][rest[0]] = float(value)
+        else:
+            entry[kind] = float(value)
+
+    lines = []
+    for labels_str, entry in sorted(series.items()):
+        prefix = f'{labels_str},' if labels_str else ''
+        cumulative = 0
+        for bound in metric.buckets:
+            cumulative += entry['buckets'].get(str(bound), 0)
+            lines.append(f'{metric.name}_bucket{{{prefix}le="{bound}"}} {_format_value(cumulative)}')
+        lines.append(f'{metric.name}_bucket{{{prefix}le="+Inf"}} {_format_value(entry["count"])}')
+        suffix = f'{{{labels_str}}}' if labels_str else ''
+        lines.append(f'{metric.name}_sum{suffix} {_format_value(entry["sum"])}')
+        lines.append(f'{metric.name}_count{suffix} {_format_value(entry["count"])}')
+    return lines
+
+
+def render_metrics() -> str:
+    """Все метрики в текстовом формате Prometheus."""
+    try:
+        stored = _read_all()
+    except Exception as e:
+        logger.warning(f"Не удалось прочитать метрики из Redis: {e}")
+        stored = {}
+
+    lines = []
+    for metric in REGISTRY.values():
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        values = stored.get(metric.key, {})
+        if metric.kind == 'histogram':
+            lines.extend(_render_histogram(metric, values))
+        else:
+            for labels_str, value in sorted(values.items()):
+                suffix = f'{{{labels_str}}}' if labels_str else ''
+                lines.append(f'{metric.name}{suffix} {_format_value(value)}')
+
+    for collector in COLLECTORS:
+        try:
+            collected = collector()
+        except Exception as e:
+            logger.warning(f"Ошибка сборщика метрик {collector.__name__}: {e}")
+            continue
+        for name, kind, documentation, samples in collected:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                labels_str = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                suffix = f'{{{labels_str}}}' if labels_str else ''
+                lines.append(f'{name}{suffix} {_format_value(value)}')
+
+    return '\n'.join(lines) + '\n'
+
+
+# --- Метрики приложения ---
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'faida_http_request_duration_seconds',
+    'Время обработки запроса к API по представлениям',
+    ('view', 'method', 'status'),
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    'faida_http_request_db_seconds',
+    'Суммарное время запросов к базе за запрос к API',
+    ('view',),
+)
+CACHE_LOOKUPS = Counter(
+    'faida_cache_lookups_total',
+    'Обращения к кэшу по назначению (result: hit/miss)',
+    ('cache', 'result'),
+)
+SYNC_DURATION_SECONDS = Histogram(
+    'faida_sync_duration_seconds',
+    'Длительность синхронизации с 1С по источникам',
+    ('source', 'status'),
+    buckets=SYNC_DURATION_BUCKETS,
+)
+SYNC_PRODUCTS = Counter(
+    'faida_sync_products_processed_total',
+    'Товары, обработанные синхронизацией с 1С',
+    ('source',),
+)
+SYNC_PRODUCTS_PER_SECOND = Gauge(
+    'faida_sync_products_per_second',
+    'Скорость последней синхронизации источника (товаров в секунду)',
+    ('source',),
+)
+IMAGE_PROCESSING_SECONDS = Histogram(
+    'faida_image_processing_seconds',
+    'Время обработки (оптимизации и сохранения) изображения товара',
+)
+IMAGES_PROCESSED = Counter(
+    'faida_images_processed_total',
+    'Обработанные изображения товаров (result: success/error)',
+    ('result',),
+)
+NOTIFICATION_SEND_SECONDS = Histogram(
+    'faida_notification_send_seconds',
+    'Время отправки уведомления по каналам',
+    ('channel',),
+)
+NOTIFICATIONS_SENT = Counter(
+    'faida_notifications_sent_total',
+    'Отправленные уведомления по каналам (result: success/error)',
+    ('channel', 'result'),
+)
+
+
+def record_cache_lookup(cache_name: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc(cache=cache_name, result='hit' if hit else 'miss')
+
+
+class DbTimer:
+    """Обертка execute_wrapper: суммарное время запросов к базе."""
+
+    def __init__(self):
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Время обработки и время базы для запросов к API по представлениям."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_SETTINGS', {}).get('ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        timer = DbTimer()
+        started = time.perf_counter()
+
+        with metrics_batch():
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+
+            match = getattr(request, 'resolver_match', None)
+            view = get_view_name(match.func, request.method) if match else 'unmatched'
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                view=view,
+                method=request.method,
+                status=f'{response.status_code // 100}xx'
+            )
+            HTTP_REQUEST_DB_SECONDS.observe(timer.duration, view=view)
+
+        return response
@@ -0,0 +1,177 @@
+"""
+Профилирование SQL-запросов по запросам к API.
+
+QueryProfilingMiddleware (включается QUERY_PROFILING_SETTINGS['ENABLED'])
+через connection.execute_wrapper считает запросы к базе, их суммарное время
+и повторяющиеся запросы (одинаковый SQL с разными параметрами - признак N+1).
+Отдельно измеряется время рендеринга ответа (JSON). Результат:
+
+- заголовок Server-Timing (виден во вкладке Network браузера);
+- строка лога "Профиль запроса: {...}" в формате JSON;
+- проверка бюджета запросов представления.
+
+Бюджет задается атрибутом ViewSet query_budget: числом или словарем
+{действие: число}. В CI (QUERY_PROFILING_SETTINGS['ENFORCE_BUDGETS'])
+превышение бюджета вызывает QueryBudgetExceeded и запрос падает с ошибкой,
+в остальных случаях пишется предупреждение в лог.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILING_SETTINGS = {
+    'ENABLED': False,
+    'SERVER_TIMING': True,
+    'ENFORCE_BUDGETS': False,
+    'DUPLICATE_THRESHOLD': 3,  # Сколько одинаковых запросов считается N+1
+    'PATH_PREFIXES': ('/api/',),
+}
+
+# Списки параметров IN (%s, %s, ...) разной длины дают один отпечаток
+IN_LIST_RE = re.compile(r'\((?:%s, )+%s\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Представление выполнило больше запросов к базе, чем задано в query_budget."""
+
+
+def get_profiling_settings() -> dict:
+    return {**DEFAULT_PROFILING_SETTINGS, **getattr(settings, 'QUERY_PROFILING_SETTINGS', {})}
+
+
+def fingerprint_sql(sql: str) -> str:
+    """Отпечаток запроса: SQL без значений параметров."""
+    return WHITESPACE_RE.sub(' ', IN_LIST_RE.sub('(%s, ...)', sql)).strip()
+
+
+class QueryProfile:
+    """Статистика запросов к базе за время обработки одного запроса."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint_sql(sql)] += 1
+
+    def duplicates(self, threshold: int) -> list:
+        """[(отпечаток, количество)] для запросов, повторенных не менее threshold раз."""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+def get_query_budget(view_func, method: str):
+    """Бюджет запросов представления для HTTP-метода или None."""
+    view_class = getattr(view_func, 'cls', None)
+    budget = getattr(view_class, 'query_budget', None)
+    if not isinstance(budget, dict):
+        return budget
+
+    actions = getattr(view_func, 'actions', None) or {}
+    return budget.get(actions.get(method.lower()))
+
+
+def get_view_name(view_func, method: str) -> str:
+    """Имя представления для логов: ProductViewSet.list."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__qualname__', repr(view_func))
+
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class QueryProfilingMiddleware:
+    """Профилирование запросов к базе для запросов к API."""
+
+    def __init__(self, get_response):
+        self.settings = get_profiling_settings()
+        if not self.settings['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith(tuple(self.settings['PATH_PREFIXES'])):
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        request.query_profile = profile
+        request.profiling_view = None
+        started = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+
+        total = time.perf_counter() - started
+        render = getattr(request, 'profiling_render_time', 0.0)
+        self.report(request, response, profile, total, render)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, 'query_profile'):
+            request.profiling_view = view_func
+
+    def process_template_response(self, request, response):
+        # Ответы DRF рендерятся в JSON после выхода из представления
+        if hasattr(request, 'query_profile'):
+            render_started = time.perf_counter()
+
+            def finish_render(rendered):
+                request.profiling_render_time = time.perf_counter() - render_started
+
+            response.add_post_render_callback(finish_render)
+        return response
+
+    def report(self, request, response, profile: QueryProfile, total: float, render: float):
+        view_func = request.profiling_view
+        view_name = get_view_name(view_func, request.method) if view_func else None
+        duplicates = profile.duplicates(self.settings['DUPLICATE_THRESHOLD'])
+
+        if self.settings['SERVER_TIMING']:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={profile.duration * 1000:.1f};desc="{profile.count} queries"',
+                f'app;dur={(total - profile.duration - render) * 1000:.1f}',
+                f'render;dur={render * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+
+        data = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': profile.count,
+            'db_ms': round(profile.duration * 1000, 1),
+            'render_ms': round(render * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+            'duplicates': [{'sql': sql[:300], 'count': count} for sql, count in duplicates],
+        }
+        log = logger.warning if duplicates else logger.info
+        log(f"Профиль запроса: {json.dumps(data, ensure_ascii=False)}")
+
+        budget = get_query_budget(view_func, request.method) if view_func else None
+        if budget is not None and profile.count > budget:
+            message = f"{view_name}: {profile.count} запросов к базе при бюджете {budget} ({request.path})"
+            if self.settings['ENFORCE_BUDGETS']:
+                raise QueryBudgetExceeded(message)
+            logger.warning(f"Превышен бюджет запросов: {message}")
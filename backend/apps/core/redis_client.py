@@ -0,0 +1,18 @@
+"""
+Прямой доступ к Redis из кэша по умолчанию.
+
+Нужен для структур, которых нет в API кэша Django (хэши, сортированные
+множества, конвейеры команд). Если кэш не Redis (локальный кэш в разработке),
+возвращается None, и вызывающий код работает без Redis.
+"""
+
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+
+def get_redis_client():
+    """Клиент Redis из кэша по умолчанию или None, если кэш не Redis."""
+    backend = caches['default']
+    if not isinstance(backend, RedisCache):
+        return None
+    return backend._cache.get_client(write=True)
@@ -0,0 +1,47 @@
+"""
+Вспомогательные средства для тестов.
+
+QueryBudgetTestMixin проверяет в тестах тот же бюджет запросов к базе
+(query_budget представления), что QueryProfilingMiddleware проверяет в CI
+на живых запросах, но не зависит от настроек профилирования.
+"""
+
+from urllib.parse import urlsplit
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .profiling import get_query_budget, get_view_name
+
+
+class QueryBudgetTestMixin:
+    """Миксин TestCase: запрос к API с подсчетом запросов к базе по бюджету представления."""
+
+    def assertWithinQueryBudget(self, path: str, method: str = 'GET', data=None, cold_cache: bool = True):
+        """
+        Выполняет запрос self.client и проверяет, что число запросов к базе
+        не больше query_budget представления. Возвращает ответ.
+
+        По умолчанию общий кэш очищается перед запросом: бюджет должен
+        выполняться и при промахе кэша.
+        """
+        view_func = resolve(urlsplit(path).path).func
+        view_name = get_view_name(view_func, method)
+        budget = get_query_budget(view_func, method)
+        self.assertIsNotNone(budget, f"У представления {view_name} не задан query_budget")
+
+        if cold_cache:
+            cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method.lower())(path, data)
+
+        self.assertLess(response.status_code, 400, f"{view_name}: ответ {response.status_code} ({path})")
+        executed = '\n'.join(query['sql'] for query in queries.captured_queries)
+        self.assertLessEqual(
+            len(queries), budget,
+            f"{view_name}: {len(queries)} запросов к базе при бюджете {budget} ({path})\n{executed}"
+        )
+        return response
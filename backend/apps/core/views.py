@@ -0,0 +1,58 @@
+"""
+Представления приложения core: эндпоинт метрик /metrics.
+"""
+
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+
+from .metrics import register_collector, render_metrics
+
+
+@register_collector
+def collect_queue_depths():
+    """Глубина очередей повторной отправки и фоновой обработки."""
+    from apps.notifications.models import NotificationLog, NotificationOutbox
+    from apps.payments.models import PaymentWebhookEvent
+
+    return [
+        (
+            'faida_notification_retry_queue_depth',
+            'gauge',
+            'Уведомления, ожидающие повторной отправки',
+            [({}, NotificationLog.objects.filter(status='retrying').count())],
+        ),
+        (
+            'faida_notification_outbox_depth',
+            'gauge',
+            'События уведомлений в очереди на отправку',
+            [({}, NotificationOutbox.objects.filter(status__in=['pending', 'processing']).count())],
+        ),
+        (
+            'faida_payment_webhook_queue_depth',
+            'gauge',
+            'Необработанные уведомления YooKassa',
+            [({}, PaymentWebhookEvent.objects.filter(status__in=['pending', 'processing']).count())],
+        ),
+    ]
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Метрики в формате Prometheus.
+
+    Если задан METRICS_SETTINGS['TOKEN'], нужен заголовок
+    Authorization: Bearer <токен>. Без токена эндпоинт доступен только в DEBUG.
+    """
+    token = settings.METRICS_SETTINGS.get('TOKEN')
+    if token:
+        provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(provided, token):
+            return HttpResponse('Unauthorized', status=401)
+    elif not settings.DEBUG:
+        raise Http404
+
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -5,3 +5,7 @@ class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.jobs'
     verbose_name = 'Вакансии'
+
+    def ready(self):
+        """Подключение сигналов при инициализации приложения"""
+        import apps.jobs.signals
@@ -3,13 +3,17 @@
 """
 
 from django.db import models
-from django.utils.text import slugify
 from django.conf import settings
 
+from apps.core.content import PublicContentMixin
 
-class Job(models.Model):
+
+class Job(PublicContentMixin, models.Model):
     """Модель вакансии."""
 
+    content_cache_section = 'jobs'
+    slug_fallback_prefix = 'job'
+
     EMPLOYMENT_TYPES = [
         ('full_time', 'Полная занятость'),
         ('part_time', 'Частичная занятость'),
@@ -21,6 +25,12 @@ class Job(models.Model):
     slug = models.SlugField('URL slug', max_length=255, unique=True, blank=True)
     short_description = models.TextField('Краткое описание', max_length=500)
     content = models.TextField('Полное описание (HTML)')
+    rendered_content = models.TextField(
+        'HTML для сайта',
+        blank=True,
+        editable=False,
+        help_text='Контент с относительными ссылками на медиа, обновляется при сохранении'
+    )
     content_delta = models.JSONField('Quill Delta формат', null=True, blank=True, help_text='Quill Delta для сохранения форматирования')
     preview_image = models.ImageField(
         'Превью изображение для ленты',
@@ -90,23 +100,6 @@ class Job(models.Model):
             return self.preview_image.url
         return None
 
-    def save(self, *args, **kwargs):
-        """Автоматически генерирует slug из названия."""
-        if not self.slug:
-            # Транслитерация кириллицы для slug
-            base_slug = slugify(self.title, allow_unicode=False)
-            if not base_slug:  # Если название полностью на кириллице
-                import uuid
-                base_slug = f"job-{uuid.uuid4().hex[:8]}"
-
-            slug = base_slug
-            counter = 1
-            while Job.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
-
 
 class JobMedia(models.Model):
     """Модель для медиа-файлов вакансии (изображения, видео)."""
@@ -0,0 +1,16 @@
+"""
+Сигналы вакансий: сброс кэша публичных ответов API.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.content import invalidate_public_content
+
+from .models import Job, JobMedia
+
+
+@receiver([post_save, post_delete], sender=Job)
+@receiver([post_save, post_delete], sender=JobMedia)
+def invalidate_jobs_cache(sender, instance, **kwargs):
+    invalidate_public_content('jobs')
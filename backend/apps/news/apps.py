@@ -5,3 +5,7 @@ class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        """Подключение сигналов при инициализации приложения"""
+        import apps.news.signals
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:02
+
+from django.db import migrations, models
+
+from apps.core.content import rewrite_media_urls
+
+
+def fill_rendered_content(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    items = list(News.objects.only('id', 'content'))
+    for item in items:
+        item.rendered_content = rewrite_media_urls(item.content)
+    News.objects.bulk_update(items, ['rendered_content'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='rendered_content',
+            field=models.TextField(blank=True, editable=False, help_text='Контент с относительными ссылками на медиа, обновляется при сохранении', verbose_name='HTML для сайта'),
+        ),
+        migrations.RunPython(fill_rendered_content, migrations.RunPython.noop),
+    ]
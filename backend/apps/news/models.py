@@ -1,7 +1,9 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 from django.conf import settings
-import uuid
+
+from apps.core.content import PublicContentMixin
 
 
 class NewsCategory(models.Model):
@@ -25,9 +27,12 @@ class NewsCategory(models.Model):
         super().save(*args, **kwargs)
 
 
-class News(models.Model):
+class News(PublicContentMixin, models.Model):
     """Модель новости."""
 
+    content_cache_section = 'news'
+    slug_fallback_prefix = 'news'
+
     title = models.CharField('Заголовок', max_length=255)
     slug = models.SlugField('URL слаг', max_length=255, unique=True, blank=True)
     category = models.ForeignKey(
@@ -60,6 +65,12 @@ class News(models.Model):
         blank=True,
         help_text='Quill Delta для сохранения форматирования'
     )
+    rendered_content = models.TextField(
+        'HTML для сайта',
+        blank=True,
+        editable=False,
+        help_text='Контент с относительными ссылками на медиа, обновляется при сохранении'
+    )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -99,27 +110,12 @@ class News(models.Model):
     def __str__(self):
         return self.title
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            # Генерируем slug из заголовка
-            base_slug = slugify(self.title)
-            if not base_slug:
-                base_slug = f'news-{uuid.uuid4().hex[:8]}'
-
-            slug = base_slug
-            counter = 1
-            while News.objects.filter(slug=slug).exists():
-                slug = f'{base_slug}-{counter}'
-                counter += 1
-            self.slug = slug
-
+    def fill_derived_fields(self):
+        super().fill_derived_fields()
         # Автоматически устанавливаем дату публикации при первой публикации
         if self.is_published and not self.published_at:
-            from django.utils import timezone
             self.published_at = timezone.now()
 
-        super().save(*args, **kwargs)
-
     def get_preview_image_url(self):
         """Получить URL превью изображения."""
         if self.preview_image:
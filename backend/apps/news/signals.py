@@ -0,0 +1,17 @@
+"""
+Сигналы новостей: сброс кэша публичных ответов API.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.content import invalidate_public_content
+
+from .models import News, NewsCategory, NewsMedia
+
+
+@receiver([post_save, post_delete], sender=News)
+@receiver([post_save, post_delete], sender=NewsMedia)
+@receiver([post_save, post_delete], sender=NewsCategory)
+def invalidate_news_cache(sender, instance, **kwargs):
+    invalidate_public_content('news')
@@ -0,0 +1,79 @@
+"""
+Тесты переноса просмотров новостей из Redis в базу.
+"""
+
+from unittest import mock
+
+from django.test import TestCase
+
+from . import views_counter
+from .models import News
+from .views_counter import FLUSHING_VIEWS_KEY, PENDING_VIEWS_KEY, flush_view_counts
+
+
+class FakeRedisHashes:
+    """Хэши Redis в памяти: только команды, которые использует перенос просмотров."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def exists(self, key):
+        return int(key in self.hashes)
+
+    def rename(self, key, new_key):
+        self.hashes[new_key] = self.hashes.pop(key)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(str(field), None)
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+class FlushViewCountsTests(TestCase):
+
+    def setUp(self):
+        self.news = [
+            News.objects.create(title=f'Новость {index}', content='Текст', views_count=10)
+            for index in range(3)
+        ]
+        self.client = FakeRedisHashes()
+        self.client.hashes[PENDING_VIEWS_KEY] = {str(news.pk): '5' for news in self.news}
+        patcher = mock.patch.object(views_counter, 'get_redis_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def views(self):
+        return [News.objects.get(pk=news.pk).views_count for news in self.news]
+
+    def test_views_are_added_to_database(self):
+        self.assertEqual(flush_view_counts(), 3)
+
+        self.assertEqual(self.views(), [15, 15, 15])
+        self.assertEqual(self.client.hashes, {})
+
+    def test_interrupted_flush_does_not_count_written_batches_twice(self):
+        update = views_counter.News.objects.filter
+        calls = []
+
+        def fail_on_second_batch(*args, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise ConnectionError('Соединение с базой потеряно')
+            return update(*args, **kwargs)
+
+        with mock.patch.object(views_counter, 'FLUSH_BATCH_SIZE', 2), \
+                mock.patch.object(views_counter.News.objects, 'filter', side_effect=fail_on_second_batch):
+            with self.assertRaises(ConnectionError):
+                flush_view_counts()
+
+        self.assertEqual(len(self.client.hashes[FLUSHING_VIEWS_KEY]), 1)
+
+        flush_view_counts()
+
+        self.assertEqual(self.views(), [15, 15, 15])
+        self.assertEqual(self.client.hashes, {})
@@ -0,0 +1,160 @@
+"""
+Буферизованный счетчик просмотров новостей.
+
+Просмотр новости не пишет в базу: в Redis увеличивается счетчик новости
+в хэше необработанных просмотров (HINCRBY) и ее рейтинг в сортированном
+множестве популярности (ZINCRBY). Планировщик run_scheduler периодически
+вызывает flush_view_counts(), которая переносит накопленные просмотры в
+News.views_count одним UPDATE с F()-выражением, поэтому параллельные
+просмотры не теряются.
+
+Рейтинг популярности хранит полное число просмотров (из базы плюс еще не
+перенесенные), поэтому его же показывает страница новости. Если Redis был
+очищен, рейтинг заполняется из базы при первом обращении.
+
+Без Redis (например, локальный кэш в разработке) просмотр увеличивает
+счетчик в базе сразу, а популярные новости берутся из базы.
+"""
+
+import logging
+from typing import List, Optional
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from apps.core.redis_client import get_redis_client
+
+from .models import News
+
+logger = logging.getLogger(__name__)
+
+# Хэш {id новости: просмотры}, еще не перенесенные в базу
+PENDING_VIEWS_KEY = 'news:views:pending'
+# Снимок хэша, который переносится в базу в данный момент
+FLUSHING_VIEWS_KEY = 'news:views:flushing'
+# Сортированное множество {id новости: всего просмотров}
+POPULAR_NEWS_KEY = 'news:views:popular'
+# Признак того, что рейтинг заполнен из базы
+POPULAR_SEEDED_KEY = 'news:views:popular:seeded'
+
+FLUSH_BATCH_SIZE = 500
+
+
+def record_view(news_id: int) -> int:
+    """
+    Учитывает просмотр новости. Возвращает общее число просмотров с учетом
+    еще не перенесенных в базу.
+    """
+    client = get_redis_client()
+    if client is not None:
+        try:
+            pipe = client.pipeline()
+            pipe.exists(POPULAR_SEEDED_KEY)
+            pipe.hincrby(PENDING_VIEWS_KEY, news_id, 1)
+            pipe.zincrby(POPULAR_NEWS_KEY, 1, news_id)
+            seeded, _, total = pipe.execute()
+            if not seeded:
+                _seed_popular_news(client)
+                total = client.zscore(POPULAR_NEWS_KEY, news_id) or 0
+            return int(total)
+        except Exception as e:
+            logger.warning(f"Redis недоступен, просмотр новости #{news_id} записывается в базу: {e}")
+
+    News.objects.filter(pk=news_id).update(views_count=F('views_count') + 1)
+    return News.objects.filter(pk=news_id).values_list('views_count', flat=True).first() or 0
+
+
+def flush_view_counts() -> int:
+    """
+    Переносит накопленные просмотры в базу. Возвращает количество обновленных новостей.
+
+    Хэш необработанных просмотров атомарно переименовывается в снимок, поэтому
+    просмотры, пришедшие во время переноса, попадают уже в новый хэш. Каждый
+    пакет записывается в базу в своей транзакции и после коммита удаляется из
+    снимка. Если перенос прервался, в снимке остаются только незаписанные
+    пакеты, и следующий вызов не учитывает уже записанные просмотры повторно.
+    """
+    client = get_redis_client()
+    if client is None:
+        return 0
+
+    if not client.exists(FLUSHING_VIEWS_KEY):
+        if not client.exists(PENDING_VIEWS_KEY):
+            return 0
+        client.rename(PENDING_VIEWS_KEY, FLUSHING_VIEWS_KEY)
+
+    counts = {
+        int(news_id): int(views)
+        for news_id, views in client.hgetall(FLUSHING_VIEWS_KEY).items()
+        if int(views) > 0
+    }
+
+    items = list(counts.items())
+    for start in range(0, len(items), FLUSH_BATCH_SIZE):
+        batch = items[start:start + FLUSH_BATCH_SIZE]
+        batch_ids = [news_id for news_id, _ in batch]
+        with transaction.atomic():
+            News.objects.filter(pk__in=batch_ids).update(
+                views_count=F('views_count') + Case(
+                    *[When(pk=news_id, then=Value(views)) for news_id, views in batch],
+                    default=Value(0),
+                    output_field=IntegerField()
+                )
+            )
+        client.hdel(FLUSHING_VIEWS_KEY, *batch_ids)
+
+    client.delete(FLUSHING_VIEWS_KEY)
+
+    if counts:
+        logger.info(f"Перенесены просмотры новостей: {len(counts)} новостей, {sum(counts.values())} просмотров")
+    return len(counts)
+
+
+def get_popular_news_ids(limit: int) -> Optional[List[int]]:
+    """
+    Id самых просматриваемых новостей по убыванию просмотров
+    или None, если рейтинг в Redis недоступен.
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+
+    try:
+        if not client.exists(POPULAR_SEEDED_KEY):
+            _seed_popular_news(client)
+        return [int(news_id) for news_id in client.zrevrange(POPULAR_NEWS_KEY, 0, limit - 1)]
+    except Exception as e:
+        logger.warning(f"Рейтинг популярных новостей в Redis недоступен: {e}")
+        return None
+
+
+def _seed_popular_news(client) -> None:
+    """Заполняет рейтинг из базы с учетом еще не перенесенных просмотров."""
+    scores = dict(News.objects.filter(views_count__gt=0).values_list('id', 'views_count'))
+
+    for key in (FLUSHING_VIEWS_KEY, PENDING_VIEWS_KEY):
+        for news_id, views in client.hgetall(key).items():
+            news_id = int(news_id)
+            scores[news_id] = scores.get(news_id, 0) + int(views)
+
+    pipe = client.pipeline()
+    pipe.delete(POPULAR_NEWS_KEY)
+    if scores:
+        pipe.zadd(POPULAR_NEWS_KEY, scores)
+    pipe.set(POPULAR_SEEDED_KEY, 1)
+    pipe.execute()
+
+
+def forget_news(news_id: int) -> None:
+    """Убирает удаленную новость из рейтинга и буфера просмотров."""
+    client = get_redis_client()
+    if client is None:
+        return
+
+    try:
+        pipe = client.pipeline()
+        pipe.zrem(POPULAR_NEWS_KEY, news_id)
+        pipe.hdel(PENDING_VIEWS_KEY, news_id)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось убрать новость #{news_id} из рейтинга просмотров: {e}")
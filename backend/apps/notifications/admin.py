@@ -10,7 +10,8 @@ from .models import (
     NotificationTemplate,
     NotificationContact,
     NotificationRule,
-    NotificationLog
+    NotificationLog,
+    NotificationOutbox
 )
 
 
@@ -73,7 +74,7 @@ class NotificationLogAdmin(admin.ModelAdmin):
     list_display = ('notification_type', 'channel', 'get_recipient', 'status', 'retry_count', 'next_retry_at', 'created_at')
     list_filter = ('status', 'channel', 'notification_type__category', 'created_at')
     search_fields = ('message', 'error_message', 'recipient_value')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'message_body')
     ordering = ('-created_at',)
 
     fieldsets = (
@@ -81,7 +82,7 @@ class NotificationLogAdmin(admin.ModelAdmin):
             'fields': ('notification_type', 'channel', 'contact', 'recipient_value', 'status')
         }),
         ('Сообщение', {
-            'fields': ('message', 'error_message')
+            'fields': ('message', 'message_body', 'error_message')
         }),
         ('Повторные попытки', {
             'fields': ('retry_count', 'max_retries', 'next_retry_at')
@@ -96,3 +97,13 @@ class NotificationLogAdmin(admin.ModelAdmin):
         """Показываем контакт или значение получателя."""
         return obj.contact or obj.recipient_value
     get_recipient.short_description = 'Получатель'
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    """Админка для очереди событий уведомлений."""
+    list_display = ('id', 'notification_type_code', 'status', 'attempts', 'locked_at', 'created_at')
+    list_filter = ('status', 'notification_type_code')
+    search_fields = ('notification_type_code', 'error_message')
+    readonly_fields = ('created_at', 'locked_at')
+    ordering = ('id',)
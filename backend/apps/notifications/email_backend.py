@@ -91,7 +91,8 @@ class NotificationEmailBackend(BaseEmailBackend):
                             html_message = content
                             break
 
-                # Отправляем каждому получателю
+                # Отправляем каждому получателю (EmailService берет соединение
+                # из пула, поэтому все письма уходят в одной SMTP-сессии)
                 for recipient in recipients:
                     logger.info(f"Отправка на {recipient}...")
                     result = email_service.send_message(
@@ -0,0 +1,106 @@
+"""
+Management command для сжатия и очистки логов уведомлений.
+Запускается по расписанию (например, раз в сутки через cron).
+"""
+
+import hashlib
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.notifications.models import NotificationLog, NotificationMessage
+
+# Статусы, логи с которыми еще нужны для повторной отправки
+ACTIVE_STATUSES = ['pending', 'retrying']
+
+
+class Command(BaseCommand):
+    help = 'Удаляет старые логи уведомлений и выносит тексты сообщений в общую таблицу без дублей'
+
+    def add_arguments(self, parser):
+        log_settings = getattr(settings, 'NOTIFICATION_LOG_SETTINGS', {})
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=log_settings.get('RETENTION_DAYS', 180),
+            help='Удалять завершенные логи старше указанного количества дней',
+        )
+        parser.add_argument(
+            '--compact-after-days',
+            type=int,
+            default=log_settings.get('COMPACT_AFTER_DAYS', 30),
+            help='Сжимать тексты логов старше указанного количества дней',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество логов, обрабатываемых за один запрос (по умолчанию 1000)',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = options['batch_size']
+
+        deleted = self.delete_old_logs(now - timedelta(days=options['retention_days']), batch_size)
+        self.stdout.write(f'Удалено логов: {deleted}')
+
+        compacted = self.compact_messages(now - timedelta(days=options['compact_after_days']), batch_size)
+        self.stdout.write(f'Сжато логов: {compacted}')
+
+        # Тексты, на которые больше не ссылается ни один лог
+        orphans, _ = NotificationMessage.objects.filter(logs__isnull=True).delete()
+        self.stdout.write(self.style.SUCCESS(f'Удалено неиспользуемых текстов: {orphans}'))
+
+    def delete_old_logs(self, cutoff, batch_size):
+        """Удаляет завершенные логи старше cutoff пачками, не блокируя таблицу надолго."""
+        deleted = 0
+        while True:
+            ids = list(
+                NotificationLog.objects.filter(created_at__lt=cutoff)
+                .exclude(status__in=ACTIVE_STATUSES)
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return deleted
+            deleted += NotificationLog.objects.filter(id__in=ids).delete()[0]
+
+    def compact_messages(self, cutoff, batch_size):
+        """
+        Переносит тексты завершенных логов старше cutoff в NotificationMessage.
+        Одинаковые тексты хранятся один раз.
+        """
+        compacted = 0
+        last_id = 0
+        while True:
+            logs = list(
+                NotificationLog.objects.filter(
+                    id__gt=last_id,
+                    created_at__lt=cutoff,
+                    message_body__isnull=True
+                ).exclude(status__in=ACTIVE_STATUSES).exclude(message='')
+                .only('id', 'message').order_by('id')[:batch_size]
+            )
+            if not logs:
+                return compacted
+            last_id = logs[-1].id
+
+            bodies = {}
+            for log in logs:
+                log.digest = hashlib.sha256(log.message.encode('utf-8')).hexdigest()
+                bodies[log.digest] = log.message
+
+            NotificationMessage.objects.bulk_create(
+                [NotificationMessage(digest=digest, body=body) for digest, body in bodies.items()],
+                ignore_conflicts=True
+            )
+            body_ids = dict(
+                NotificationMessage.objects.filter(digest__in=bodies.keys()).values_list('digest', 'id')
+            )
+
+            for log in logs:
+                log.message_body_id = body_ids[log.digest]
+                log.message = ''
+            NotificationLog.objects.bulk_update(logs, ['message_body', 'message'])
+            compacted += len(logs)
@@ -1,11 +1,10 @@
 """
 Management command для автоматической обработки повторных отправок неудавшихся уведомлений.
-Запускается по расписанию (например, каждую минуту через cron или планировщик).
+Запускается по расписанию (задача Celery process_notification_retries) или вручную.
 """
 
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from apps.notifications.models import NotificationLog
+from apps.notifications.retry import process_due_retries
 
 
 class Command(BaseCommand):
@@ -20,75 +19,12 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        limit = options['limit']
-        now = timezone.now()
+        stats = process_due_retries(options['limit'])
 
-        # Находим уведомления, готовые к повторной отправке
-        retry_logs = NotificationLog.objects.filter(
-            status='retrying',
-            next_retry_at__lte=now
-        ).select_related(
-            'notification_type',
-            'channel',
-            'contact'
-        ).order_by('next_retry_at')[:limit]
-
-        if not retry_logs.exists():
+        if not stats['processed']:
             self.stdout.write(self.style.SUCCESS('Нет уведомлений для повторной отправки'))
             return
 
-        self.stdout.write(f'Найдено {retry_logs.count()} уведомлений для повторной отправки')
-
-        success_count = 0
-        fail_count = 0
-
-        for log in retry_logs:
-            try:
-                self.stdout.write(f'Повторная отправка #{log.id}: {log.notification_type.name} → {log.recipient_value}')
-
-                # Повторная отправка
-                if log.channel.code == 'whatsapp':
-                    from apps.notifications.services import WhatsAppService
-                    whatsapp = WhatsAppService(
-                        instance_id=log.channel.settings.get('instance_id'),
-                        api_token=log.channel.settings.get('api_token')
-                    )
-                    result = whatsapp.send_message(log.recipient_value, log.message)
-
-                    if 'error' in result:
-                        log.mark_as_failed(result['error'], schedule_retry=True)
-                        self.stdout.write(self.style.ERROR(f'  ✗ Ошибка: {result["error"]}'))
-                        fail_count += 1
-                    else:
-                        log.mark_as_sent(result.get('idMessage'))
-                        self.stdout.write(self.style.SUCCESS(f'  ✓ Успешно отправлено'))
-                        success_count += 1
-
-                elif log.channel.code == 'email':
-                    from django.core.mail import send_mail
-                    from django.conf import settings
-
-                    try:
-                        send_mail(
-                            subject=f"{log.notification_type.name} - Faida Group",
-                            message=log.message,
-                            from_email=settings.DEFAULT_FROM_EMAIL,
-                            recipient_list=[log.recipient_value],
-                            fail_silently=False,
-                        )
-                        log.mark_as_sent()
-                        self.stdout.write(self.style.SUCCESS(f'  ✓ Email отправлен'))
-                        success_count += 1
-                    except Exception as e:
-                        log.mark_as_failed(str(e), schedule_retry=True)
-                        self.stdout.write(self.style.ERROR(f'  ✗ Ошибка email: {str(e)}'))
-                        fail_count += 1
-
-            except Exception as e:
-                log.mark_as_failed(str(e), schedule_retry=True)
-                self.stdout.write(self.style.ERROR(f'  ✗ Критическая ошибка: {str(e)}'))
-                fail_count += 1
-
         self.stdout.write(self.style.SUCCESS(
-            f'\nОбработано: {success_count + fail_count} | Успешно: {success_count} | Ошибок: {fail_count}'
+            f"Обработано: {stats['processed']} | Успешно: {stats['sent']} | Ошибок: {stats['failed']}"
         ))
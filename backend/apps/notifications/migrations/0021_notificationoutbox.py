@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:29
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0020_remove_notificationtemplate_unique_default_template_per_type_and_channel_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type_code', models.CharField(max_length=50, verbose_name='Код типа уведомления')),
+                ('context', models.JSONField(blank=True, default=dict, help_text='Данные для подстановки в шаблон или для их построения воркером', verbose_name='Контекст')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'Обрабатывается'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Количество попыток')),
+                ('error_message', models.TextField(blank=True, verbose_name='Сообщение об ошибке')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, help_text='После ошибки обработка откладывается', verbose_name='Доступно для обработки с')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Взято в обработку')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Событие очереди уведомлений',
+                'verbose_name_plural': 'Очередь уведомлений',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='notificatio_status_a0e682_idx')],
+            },
+        ),
+    ]
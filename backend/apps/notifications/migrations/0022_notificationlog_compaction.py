@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0021_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True, verbose_name='SHA-256 текста')),
+                ('body', models.TextField(verbose_name='Текст сообщения')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Текст уведомления',
+                'verbose_name_plural': 'Тексты уведомлений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificationlog',
+            index=models.Index(fields=['status', 'id'], name='notificatio_status_586086_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationlog',
+            index=models.Index(fields=['notification_type', 'id'], name='notificatio_notific_80c0ff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationlog',
+            index=models.Index(fields=['created_at'], name='notificatio_created_01830a_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationlog',
+            name='message_body',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='logs', to='notifications.notificationmessage', verbose_name='Текст (сжатый лог)'),
+        ),
+    ]
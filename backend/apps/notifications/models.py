@@ -6,7 +6,12 @@
 from django.db import models
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
-import re
+from django.utils import timezone
+from django.utils.functional import cached_property
+from datetime import timedelta
+import random
+
+from .templating import PLACEHOLDER_RE, compile_template
 
 
 class NotificationCategory(models.Model):
@@ -219,8 +224,17 @@ class NotificationTemplate(models.Model):
         """
         Извлекает все переменные из шаблона вида {{variable_name}}.
         """
-        pattern = r'\{\{(\w+)\}\}'
-        return set(re.findall(pattern, self.template))
+        return set(PLACEHOLDER_RE.findall(self.template))
+
+    @cached_property
+    def compiled_template(self):
+        """Скомпилированный текст шаблона (см. apps.notifications.templating)."""
+        return compile_template(self.template)
+
+    @cached_property
+    def compiled_subject(self):
+        """Скомпилированная тема письма."""
+        return compile_template(self.subject)
 
     def clean(self):
         """
@@ -249,10 +263,16 @@ class NotificationTemplate(models.Model):
             })
 
     def save(self, *args, **kwargs):
-        """Вызываем clean() перед сохранением."""
+        """Вызываем clean() перед сохранением и заново компилируем шаблон."""
         self.full_clean()
         super().save(*args, **kwargs)
 
+        # Компилируем сразу, чтобы экземпляр в кэше маршрутизации не разбирал шаблон при отправке
+        self.__dict__.pop('compiled_template', None)
+        self.__dict__.pop('compiled_subject', None)
+        self.compiled_template
+        self.compiled_subject
+
 
 class NotificationContact(models.Model):
     """
@@ -474,6 +494,30 @@ class RuleContactTemplate(models.Model):
         return f"{self.rule} | {self.contact.name} → {self.template.name}"
 
 
+class NotificationMessage(models.Model):
+    """
+    Текст сообщения, вынесенный из старых логов уведомлений.
+
+    Команда compact_notification_logs переносит тексты старых логов сюда,
+    храня одинаковые сообщения (например, одно уведомление нескольким
+    получателям) один раз по SHA-256.
+    """
+    digest = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='SHA-256 текста'
+    )
+    body = models.TextField(verbose_name='Текст сообщения')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+
+    class Meta:
+        verbose_name = 'Текст уведомления'
+        verbose_name_plural = 'Тексты уведомлений'
+
+    def __str__(self):
+        return self.digest
+
+
 class NotificationLog(models.Model):
     """
     Лог отправленных уведомлений (опционально, для отладки и статистики).
@@ -521,6 +565,15 @@ class NotificationLog(models.Model):
         verbose_name='Сообщение',
         help_text='Отправленный текст'
     )
+    # Для сжатых логов текст хранится в NotificationMessage, а message пустое
+    message_body = models.ForeignKey(
+        NotificationMessage,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='logs',
+        verbose_name='Текст (сжатый лог)'
+    )
     error_message = models.TextField(
         null=True,
         blank=True,
@@ -551,44 +604,147 @@ class NotificationLog(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status', 'next_retry_at']),  # Для поиска неудачных с запланированной повторной отправкой
+            # Фильтры API логов с постраничной выдачей по id
+            models.Index(fields=['status', 'id']),
+            models.Index(fields=['notification_type', 'id']),
+            models.Index(fields=['created_at']),
         ]
 
     def __str__(self):
         recipient = self.contact or self.recipient_value
         return f"{self.notification_type} → {recipient} ({self.status})"
 
+    @property
+    def message_text(self):
+        """Текст сообщения с учетом сжатых логов."""
+        if self.message_body_id is not None:
+            return self.message_body.body
+        return self.message
+
+    # Поля, которые меняются при фиксации результата отправки
+    RESULT_FIELDS = ['status', 'error_message', 'retry_count', 'next_retry_at', 'updated_at']
+
     def can_retry(self):
         """Проверяет, можно ли повторить отправку."""
         return self.status == 'failed' and self.retry_count < self.max_retries
 
-    def mark_as_sent(self):
-        """Помечает уведомление как успешно отправленное."""
+    def set_sent(self):
+        """Переводит уведомление в статус "отправлено" (без сохранения)."""
         self.status = 'sent'
         self.error_message = ''
         self.next_retry_at = None
-        self.save()
+        self.updated_at = timezone.now()
 
-    def mark_as_failed(self, error_message: str, schedule_retry: bool = True):
+    def set_failed(self, error_message: str, schedule_retry: bool = True):
         """
-        Помечает уведомление как неудачное.
+        Фиксирует неудачную попытку (без сохранения).
 
-        Args:
-            error_message: Текст ошибки
-            schedule_retry: Планировать ли повторную попытку
+        Если лимит попыток не исчерпан, планирует повтор с экспоненциальной
+        задержкой и случайным разбросом, иначе оставляет статус "ошибка".
         """
-        from datetime import timedelta
-        from django.utils import timezone
-
         self.status = 'failed'
         self.error_message = error_message
         self.retry_count += 1
+        self.next_retry_at = None
+        self.updated_at = timezone.now()
 
         # Планируем повторную попытку если не превышен лимит
         if schedule_retry and self.can_retry():
-            # Увеличиваем задержку с каждой попыткой: 5 мин, 15 мин, 30 мин
-            delays = [5, 15, 30]
-            delay_minutes = delays[min(self.retry_count - 1, len(delays) - 1)]
-            self.next_retry_at = timezone.now() + timedelta(minutes=delay_minutes)
+            self.next_retry_at = self.updated_at + notification_retry_delay(self.retry_count)
             self.status = 'retrying'
 
-        self.save()
+    def mark_as_sent(self):
+        """Помечает уведомление как успешно отправленное."""
+        self.set_sent()
+        self.save(update_fields=self.RESULT_FIELDS)
+
+    def mark_as_failed(self, error_message: str, schedule_retry: bool = True):
+        """
+        Помечает уведомление как неудачное.
+
+        Args:
+            error_message: Текст ошибки
+            schedule_retry: Планировать ли повторную попытку
+        """
+        self.set_failed(error_message, schedule_retry=schedule_retry)
+        self.save(update_fields=self.RESULT_FIELDS)
+
+
+# Базовая и максимальная задержка повторной отправки уведомления
+NOTIFICATION_RETRY_BASE_DELAY = timedelta(minutes=5)
+NOTIFICATION_RETRY_MAX_DELAY = timedelta(hours=6)
+
+
+def notification_retry_delay(retry_count: int) -> timedelta:
+    """
+    Задержка перед повторной попыткой: 5 мин, 10 мин, 20 мин... (не более 6 часов).
+    Половина задержки случайна, чтобы повторы после общего сбоя провайдера
+    не уходили одновременно.
+    """
+    delay = min(
+        NOTIFICATION_RETRY_BASE_DELAY * (2 ** max(retry_count - 1, 0)),
+        NOTIFICATION_RETRY_MAX_DELAY
+    )
+    return delay / 2 + delay * (random.random() / 2)
+
+
+class NotificationOutbox(models.Model):
+    """
+    Очередь событий для асинхронной отправки уведомлений (transactional outbox).
+
+    Сигналы записывают событие в той же транзакции, что и изменение данных,
+    а воркер Celery отправляет уведомления после коммита. Запрос пользователя
+    не ждет ответа SMTP-сервера или API мессенджеров.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает обработки'),
+        ('processing', 'Обрабатывается'),
+        ('failed', 'Ошибка'),
+    ]
+
+    notification_type_code = models.CharField(
+        max_length=50,
+        verbose_name='Код типа уведомления'
+    )
+    context = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Контекст',
+        help_text='Данные для подстановки в шаблон или для их построения воркером'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Количество попыток'
+    )
+    error_message = models.TextField(
+        blank=True,
+        verbose_name='Сообщение об ошибке'
+    )
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Доступно для обработки с',
+        help_text='После ошибки обработка откладывается'
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взято в обработку'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+
+    class Meta:
+        verbose_name = 'Событие очереди уведомлений'
+        verbose_name_plural = 'Очередь уведомлений'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.notification_type_code} #{self.pk} ({self.status})"
@@ -5,19 +5,18 @@
 
 import logging
 from typing import Dict, List, Optional, Any
-from django.template import Context, Template
 from django.core.mail import send_mail
 from django.conf import settings
 
 from .models import (
     NotificationType,
     NotificationChannel,
-    NotificationRule,
     NotificationContact,
-    NotificationTemplate,
     NotificationLog
 )
+from .routing import get_notification_routes
 from .services import WhatsAppService  # Сохраняем WhatsAppService
+from .templating import render_template
 
 logger = logging.getLogger(__name__)
 
@@ -51,61 +50,33 @@ class NotificationService:
         """
         logs = []
 
-        try:
-            # Получаем тип уведомления
-            notification_type = NotificationType.objects.select_related('category').get(
-                code=notification_type_code,
-                is_enabled=True
-            )
-        except NotificationType.DoesNotExist:
+        # Тип уведомления и активные правила берем из кэша маршрутизации
+        routes = get_notification_routes(notification_type_code)
+        if routes is None:
             logger.error(f"Тип уведомления '{notification_type_code}' не найден или отключен")
             return logs
 
-        # Получаем все активные правила для этого типа
-        rules = NotificationRule.objects.filter(
-            notification_type=notification_type,
-            is_enabled=True,
-            channel__is_active=True
-        ).select_related('channel', 'notification_type').prefetch_related('contacts')
+        notification_type, rules = routes
 
-        if not rules.exists():
+        if not rules:
             logger.warning(f"Нет активных правил для уведомления '{notification_type_code}'")
             return logs
 
         # Для каждого правила отправляем уведомления
-        for rule in rules:
-            # Получаем шаблон для этого типа канала (сначала пытаемся найти is_default=True, если нет - любой)
-            try:
-                # Сначала ищем шаблон по умолчанию
-                template = NotificationTemplate.objects.filter(
-                    notification_type=notification_type,
-                    channel_type=rule.channel.code,
-                    is_default=True
-                ).first()
-
-                # Если нет шаблона по умолчанию, берем любой для этого типа
-                if not template:
-                    template = NotificationTemplate.objects.filter(
-                        notification_type=notification_type,
-                        channel_type=rule.channel.code
-                    ).first()
-
-                if not template:
-                    raise NotificationTemplate.DoesNotExist()
-
-            except NotificationTemplate.DoesNotExist:
-                logger.error(f"Шаблон для {notification_type_code} / {rule.channel.code} не найден")
-                continue
+        for route in rules:
+            rule = route.rule
+            # Шаблон правила (обязательное поле)
+            template = route.template
 
             # Рендерим сообщение
-            rendered_message = self._render_template(template.template, context)
-            rendered_subject = self._render_template(template.subject, context) if template.subject else ''
+            rendered_message = template.compiled_template.render(context)
+            rendered_subject = template.compiled_subject.render(context) if template.subject else ''
 
             # Определяем список получателей
             recipients = []
 
             # Добавляем контакты из правила (для админов/менеджеров)
-            for contact in rule.contacts.filter(is_active=True):
+            for contact in route.contacts:
                 recipients.append({
                     'contact': contact,
                     'value': contact.get_formatted_value(),
@@ -144,6 +115,9 @@ class NotificationService:
                 )
                 logs.append(log)
 
+        # Логи всех получателей записываем одним запросом
+        NotificationLog.objects.bulk_create(logs)
+
         logger.info(f"Отправлено {len(logs)} уведомлений типа '{notification_type_code}'")
         return logs
 
@@ -158,15 +132,7 @@ class NotificationService:
         Returns:
             Отрендеренная строка
         """
-        if not template_str:
-            return ''
-
-        try:
-            template = Template(template_str)
-            return template.render(Context(context))
-        except Exception as e:
-            logger.error(f"Ошибка рендеринга шаблона: {e}")
-            return template_str
+        return render_template(template_str, context)
 
     def _send_to_recipient(self, channel: NotificationChannel, notification_type: NotificationType,
                           contact: Optional[NotificationContact], recipient_value: Optional[str],
@@ -183,10 +149,9 @@ class NotificationService:
             subject: Тема (для email)
 
         Returns:
-            Лог уведомления
+            Лог уведомления (не сохранен, записывается пачкой в send())
         """
-        # Создаем лог
-        log = NotificationLog.objects.create(
+        log = NotificationLog(
             notification_type=notification_type,
             channel=channel,
             contact=contact,
@@ -213,12 +178,12 @@ class NotificationService:
                 raise NotImplementedError(f"Канал '{channel.code}' пока не поддерживается")
 
             # Помечаем как успешно отправленное
-            log.mark_as_sent()
+            log.set_sent()
 
         except Exception as e:
             error_message = str(e)
             logger.error(f"Ошибка отправки {channel.code} уведомления: {error_message}")
-            log.mark_as_failed(error_message, schedule_retry=True)
+            log.set_failed(error_message, schedule_retry=True)
 
         return log
 
@@ -250,46 +215,14 @@ class NotificationService:
 
         logger.info(f"WhatsApp отправлен на {phone}")
 
-    def retry_failed_notifications(self):
+    def retry_failed_notifications(self, limit: int = 50):
         """
         Повторная отправка неудачных уведомлений.
         Вызывается периодически (например, через Celery или cron).
         """
-        from django.utils import timezone
-
-        # Находим уведомления готовые к повторной отправке
-        failed_logs = NotificationLog.objects.filter(
-            status='retrying',
-            next_retry_at__lte=timezone.now()
-        ).select_related('channel', 'notification_type', 'contact')
-
-        logger.info(f"Найдено {failed_logs.count()} уведомлений для повторной отправки")
-
-        for log in failed_logs:
-            try:
-                # Пробуем отправить снова
-                if log.channel.code == 'email':
-                    recipient = log.contact.value if log.contact else log.recipient_value
-                    # Извлекаем subject из сообщения (если есть)
-                    self._send_email(to_email=recipient, subject='', message=log.message)
-
-                elif log.channel.code == 'whatsapp':
-                    phone = log.contact.get_formatted_value() if log.contact else log.recipient_value
-                    self._send_whatsapp(
-                        phone=phone,
-                        message=log.message,
-                        channel_settings=log.channel.settings
-                    )
-
-                # Успешно отправлено
-                log.mark_as_sent()
-                logger.info(f"Успешно повторно отправлено уведомление #{log.id}")
-
-            except Exception as e:
-                # Снова ошибка - планируем следующую попытку
-                error_message = str(e)
-                logger.error(f"Повторная отправка уведомления #{log.id} провалилась: {error_message}")
-                log.mark_as_failed(error_message, schedule_retry=True)
+        from .retry import process_due_retries
+
+        return process_due_retries(limit)
 
 
 # Вспомогательная функция для быстрой отправки (совместимость со старым кодом)
@@ -0,0 +1,133 @@
+"""
+Асинхронная отправка уведомлений через очередь событий (transactional outbox).
+
+Сигналы и представления не отправляют уведомления сами, а вызывают
+enqueue_notification(): событие записывается в NotificationOutbox в той же
+транзакции, что и изменение данных (заказ, пользователь). После коммита
+в очередь notifications ставится задача drain_notification_outbox, которая
+отправляет уведомления вне веб-процесса. Если откатится транзакция,
+откатится и событие, поэтому уведомление о несуществующем заказе не уйдет.
+
+Событие, которое не удалось поставить в очередь Celery (брокер недоступен),
+остается в таблице и обрабатывается при следующем запуске задачи
+планировщиком run_scheduler.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+# Задержка перед повторной обработкой события после ошибки (умножается на номер попытки)
+OUTBOX_RETRY_DELAY = timedelta(minutes=1)
+# Событие в статусе "обрабатывается" дольше этого времени считается брошенным упавшим воркером
+OUTBOX_PROCESSING_TIMEOUT = timedelta(minutes=10)
+
+# Функции, которые строят контекст шаблона из сохраненных в событии данных.
+# Нужны, когда на момент записи события данные еще не готовы
+# (например, позиции нового заказа сохраняются после самого заказа).
+CONTEXT_BUILDERS = {}
+
+
+def context_builder(notification_type_code: str):
+    """Регистрирует функцию построения контекста для типа уведомления."""
+    def decorator(func):
+        CONTEXT_BUILDERS[notification_type_code] = func
+        return func
+    return decorator
+
+
+def enqueue_notification(notification_type_code: str, context: dict) -> NotificationOutbox:
+    """
+    Записывает событие уведомления в очередь в текущей транзакции.
+
+    Отправка выполняется воркером после коммита транзакции.
+    """
+    event = NotificationOutbox.objects.create(
+        notification_type_code=notification_type_code,
+        context=context,
+    )
+    transaction.on_commit(_schedule_drain)
+    return event
+
+
+def _schedule_drain():
+    """Ставит обработку очереди в Celery. Ошибка брокера не должна ломать запрос."""
+    from .tasks import drain_notification_outbox
+
+    try:
+        drain_notification_outbox.delay()
+    except Exception as e:
+        logger.warning(f"Не удалось поставить обработку очереди уведомлений в Celery: {e}")
+
+
+def drain_outbox(limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Обрабатывает до limit событий очереди. Возвращает количество обработанных.
+
+    События забираются по одному через SELECT ... FOR UPDATE SKIP LOCKED,
+    поэтому несколько воркеров могут обрабатывать очередь параллельно.
+    """
+    processed = 0
+    while processed < limit:
+        event = _claim_next_event()
+        if event is None:
+            break
+        _process_event(event)
+        processed += 1
+    return processed
+
+
+def _claim_next_event():
+    """Забирает следующее событие в обработку или возвращает None."""
+    now = timezone.now()
+    with transaction.atomic():
+        event = NotificationOutbox.objects.select_for_update(skip_locked=True).filter(
+            Q(status='pending', available_at__lte=now) |
+            Q(status='processing', locked_at__lt=now - OUTBOX_PROCESSING_TIMEOUT)
+        ).order_by('id').first()
+
+        if event is None:
+            return None
+
+        event.status = 'processing'
+        event.locked_at = now
+        event.attempts += 1
+        event.save(update_fields=['status', 'locked_at', 'attempts'])
+
+    return event
+
+
+def _process_event(event: NotificationOutbox) -> bool:
+    """Отправляет уведомление события. Успешно обработанное событие удаляется."""
+    from .services import NotificationDispatcher
+
+    try:
+        builder = CONTEXT_BUILDERS.get(event.notification_type_code)
+        context = builder(event.context) if builder else event.context
+
+        if context is not None:
+            NotificationDispatcher.send_notification(event.notification_type_code, context)
+
+    except Exception as e:
+        logger.exception(f"Ошибка обработки события уведомления {event}: {e}")
+        status = 'pending' if event.attempts < OUTBOX_MAX_ATTEMPTS else 'failed'
+        NotificationOutbox.objects.filter(pk=event.pk).update(
+            status=status,
+            error_message=str(e),
+            available_at=timezone.now() + OUTBOX_RETRY_DELAY * event.attempts,
+            locked_at=None
+        )
+        return False
+
+    # Результат отправки каждому получателю фиксируется в NotificationLog
+    NotificationOutbox.objects.filter(pk=event.pk).delete()
+    return True
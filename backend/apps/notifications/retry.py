@@ -0,0 +1,139 @@
+"""
+Повторная отправка неудавшихся уведомлений.
+
+Единственная реализация повторов: ее используют задача Celery
+process_notification_retries, одноименная management-команда и
+NotificationService.retry_failed_notifications.
+
+Уведомления, время повтора которых наступило, забираются пачкой через
+SELECT ... FOR UPDATE SKIP LOCKED и на время отправки получают "аренду"
+(next_retry_at сдвигается на RETRY_CLAIM_LEASE), поэтому несколько воркеров
+обрабатывают очередь параллельно и не отправляют одно уведомление дважды.
+Если воркер упадет, уведомления снова станут доступны по истечении аренды.
+
+Отправка идет по каналам: письма - через общий пул SMTP-соединений,
+мессенджеры - параллельно через общие HTTP-сессии. Результаты
+записываются одним bulk_update.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import NotificationLog
+from .services import (
+    NotificationDispatcher,
+    TelegramService,
+    WhatsAppService,
+    run_concurrently,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRY_BATCH_SIZE = 50
+# Время, на которое забранные уведомления скрываются от других воркеров
+RETRY_CLAIM_LEASE = timedelta(minutes=10)
+
+
+def process_due_retries(limit: int = RETRY_BATCH_SIZE) -> dict:
+    """
+    Повторно отправляет до limit уведомлений, время повтора которых наступило.
+
+    Returns:
+        dict: {'processed': ..., 'sent': ..., 'failed': ...}
+    """
+    logs = claim_due_retries(limit)
+    stats = {'processed': len(logs), 'sent': 0, 'failed': 0}
+    if not logs:
+        return stats
+
+    by_channel = defaultdict(list)
+    for log in logs:
+        by_channel[log.channel_id].append(log)
+
+    for channel_logs in by_channel.values():
+        channel = channel_logs[0].channel
+        if channel is not None and channel.code in ('whatsapp', 'telegram'):
+            results = run_concurrently(send_notification_log, channel_logs)
+        else:
+            results = [send_notification_log(log) for log in channel_logs]
+
+        for log, result in zip(channel_logs, results):
+            if result.get('success'):
+                log.set_sent()
+                stats['sent'] += 1
+            else:
+                log.set_failed(result.get('error') or 'Неизвестная ошибка', schedule_retry=True)
+                stats['failed'] += 1
+                logger.warning(f"Повторная отправка уведомления #{log.id} не удалась: {log.error_message}")
+
+    NotificationLog.objects.bulk_update(logs, NotificationLog.RESULT_FIELDS)
+
+    logger.info(
+        f"Повторная отправка уведомлений: обработано {stats['processed']}, "
+        f"успешно {stats['sent']}, ошибок {stats['failed']}"
+    )
+    return stats
+
+
+def claim_due_retries(limit: int) -> list:
+    """Забирает уведомления для повторной отправки, скрывая их от других воркеров."""
+    now = timezone.now()
+
+    with transaction.atomic():
+        logs = list(
+            NotificationLog.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+                status='retrying',
+                next_retry_at__lte=now
+            ).select_related(
+                'notification_type', 'channel', 'contact', 'message_body'
+            ).order_by('next_retry_at')[:limit]
+        )
+
+        if logs:
+            NotificationLog.objects.filter(
+                pk__in=[log.pk for log in logs]
+            ).update(next_retry_at=now + RETRY_CLAIM_LEASE)
+
+    return logs
+
+
+def send_notification_log(log: NotificationLog) -> dict:
+    """
+    Отправляет сохраненное в логе сообщение повторно.
+
+    Returns:
+        dict: {'success': True} или {'error': ...}
+    """
+    channel = log.channel
+    if channel is None:
+        return {'error': 'Канал уведомления удален'}
+
+    if channel.code == 'email':
+        recipient = log.contact.value if log.contact else log.recipient_value
+        subject = f'{log.notification_type.name} - Faida Group' if log.notification_type else 'Faida Group'
+        return NotificationDispatcher._send_to_email(
+            channel=channel,
+            email=recipient,
+            subject=subject,
+            message=log.message_text
+        )
+
+    recipient = log.contact.get_formatted_value() if log.contact else log.recipient_value
+    channel_settings = channel.settings
+
+    if channel.code == 'whatsapp':
+        return WhatsAppService(
+            instance_id=channel_settings.get('instance_id'),
+            api_token=channel_settings.get('api_token')
+        ).send_message(recipient, log.message_text)
+
+    if channel.code == 'telegram':
+        return TelegramService(
+            bot_token=channel_settings.get('bot_token')
+        ).send_message(recipient, log.message_text)
+
+    return {'error': f'Неподдерживаемый тип канала: {channel.code}'}
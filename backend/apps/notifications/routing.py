@@ -0,0 +1,119 @@
+"""
+Кэш маршрутизации уведомлений.
+
+Настройки уведомлений (типы, правила, каналы, шаблоны, контакты) меняются
+редко, а читаются при каждой отправке. Поэтому каждый процесс один раз
+собирает таблицу маршрутизации "код типа -> правила -> канал, шаблон,
+активные контакты" и держит ее в памяти. Отправка уведомления не делает
+запросов к таблицам настроек.
+
+Актуальность таблицы определяется версией в общем кэше (Redis). Любое
+изменение настроек (через API админки, Django admin или shell) меняет версию
+после коммита транзакции, и процессы пересобирают таблицу при следующей отправке.
+"""
+
+import logging
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+logger = logging.getLogger(__name__)
+
+ROUTING_VERSION_CACHE_KEY = 'notifications:routing_version'
+
+_routing_table = None
+_routing_version = None
+_routing_lock = threading.Lock()
+
+
+class NotificationRoute:
+    """Правило отправки с уже загруженными каналом, шаблоном и активными контактами."""
+
+    __slots__ = ('rule', 'channel', 'template', 'contacts')
+
+    def __init__(self, rule, contacts):
+        self.rule = rule
+        self.channel = rule.channel
+        self.template = rule.default_template
+        self.contacts = contacts
+
+
+def bump_routing_version() -> None:
+    """Помечает таблицы маршрутизации всех процессов устаревшими."""
+    try:
+        cache.set(ROUTING_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.warning(f"Не удалось обновить версию маршрутизации уведомлений: {e}")
+
+
+def _get_current_version():
+    """Текущая версия настроек из общего кэша или None, если кэш недоступен."""
+    try:
+        version = cache.get(ROUTING_VERSION_CACHE_KEY)
+        if version is None:
+            # Кэш очищен или еще не заполнен - заводим новую версию
+            cache.add(ROUTING_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+            version = cache.get(ROUTING_VERSION_CACHE_KEY)
+        return version
+    except Exception as e:
+        logger.warning(f"Кэш версии маршрутизации уведомлений недоступен: {e}")
+        return None
+
+
+def _build_routing_table() -> dict:
+    """Загружает настройки уведомлений и собирает таблицу маршрутизации."""
+    from .models import NotificationType, NotificationRule, NotificationContact
+
+    table = {
+        notification_type.code: (notification_type, [])
+        for notification_type in NotificationType.objects.filter(is_enabled=True)
+    }
+
+    rules = NotificationRule.objects.filter(
+        notification_type__is_enabled=True,
+        is_enabled=True,
+        channel__is_active=True
+    ).select_related(
+        'notification_type', 'channel', 'default_template'
+    ).prefetch_related(
+        Prefetch(
+            'contacts',
+            queryset=NotificationContact.objects.filter(is_active=True).order_by('id'),
+            to_attr='active_contacts'
+        )
+    ).order_by('id')
+
+    for rule in rules:
+        table[rule.notification_type.code][1].append(
+            NotificationRoute(rule, rule.active_contacts)
+        )
+
+    return table
+
+
+def get_routing_table() -> dict:
+    """Возвращает актуальную таблицу маршрутизации процесса."""
+    global _routing_table, _routing_version
+
+    version = _get_current_version()
+
+    with _routing_lock:
+        if version is not None and _routing_table is not None and version == _routing_version:
+            return _routing_table
+
+        table = _build_routing_table()
+        # Без общего кэша нельзя узнать об изменениях, поэтому таблица не сохраняется
+        if version is not None:
+            _routing_table = table
+            _routing_version = version
+        return table
+
+
+def get_notification_routes(notification_type_code: str):
+    """
+    Возвращает (тип уведомления, [NotificationRoute]) для включенного типа
+    или None, если тип не найден или отключен.
+    """
+    return get_routing_table().get(notification_type_code)
@@ -219,8 +219,9 @@ class NotificationLogSerializer(serializers.ModelSerializer):
     notification_type_name = serializers.CharField(source='notification_type.name', read_only=True)
     channel_name = serializers.CharField(source='channel.name', read_only=True)
     contact_name = serializers.CharField(source='contact.name', read_only=True)
+    message = serializers.CharField(source='message_text', read_only=True)
 
     class Meta:
         model = NotificationLog
-        fields = '__all__'
+        exclude = ('message_body',)
         read_only_fields = ('created_at', 'updated_at')
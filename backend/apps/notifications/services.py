@@ -2,15 +2,232 @@
 Сервисы для отправки уведомлений.
 """
 
+import functools
 import requests
 import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 from django.conf import settings
 from django.core.mail import EmailMessage
 from django.core.mail.backends.smtp import EmailBackend
+from requests.adapters import HTTPAdapter
+
+from apps.core.metrics import NOTIFICATION_SEND_SECONDS, NOTIFICATIONS_SENT
+
+from .templating import render_template
 
 logger = logging.getLogger(__name__)
 
+# Соединение, простаивающее дольше этого времени, закрывается: SMTP-серверы
+# сами разрывают неактивные сессии, и переиспользовать его бессмысленно
+SMTP_IDLE_TIMEOUT = 60
+# Сколько свободных соединений держать на один набор настроек SMTP
+SMTP_MAX_IDLE_CONNECTIONS = 2
+
+
+class SMTPConnectionPool:
+    """
+    Пул открытых SMTP-соединений процесса.
+
+    Соединения группируются по настройкам канала (хост, порт, логин, TLS/SSL).
+    Соединение выдается одному отправителю за раз и после отправки возвращается
+    в пул, поэтому серия писем уходит в одной авторизованной сессии без
+    повторного TCP + TLS + AUTH рукопожатия на каждое письмо.
+    """
+
+    def __init__(self, idle_timeout: int = SMTP_IDLE_TIMEOUT, max_idle: int = SMTP_MAX_IDLE_CONNECTIONS):
+        self.idle_timeout = idle_timeout
+        self.max_idle = max_idle
+        self._idle = {}  # ключ настроек -> [(backend, время возврата в пул)]
+        self._lock = threading.Lock()
+
+    def acquire(self, key, factory) -> EmailBackend:
+        """Выдает открытое соединение для настроек key, при необходимости открывает новое."""
+        expired = []
+        backend = None
+
+        with self._lock:
+            now = time.monotonic()
+            for pool_key, entries in list(self._idle.items()):
+                alive = []
+                for entry_backend, released_at in entries:
+                    if now - released_at > self.idle_timeout:
+                        expired.append(entry_backend)
+                    else:
+                        alive.append((entry_backend, released_at))
+                if alive:
+                    self._idle[pool_key] = alive
+                else:
+                    del self._idle[pool_key]
+
+            entries = self._idle.get(key)
+            if entries:
+                backend = entries.pop()[0]
+
+        for expired_backend in expired:
+            self.discard(expired_backend)
+
+        if backend is None:
+            backend = factory()
+            backend.open()
+
+        return backend
+
+    def release(self, key, backend: EmailBackend) -> None:
+        """Возвращает соединение в пул или закрывает его, если пул заполнен."""
+        if backend.connection is None:
+            return
+
+        with self._lock:
+            entries = self._idle.setdefault(key, [])
+            if len(entries) < self.max_idle:
+                entries.append((backend, time.monotonic()))
+                return
+
+        self.discard(backend)
+
+    def discard(self, backend: EmailBackend) -> None:
+        """Закрывает соединение, не возвращая его в пул."""
+        try:
+            backend.close()
+        except Exception as e:
+            logger.debug(f"Ошибка закрытия SMTP соединения: {e}")
+
+    def close_all(self) -> None:
+        """Закрывает все свободные соединения пула."""
+        with self._lock:
+            backends = [backend for entries in self._idle.values() for backend, _ in entries]
+            self._idle.clear()
+
+        for backend in backends:
+            self.discard(backend)
+
+
+smtp_pool = SMTPConnectionPool()
+
+# Максимум одновременных запросов к API мессенджера при рассылке нескольким контактам
+MESSENGER_MAX_CONCURRENCY = 4
+# Лимиты частоты запросов к провайдерам (запросов в секунду на бота/инстанс в рамках процесса).
+# Telegram допускает до 30 сообщений в секунду на бота, Green API ставит сообщения
+# в очередь инстанса и отвечает 429 при слишком частых запросах.
+MESSENGER_RATE_LIMITS = {
+    'telegram': 25,
+    'whatsapp': 5,
+}
+# Максимальная пауза при ответе 429 Too Many Requests перед единственным повтором
+MESSENGER_MAX_RETRY_AFTER = 5
+
+_http_sessions = {}
+_rate_limiters = {}
+_registry_lock = threading.Lock()
+
+
+class RateLimiter:
+    """Равномерно распределяет запросы: не более rate запросов в секунду."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Ждет, пока не наступит время следующего запроса."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def get_http_session(key: str) -> requests.Session:
+    """
+    Возвращает общую для процесса HTTP-сессию канала.
+
+    Сессия держит keep-alive соединения, поэтому DNS, TCP и TLS не повторяются
+    на каждое сообщение. Размер пула соединений рассчитан на параллельную рассылку.
+    """
+    with _registry_lock:
+        session = _http_sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MESSENGER_MAX_CONCURRENCY)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_sessions[key] = session
+        return session
+
+
+def get_rate_limiter(provider: str, key: str) -> RateLimiter:
+    """Возвращает ограничитель частоты запросов для бота/инстанса провайдера."""
+    with _registry_lock:
+        limiter = _rate_limiters.get((provider, key))
+        if limiter is None:
+            limiter = RateLimiter(MESSENGER_RATE_LIMITS[provider])
+            _rate_limiters[(provider, key)] = limiter
+        return limiter
+
+
+def post_with_rate_limit(session: requests.Session, limiter: RateLimiter, url: str, payload: dict) -> requests.Response:
+    """
+    POST-запрос к API провайдера с учетом лимита частоты.
+    При ответе 429 выдерживает паузу Retry-After и повторяет запрос один раз.
+    """
+    limiter.wait()
+    response = session.post(url, json=payload, timeout=10)
+
+    if response.status_code == 429:
+        retry_after = response.headers.get('Retry-After')
+        try:
+            # Telegram передает паузу в теле ответа, Green API - в заголовке
+            retry_after = float(retry_after or response.json().get('parameters', {}).get('retry_after', 1))
+        except (ValueError, AttributeError):
+            retry_after = 1
+        time.sleep(min(retry_after, MESSENGER_MAX_RETRY_AFTER))
+        limiter.wait()
+        response = session.post(url, json=payload, timeout=10)
+
+    return response
+
+
+def measured_send(channel_code: str):
+    """Учитывает время и результат отправки сообщения в метриках уведомлений."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            NOTIFICATION_SEND_SECONDS.observe(time.perf_counter() - started, channel=channel_code)
+            NOTIFICATIONS_SENT.inc(channel=channel_code, result='success' if result.get('success') else 'error')
+            return result
+        return wrapper
+    return decorator
+
+
+def run_concurrently(func, items: list) -> list:
+    """
+    Выполняет func для каждого элемента параллельно (не более MESSENGER_MAX_CONCURRENCY
+    потоков) и возвращает результаты в исходном порядке. Исключение превращается
+    в результат вида {'error': ...}.
+    """
+    def call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            logger.error(f"Ошибка параллельной отправки: {e}")
+            return {'error': str(e)}
+
+    if len(items) <= 1:
+        return [call(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(MESSENGER_MAX_CONCURRENCY, len(items))) as executor:
+        return list(executor.map(call, items))
+
 
 class EmailService:
     """
@@ -27,6 +244,23 @@ class EmailService:
         self.use_tls = use_tls
         self.use_ssl = smtp_port == 465  # SSL для порта 465
 
+    @property
+    def _pool_key(self):
+        """Ключ пула SMTP-соединений: соединение переиспользуется только с теми же настройками."""
+        return (self.smtp_host, self.smtp_port, self.smtp_username, self.smtp_password, self.use_tls, self.use_ssl)
+
+    def _create_backend(self) -> EmailBackend:
+        """Создает email backend с настройками канала."""
+        return EmailBackend(
+            host=self.smtp_host,
+            port=self.smtp_port,
+            username=self.smtp_username,
+            password=self.smtp_password,
+            use_tls=self.use_tls and not self.use_ssl,
+            use_ssl=self.use_ssl,
+            fail_silently=False
+        )
+
     def _get_friendly_error_message(self, error: Exception) -> str:
         """
         Преобразовать техническую ошибку SMTP в понятное сообщение.
@@ -68,6 +302,7 @@ class EmailService:
             # Возвращаем оригинальную ошибку, если не распознали
             return f"Ошибка подключения: {error}"
 
+    @measured_send('email')
     def send_message(self, to_email: str, subject: str, message: str, html_message: str = None) -> dict:
         """
         Отправить email сообщение.
@@ -82,31 +317,31 @@ class EmailService:
             dict: Результат отправки
         """
         try:
-            # Создаём кастомный email backend с настройками из канала
-            backend = EmailBackend(
-                host=self.smtp_host,
-                port=self.smtp_port,
-                username=self.smtp_username,
-                password=self.smtp_password,
-                use_tls=self.use_tls and not self.use_ssl,
-                use_ssl=self.use_ssl,
-                fail_silently=False
-            )
-
-            # Создаём email сообщение
-            email = EmailMessage(
-                subject=subject,
-                body=html_message if html_message else message,
-                from_email=self.from_email,
-                to=[to_email],
-                connection=backend
-            )
-
-            if html_message:
-                email.content_subtype = 'html'
-
-            # Отправляем
-            email.send()
+            # Берем открытое соединение из пула вместо нового подключения на каждое письмо
+            backend = smtp_pool.acquire(self._pool_key, self._create_backend)
+
+            try:
+                self._send_over(backend, to_email, subject, message, html_message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                # Сервер закрыл сессию - переподключаемся и повторяем отправку один раз
+                logger.info(f"SMTP соединение с {self.smtp_host} разорвано ({e}), переподключение")
+                smtp_pool.discard(backend)
+                backend = self._create_backend()
+                try:
+                    backend.open()
+                    self._send_over(backend, to_email, subject, message, html_message)
+                except Exception:
+                    smtp_pool.discard(backend)
+                    raise
+            except smtplib.SMTPException:
+                # Ошибка уровня SMTP (например, отклонен получатель) - сессия остается рабочей
+                smtp_pool.release(self._pool_key, backend)
+                raise
+            except Exception:
+                smtp_pool.discard(backend)
+                raise
+
+            smtp_pool.release(self._pool_key, backend)
 
             logger.info(f"Email отправлен на {to_email}")
             return {'success': True}
@@ -115,6 +350,23 @@ class EmailService:
             logger.error(f"Ошибка отправки Email на {to_email}: {e}")
             return {'error': str(e)}
 
+    def _send_over(self, backend: EmailBackend, to_email: str, subject: str,
+                   message: str, html_message: str = None) -> None:
+        """Отправить письмо через уже открытое соединение."""
+        email = EmailMessage(
+            subject=subject,
+            body=html_message if html_message else message,
+            from_email=self.from_email,
+            to=[to_email],
+            connection=backend
+        )
+
+        if html_message:
+            email.content_subtype = 'html'
+
+        # Соединение открыто, поэтому backend не закрывает его после отправки
+        email.send()
+
     def test_connection(self) -> dict:
         """
         Проверить соединение с SMTP сервером.
@@ -123,15 +375,7 @@ class EmailService:
             dict: Результат проверки
         """
         try:
-            backend = EmailBackend(
-                host=self.smtp_host,
-                port=self.smtp_port,
-                username=self.smtp_username,
-                password=self.smtp_password,
-                use_tls=self.use_tls and not self.use_ssl,
-                use_ssl=self.use_ssl,
-                fail_silently=False
-            )
+            backend = self._create_backend()
             backend.open()
             backend.close()
 
@@ -152,7 +396,10 @@ class TelegramService:
     def __init__(self, bot_token: str):
         self.bot_token = bot_token
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        self.session = get_http_session(self.base_url)
+        self.rate_limiter = get_rate_limiter('telegram', bot_token)
 
+    @measured_send('telegram')
     def send_message(self, chat_id: str, message: str) -> dict:
         """
         Отправить текстовое сообщение в Telegram.
@@ -173,13 +420,14 @@ class TelegramService:
         }
 
         try:
-            response = requests.post(url, json=payload, timeout=10)
+            response = post_with_rate_limit(self.session, self.rate_limiter, url, payload)
             response.raise_for_status()
             result = response.json()
 
             if result.get('ok'):
                 logger.info(f"Telegram сообщение отправлено в чат {chat_id}")
-                return result
+                # Единый признак успеха, как у Email и WhatsApp сервисов
+                return {**result, 'success': True}
             else:
                 error_msg = result.get('description', 'Unknown error')
                 logger.error(f"Ошибка отправки Telegram сообщения в чат {chat_id}: {error_msg}")
@@ -199,7 +447,7 @@ class TelegramService:
         url = f"{self.base_url}/getMe"
 
         try:
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
             result = response.json()
 
@@ -212,6 +460,23 @@ class TelegramService:
             logger.error(f"Ошибка получения информации о Telegram боте: {e}")
             return {"error": str(e)}
 
+    def send_message_to_multiple(self, chat_ids: List[str], message: str) -> List[dict]:
+        """
+        Отправить сообщение нескольким получателям параллельно.
+
+        Args:
+            chat_ids: Список ID чатов
+            message: Текст сообщения
+
+        Returns:
+            list: Список ответов от API
+        """
+        results = run_concurrently(lambda chat_id: self.send_message(chat_id, message), chat_ids)
+        return [
+            {'chat_id': chat_id, 'result': result}
+            for chat_id, result in zip(chat_ids, results)
+        ]
+
 
 class WhatsAppService:
     """
@@ -222,7 +487,10 @@ class WhatsAppService:
         self.instance_id = instance_id
         self.api_token = api_token
         self.base_url = f"https://api.green-api.com/waInstance{instance_id}"
+        self.session = get_http_session(self.base_url)
+        self.rate_limiter = get_rate_limiter('whatsapp', str(instance_id))
 
+    @measured_send('whatsapp')
     def send_message(self, phone_number: str, message: str) -> dict:
         """
         Отправить текстовое сообщение в WhatsApp.
@@ -245,7 +513,7 @@ class WhatsAppService:
         }
 
         try:
-            response = requests.post(url, json=payload, timeout=10)
+            response = post_with_rate_limit(self.session, self.rate_limiter, url, payload)
             response.raise_for_status()
             result = response.json()
             logger.info(f"WhatsApp сообщение отправлено на {phone_number}: {result}")
@@ -257,7 +525,7 @@ class WhatsAppService:
 
     def send_message_to_multiple(self, phone_numbers: List[str], message: str) -> List[dict]:
         """
-        Отправить сообщение нескольким получателям.
+        Отправить сообщение нескольким получателям параллельно.
 
         Args:
             phone_numbers: Список номеров телефонов
@@ -266,14 +534,11 @@ class WhatsAppService:
         Returns:
             list: Список ответов от API
         """
-        results = []
-        for phone in phone_numbers:
-            result = self.send_message(phone, message)
-            results.append({
-                'phone': phone,
-                'result': result
-            })
-        return results
+        results = run_concurrently(lambda phone: self.send_message(phone, message), phone_numbers)
+        return [
+            {'phone': phone, 'result': result}
+            for phone, result in zip(phone_numbers, results)
+        ]
 
     def check_state_instance(self) -> dict:
         """
@@ -285,7 +550,7 @@ class WhatsAppService:
         url = f"{self.base_url}/getStateInstance/{self.api_token}"
 
         try:
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -307,42 +572,36 @@ class NotificationDispatcher:
             notification_type_code: Код типа уведомления (user_registered, order_status_changed и т.д.)
             context: Контекстные данные для подстановки в шаблон (user, order и т.д.)
         """
-        from .models import NotificationType, NotificationRule, NotificationLog
+        from .models import NotificationLog
+        from .routing import get_notification_routes
+
+        # Логи отправки копятся и записываются одним запросом в конце
+        logs = []
 
         try:
-            # Находим тип уведомления
-            notification_type = NotificationType.objects.filter(
-                code=notification_type_code,
-                is_enabled=True
-            ).first()
+            # Тип уведомления и его активные правила берем из кэша маршрутизации
+            routes = get_notification_routes(notification_type_code)
 
-            if not notification_type:
+            if routes is None:
                 logger.warning(f"Тип уведомления '{notification_type_code}' не найден или отключен")
                 return
 
-            # Находим все активные правила для этого типа
-            rules = NotificationRule.objects.filter(
-                notification_type=notification_type,
-                is_enabled=True
-            ).select_related('channel', 'default_template').prefetch_related('contacts')
+            notification_type, rules = routes
 
-            if not rules.exists():
+            if not rules:
                 logger.info(f"Нет активных правил для типа уведомления '{notification_type_code}'")
                 return
 
-            # Для каждого правила отправляем уведомления
-            for rule in rules:
-                # Проверяем что канал активен
-                if not rule.channel.is_active:
-                    logger.warning(f"Канал '{rule.channel.name}' отключен, пропускаем")
-                    continue
+            # Для каждого правила отправляем уведомления (правила с отключенным каналом уже отброшены)
+            for route in rules:
+                rule = route.rule
 
                 # Получаем шаблон из правила (теперь обязательное поле)
-                template = rule.default_template
+                template = route.template
 
-                # Рендерим шаблон с контекстом
-                message = NotificationDispatcher._render_template(template.template, context)
-                subject = NotificationDispatcher._render_template(template.subject, context) if template.subject else notification_type.name
+                # Рендерим скомпилированный шаблон с контекстом
+                message = template.compiled_template.render(context)
+                subject = template.compiled_subject.render(context) if template.subject else notification_type.name
 
                 # Проверяем тип правила
                 if rule.rule_type == 'system':
@@ -362,15 +621,14 @@ class NotificationDispatcher:
 
                         # Логируем результат
                         logger.info(f"[СОЗДАНИЕ ЛОГА #1 - SYSTEM] Тип={notification_type.code}, Канал={rule.channel.code}, Contact=None, RecipientValue={user_email}")
-                        NotificationLog.objects.create(
+                        logs.append(NotificationDispatcher._build_log(
                             notification_type=notification_type,
                             channel=rule.channel,
                             contact=None,  # Для системных уведомлений contact отсутствует
                             recipient_value=user_email,
                             message=message,
-                            status='sent' if result.get('success') else 'failed',
-                            error_message=result.get('error')
-                        )
+                            result=result
+                        ))
 
                         if result.get('success'):
                             logger.info(f"Системное уведомление отправлено на {user_email} ({rule.channel.name})")
@@ -380,67 +638,76 @@ class NotificationDispatcher:
                     except Exception as e:
                         logger.error(f"Ошибка отправки на {user_email}: {e}")
                         logger.info(f"[СОЗДАНИЕ ЛОГА #2 - SYSTEM ERROR] Тип={notification_type.code}, Канал={rule.channel.code}, Contact=None, RecipientValue={user_email}")
-                        NotificationLog.objects.create(
+                        logs.append(NotificationDispatcher._build_log(
                             notification_type=notification_type,
                             channel=rule.channel,
                             contact=None,
                             recipient_value=user_email,
                             message=message,
-                            status='failed',
-                            error_message=str(e)
-                        )
+                            result={'error': str(e)}
+                        ))
 
                 else:
                     # Дополнительное правило - отправить контактам из списка
-                    # Получаем активные контакты
-                    contacts = rule.contacts.filter(is_active=True)
-                    if not contacts.exists():
+                    # Активные контакты правила
+                    contacts = route.contacts
+                    if not contacts:
                         logger.warning(f"Нет активных контактов для правила '{rule.name}'")
                         continue
 
-                    # Отправляем каждому контакту
-                    for contact in contacts:
-                        try:
-                            result = NotificationDispatcher._send_to_contact(
-                                channel=rule.channel,
-                                contact=contact,
-                                subject=subject,
-                                message=message
-                            )
-
-                            # Логируем результат
-                            logger.info(f"[СОЗДАНИЕ ЛОГА #3 - ADDITIONAL] Тип={notification_type.code}, Канал={rule.channel.code}, Contact={contact.name} (ID={contact.id}), RecipientValue={contact.value}")
-                            NotificationLog.objects.create(
-                                notification_type=notification_type,
-                                channel=rule.channel,
-                                contact=contact,
-                                recipient_value=contact.value,
-                                message=message,
-                                status='sent' if result.get('success') else 'failed',
-                                error_message=result.get('error')
-                            )
-
-                            if result.get('success'):
-                                logger.info(f"Уведомление отправлено: {contact.name} ({rule.channel.name})")
-                            else:
-                                logger.error(f"Ошибка отправки {contact.name}: {result.get('error')}")
-
-                        except Exception as e:
-                            logger.error(f"Ошибка отправки контакту {contact.name}: {e}")
-                            logger.info(f"[СОЗДАНИЕ ЛОГА #4 - ADDITIONAL ERROR] Тип={notification_type.code}, Канал={rule.channel.code}, Contact={contact.name} (ID={contact.id}), RecipientValue={contact.value}")
-                            NotificationLog.objects.create(
-                                notification_type=notification_type,
-                                channel=rule.channel,
-                                contact=contact,
-                                recipient_value=contact.value,
-                                message=message,
-                                status='failed',
-                                error_message=str(e)
-                            )
+                    # Отправляем всем контактам (мессенджерам - параллельно)
+                    results = NotificationDispatcher._send_to_contacts(
+                        channel=rule.channel,
+                        contacts=contacts,
+                        subject=subject,
+                        message=message
+                    )
+
+                    for contact, result in zip(contacts, results):
+                        # Логируем результат
+                        logger.info(f"[СОЗДАНИЕ ЛОГА #3 - ADDITIONAL] Тип={notification_type.code}, Канал={rule.channel.code}, Contact={contact.name} (ID={contact.id}), RecipientValue={contact.value}")
+                        logs.append(NotificationDispatcher._build_log(
+                            notification_type=notification_type,
+                            channel=rule.channel,
+                            contact=contact,
+                            recipient_value=contact.value,
+                            message=message,
+                            result=result
+                        ))
+
+                        if result.get('success'):
+                            logger.info(f"Уведомление отправлено: {contact.name} ({rule.channel.name})")
+                        else:
+                            logger.error(f"Ошибка отправки {contact.name}: {result.get('error')}")
 
         except Exception as e:
             logger.error(f"Критическая ошибка в NotificationDispatcher: {e}")
 
+        finally:
+            if logs:
+                NotificationLog.objects.bulk_create(logs)
+
+    @staticmethod
+    def _build_log(notification_type, channel, contact, recipient_value: str, message: str, result: dict):
+        """
+        Подготовить запись лога с результатом отправки (без сохранения).
+        Для неудачной отправки сразу планируется повтор (см. apps.notifications.retry).
+        """
+        from .models import NotificationLog
+
+        log = NotificationLog(
+            notification_type=notification_type,
+            channel=channel,
+            contact=contact,
+            recipient_value=recipient_value,
+            message=message
+        )
+        if result.get('success'):
+            log.set_sent()
+        else:
+            log.set_failed(result.get('error') or 'Неизвестная ошибка', schedule_retry=True)
+        return log
+
     @staticmethod
     def _render_template(template_text: str, context: dict) -> str:
         """
@@ -453,11 +720,7 @@ class NotificationDispatcher:
         Returns:
             str: Отрендеренный текст
         """
-        result = template_text
-        for key, value in context.items():
-            placeholder = f"{{{{{key}}}}}"
-            result = result.replace(placeholder, str(value))
-        return result
+        return render_template(template_text, context)
 
     @staticmethod
     def _send_to_email(channel, email: str, subject: str, message: str) -> dict:
@@ -502,6 +765,22 @@ class NotificationDispatcher:
             logger.error(f"Ошибка отправки email на {email}: {e}")
             return {'error': str(e)}
 
+    @staticmethod
+    def _send_to_contacts(channel, contacts: list, subject: str, message: str) -> List[dict]:
+        """
+        Отправить сообщение нескольким контактам одного канала.
+
+        Запросы к API мессенджеров выполняются параллельно (с ограничением числа
+        потоков и частоты запросов), письма уходят последовательно через одну
+        SMTP-сессию из пула. Результаты возвращаются в порядке контактов.
+        """
+        def send(contact):
+            return NotificationDispatcher._send_to_contact(channel, contact, subject, message)
+
+        if channel.code in ('whatsapp', 'telegram'):
+            return run_concurrently(send, contacts)
+        return [send(contact) for contact in contacts]
+
     @staticmethod
     def _send_to_contact(channel, contact, subject: str, message: str) -> dict:
         """
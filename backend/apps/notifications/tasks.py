@@ -0,0 +1,21 @@
+"""
+Фоновые задачи системы уведомлений.
+"""
+
+from celery import shared_task
+
+
+@shared_task
+def process_notification_retries(limit: int = 50):
+    """Повторная отправка уведомлений, время повтора которых наступило."""
+    from .retry import process_due_retries
+
+    return process_due_retries(limit)
+
+
+@shared_task
+def drain_notification_outbox(limit: int = 50):
+    """Отправка уведомлений из очереди событий NotificationOutbox."""
+    from .outbox import drain_outbox
+
+    return drain_outbox(limit)
@@ -0,0 +1,61 @@
+"""
+Скомпилированные шаблоны уведомлений.
+
+Шаблон вида "Заказ {{order_number}} на сумму {{total_amount}}" один раз
+разбирается на чередование текста и имен переменных. Рендеринг - это одна
+склейка списка, в которой подставляются только переменные, реально
+встречающиеся в шаблоне, без прохода по всем ключам контекста.
+
+Переменная, которой нет в контексте, остается в тексте как есть ({{name}}).
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, List
+
+# Тот же синтаксис, что проверяется в NotificationTemplate.clean()
+PLACEHOLDER_RE = re.compile(r'\{\{(\w+)\}\}')
+
+
+class CompiledTemplate:
+    """Разобранный шаблон с подстановкой переменных {{name}}."""
+
+    __slots__ = ('source', 'literals', 'variables')
+
+    def __init__(self, source: str):
+        self.source = source or ''
+        # re.split с группой дает [текст, имя, текст, имя, ..., текст]
+        parts = PLACEHOLDER_RE.split(self.source)
+        self.literals = parts[0::2]
+        self.variables = parts[1::2]
+
+    def render(self, context: dict) -> str:
+        """Подставляет значения из контекста."""
+        if not self.variables:
+            return self.source
+
+        literals = self.literals
+        chunks = [literals[0]]
+        for index, name in enumerate(self.variables):
+            value = context.get(name, self)
+            chunks.append('{{' + name + '}}' if value is self else str(value))
+            chunks.append(literals[index + 1])
+        return ''.join(chunks)
+
+    def render_many(self, contexts: Iterable[dict]) -> List[str]:
+        """Рендерит шаблон для каждого контекста (например, для списка получателей)."""
+        render = self.render
+        return [render(context) for context in contexts]
+
+
+@lru_cache(maxsize=512)
+def compile_template(source: str) -> CompiledTemplate:
+    """Возвращает скомпилированный шаблон, повторно используя уже разобранные."""
+    return CompiledTemplate(source)
+
+
+def render_template(source: str, context: dict) -> str:
+    """Рендерит строку шаблона через кэш скомпилированных шаблонов."""
+    if not source:
+        return ''
+    return compile_template(source).render(context)
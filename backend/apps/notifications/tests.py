@@ -0,0 +1,456 @@
+"""
+Тесты отправки уведомлений.
+
+Внешние серверы (SMTP, API мессенджеров) заменяются локальными серверами
+в отдельном потоке, поэтому проверяется настоящий сетевой обмен без
+обращения к провайдерам.
+"""
+
+import json
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from .services import (
+    MESSENGER_MAX_CONCURRENCY, EmailService, RateLimiter, SMTPConnectionPool,
+    TelegramService, post_with_rate_limit, run_concurrently,
+)
+from .templating import CompiledTemplate, compile_template, render_template
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Минимальный SMTP-сервер: принимает письма без авторизации и TLS.
+
+    Считает открытые сессии и принятые письма. При drop_after_message=True
+    разрывает соединение сразу после приема письма (как сервер, закрывший
+    неактивную сессию).
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeSMTPHandler)
+        self.sessions = 0
+        self.closed_sessions = 0
+        self.messages = []
+        self.drop_after_message = False
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line: str):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.sessions += 1
+
+        self.reply('220 localhost ESMTP test')
+        try:
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                command = line.decode().strip().upper()
+
+                if command.startswith(('EHLO', 'HELO')):
+                    self.reply('250 localhost')
+                elif command.startswith(('MAIL', 'RCPT', 'RSET', 'NOOP')):
+                    self.reply('250 OK')
+                elif command == 'DATA':
+                    self.reply('354 End data with <CR><LF>.<CR><LF>')
+                    body = []
+                    while True:
+                        data_line = self.rfile.readline()
+                        if data_line in (b'.\r\n', b''):
+                            break
+                        body.append(data_line)
+                    with server.lock:
+                        server.messages.append(b''.join(body))
+                    self.reply('250 OK queued')
+                    if server.drop_after_message:
+                        return
+                elif command == 'QUIT':
+                    self.reply('221 Bye')
+                    return
+                else:
+                    self.reply('502 Command not implemented')
+        finally:
+            with server.lock:
+                server.closed_sessions += 1
+
+
+class SMTPConnectionPoolTests(SimpleTestCase):
+    """Пул SMTP-соединений EmailService."""
+
+    def setUp(self):
+        self.server = FakeSMTPServer()
+        self.addCleanup(self.server.stop)
+        self.pool = SMTPConnectionPool()
+        self.addCleanup(self.pool.close_all)
+        patcher = mock.patch('apps.notifications.services.smtp_pool', self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = EmailService(
+            smtp_host='127.0.0.1',
+            smtp_port=self.server.port,
+            smtp_username='',
+            smtp_password='',
+            from_email='shop@example.com',
+            use_tls=False
+        )
+
+    def send(self, index: int = 0) -> dict:
+        return self.service.send_message(f'user{index}@example.com', 'Тема', f'Письмо {index}')
+
+    def test_series_of_messages_reuses_one_connection(self):
+        for index in range(5):
+            self.assertEqual(self.send(index), {'success': True})
+
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertEqual(self.server.sessions, 1)
+
+    def test_idle_connection_is_evicted(self):
+        self.pool.idle_timeout = 0.05
+
+        self.assertEqual(self.send(1), {'success': True})
+        time.sleep(0.1)
+        self.assertEqual(self.send(2), {'success': True})
+
+        self.assertEqual(self.server.sessions, 2)
+        # Просроченное соединение закрыто при выдаче нового
+        self.assertEqual(self.server.closed_sessions, 1)
+
+    def test_broken_connection_is_reopened_and_message_resent(self):
+        self.server.drop_after_message = True
+
+        for index in range(3):
+            self.assertEqual(self.send(index), {'success': True})
+
+        # Каждое следующее письмо находит в пуле разорванное сервером соединение
+        self.assertEqual(len(self.server.messages), 3)
+        self.assertEqual(self.server.sessions, 3)
+
+    def test_pool_keeps_at_most_max_idle_connections(self):
+        pool = SMTPConnectionPool(max_idle=1)
+        self.addCleanup(pool.close_all)
+        key = self.service._pool_key
+
+        first = pool.acquire(key, self.service._create_backend)
+        second = pool.acquire(key, self.service._create_backend)
+        pool.release(key, first)
+        pool.release(key, second)
+
+        self.assertIsNone(second.connection)
+        self.assertIs(pool.acquire(key, self.service._create_backend), first)
+        pool.release(key, first)
+
+
+class SMTPConnectionPoolBenchmark(SimpleTestCase):
+    """Серия писем через пул против нового соединения на каждое письмо."""
+
+    MESSAGES = 30
+
+    def setUp(self):
+        self.server = FakeSMTPServer()
+        self.addCleanup(self.server.stop)
+        self.service = EmailService(
+            smtp_host='127.0.0.1',
+            smtp_port=self.server.port,
+            smtp_username='',
+            smtp_password='',
+            from_email='shop@example.com',
+            use_tls=False
+        )
+
+    def test_pooled_sending_opens_one_session(self):
+        pool = SMTPConnectionPool()
+        self.addCleanup(pool.close_all)
+
+        started = time.perf_counter()
+        with mock.patch('apps.notifications.services.smtp_pool', pool):
+            for index in range(self.MESSAGES):
+                self.service.send_message(f'user{index}@example.com', 'Тема', 'Текст')
+        pooled = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for index in range(self.MESSAGES):
+            backend = self.service._create_backend()
+            backend.open()
+            self.service._send_over(backend, f'user{index}@example.com', 'Тема', 'Текст')
+            backend.close()
+        unpooled = time.perf_counter() - started
+
+        self.assertEqual(len(self.server.messages), self.MESSAGES * 2)
+        self.assertEqual(self.server.sessions, 1 + self.MESSAGES)
+        print(
+            f"\nSMTP: {self.MESSAGES} писем через пул {pooled * 1000:.1f} мс, "
+            f"с новым соединением на письмо {unpooled * 1000:.1f} мс"
+        )
+
+
+class FakeMessengerAPI(ThreadingHTTPServer):
+    """
+    Локальный API мессенджера: отвечает {"ok": true} на любой POST.
+
+    responses - очередь заранее заданных ответов (код, заголовки, тело),
+    delay - задержка каждого ответа. Запоминает время запросов и наибольшее
+    число одновременно обрабатываемых запросов.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(('127.0.0.1', 0), FakeMessengerHandler)
+        self.delay = delay
+        self.responses = []
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeMessengerHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.requests.append((time.monotonic(), payload))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            response = server.responses.pop(0) if server.responses else (200, {}, {'ok': True})
+
+        try:
+            time.sleep(server.delay)
+            status, headers, body = response
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class MessengerHTTPTests(SimpleTestCase):
+    """Лимит частоты, повтор после 429 и параллельная рассылка."""
+
+    def start_api(self, delay: float = 0.0) -> FakeMessengerAPI:
+        api = FakeMessengerAPI(delay)
+        self.addCleanup(api.stop)
+        return api
+
+    def telegram_service(self, api: FakeMessengerAPI) -> TelegramService:
+        service = TelegramService(f'test-{uuid.uuid4().hex}')
+        service.base_url = api.url
+        return service
+
+    def test_429_is_retried_after_retry_after_header(self):
+        api = self.start_api()
+        api.responses.append((429, {'Retry-After': '0.2'}, {'ok': False}))
+
+        started = time.monotonic()
+        response = post_with_rate_limit(requests.Session(), RateLimiter(100), f'{api.url}/send', {'text': 'a'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(api.requests), 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    def test_429_is_retried_after_telegram_retry_after(self):
+        api = self.start_api()
+        api.responses.append((429, {}, {'ok': False, 'parameters': {'retry_after': 0.1}}))
+
+        response = post_with_rate_limit(requests.Session(), RateLimiter(100), f'{api.url}/send', {'text': 'a'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(api.requests), 2)
+
+    def test_429_is_retried_only_once(self):
+        api = self.start_api()
+        api.responses.extend([(429, {'Retry-After': '0'}, {})] * 2)
+
+        response = post_with_rate_limit(requests.Session(), RateLimiter(100), f'{api.url}/send', {'text': 'a'})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(len(api.requests), 2)
+
+    def test_rate_limiter_spaces_requests(self):
+        api = self.start_api()
+        limiter = RateLimiter(20)
+        session = requests.Session()
+
+        run_concurrently(
+            lambda index: post_with_rate_limit(session, limiter, f'{api.url}/send', {'index': index}),
+            list(range(8))
+        )
+
+        times = sorted(sent_at for sent_at, _ in api.requests)
+        self.assertEqual(len(times), 8)
+        # 8 запросов при 20 в секунду занимают не меньше 7 интервалов по 50 мс
+        self.assertGreaterEqual(times[-1] - times[0], 7 * 0.05 * 0.9)
+
+    def test_fan_out_sends_concurrently_and_keeps_order(self):
+        api = self.start_api(delay=0.3)
+        service = self.telegram_service(api)
+        chat_ids = [str(index) for index in range(MESSENGER_MAX_CONCURRENCY)]
+
+        started = time.monotonic()
+        results = service.send_message_to_multiple(chat_ids, 'Новый заказ')
+        elapsed = time.monotonic() - started
+
+        self.assertEqual([item['chat_id'] for item in results], chat_ids)
+        self.assertTrue(all(item['result']['success'] for item in results))
+        self.assertEqual(sorted(payload['chat_id'] for _, payload in api.requests), chat_ids)
+        # Последовательно это заняло бы не меньше 4 * 0.3 с
+        self.assertLess(elapsed, 0.3 * len(chat_ids) * 0.75)
+        self.assertGreater(api.max_active, 1)
+
+    def test_fan_out_respects_concurrency_limit(self):
+        api = self.start_api(delay=0.1)
+        service = self.telegram_service(api)
+        chat_ids = [str(index) for index in range(MESSENGER_MAX_CONCURRENCY * 3)]
+
+        service.send_message_to_multiple(chat_ids, 'Новый заказ')
+
+        self.assertEqual(len(api.requests), len(chat_ids))
+        self.assertLessEqual(api.max_active, MESSENGER_MAX_CONCURRENCY)
+
+    def test_run_concurrently_turns_exceptions_into_errors(self):
+        def send(item):
+            if item == 2:
+                raise ValueError('сбой')
+            return {'success': True, 'item': item}
+
+        with self.assertLogs('apps.notifications.services', 'ERROR'):
+            results = run_concurrently(send, [1, 2, 3])
+
+        self.assertEqual(results[0], {'success': True, 'item': 1})
+        self.assertEqual(results[1], {'error': 'сбой'})
+        self.assertEqual(results[2], {'success': True, 'item': 3})
+
+
+def legacy_render(template_text: str, context: dict) -> str:
+    """Прежний рендеринг NotificationDispatcher: замена по всем ключам контекста."""
+    result = template_text
+    for key, value in context.items():
+        placeholder = f"{{{{{key}}}}}"
+        result = result.replace(placeholder, str(value))
+    return result
+
+
+ORDER_TEMPLATE = (
+    'Здравствуйте, {{customer_name}}!\n'
+    'Заказ №{{order_number}} на сумму {{total_amount}} руб. принят.\n'
+    'Статус: {{status}}. Адрес доставки: {{delivery_address}}.\n'
+    'Телефон для связи: {{customer_phone}}. Спасибо, {{customer_name}}!'
+)
+
+ORDER_CONTEXT = {
+    'customer_name': 'Иван',
+    'order_number': 'ORD-20260101-0001',
+    'total_amount': 1520.5,
+    'status': 'Новый',
+    'delivery_address': 'г. Махачкала, ул. Ленина, 1',
+    'customer_phone': '+79280000000',
+    # Остальные ключи контекста шаблоном не используются
+    **{f'extra_{index}': index for index in range(40)},
+}
+
+
+class CompiledTemplateTests(SimpleTestCase):
+    """Скомпилированные шаблоны дают тот же текст, что и прежний рендеринг."""
+
+    CASES = [
+        ('', {}),
+        ('Без переменных', {'name': 'x'}),
+        ('{{name}}', {'name': 'Иван'}),
+        ('{{a}}{{b}}{{a}}', {'a': 1, 'b': None}),
+        ('Сумма: {{total}} руб.', {'total': 10.5}),
+        ('Нет в контексте: {{missing}}', {'name': 'x'}),
+        ('Не переменные: { {name} } {{ name }} {name}', {'name': 'x'}),
+        ('Пустое значение: "{{name}}"', {'name': ''}),
+        ('HTML не экранируется: {{html}}', {'html': '<b>"&"</b>'}),
+        (ORDER_TEMPLATE, ORDER_CONTEXT),
+    ]
+
+    def test_render_matches_legacy_renderer(self):
+        for source, context in self.CASES:
+            with self.subTest(source=source):
+                self.assertEqual(CompiledTemplate(source).render(context), legacy_render(source, context))
+
+    def test_render_template_matches_legacy_renderer(self):
+        for source, context in self.CASES:
+            with self.subTest(source=source):
+                self.assertEqual(render_template(source, context), legacy_render(source, context))
+
+    def test_render_many(self):
+        contexts = [{**ORDER_CONTEXT, 'customer_name': name} for name in ('Иван', 'Мария')]
+
+        self.assertEqual(
+            compile_template(ORDER_TEMPLATE).render_many(contexts),
+            [legacy_render(ORDER_TEMPLATE, context) for context in contexts]
+        )
+
+    def test_compiled_templates_are_reused(self):
+        self.assertIs(compile_template(ORDER_TEMPLATE), compile_template(ORDER_TEMPLATE))
+
+
+class CompiledTemplateBenchmark(SimpleTestCase):
+    """Скорость рендеринга типичного шаблона заказа."""
+
+    RENDERS = 20000
+
+    def measure(self, render) -> float:
+        started = time.perf_counter()
+        for _ in range(self.RENDERS):
+            render(ORDER_TEMPLATE, ORDER_CONTEXT)
+        return time.perf_counter() - started
+
+    def test_compiled_render_is_faster_than_legacy(self):
+        template = compile_template(ORDER_TEMPLATE)
+
+        legacy = self.measure(legacy_render)
+        compiled = self.measure(lambda source, context: template.render(context))
+
+        print(
+            f"\nШаблоны: прежний рендеринг {self.RENDERS / legacy:,.0f}/с, "
+            f"скомпилированный {self.RENDERS / compiled:,.0f}/с"
+        )
+        self.assertLess(compiled, legacy)
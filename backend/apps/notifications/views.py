@@ -2,8 +2,14 @@
 API Views для системы уведомлений.
 """
 
+from datetime import datetime, time
+
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 
 from .models import (
@@ -858,14 +864,69 @@ class NotificationRuleViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+class NotificationLogPagination(CursorPagination):
+    """
+    Постраничная выдача логов по курсору (keyset): страница выбирается условием
+    id < последнего id, а не OFFSET, поэтому скорость не зависит от глубины.
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
 class NotificationLogViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet для логов уведомлений (только чтение)."""
+    """
+    ViewSet для логов уведомлений (только чтение).
+
+    Фильтры: status, notification_type (id), channel (id),
+    date_from / date_to (YYYY-MM-DD, включительно).
+    """
     queryset = NotificationLog.objects.select_related(
-        'notification_type', 'channel', 'contact'
+        'notification_type', 'channel', 'contact', 'message_body'
     ).all()
     serializer_class = NotificationLogSerializer
     permission_classes = [permissions.IsAdminUser]
-    pagination_class = None  # Отключаем пагинацию для логов
+    pagination_class = NotificationLogPagination
+    # Фильтры разбираются в get_queryset, порядок задает курсорная пагинация
+    filter_backends = []
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        if params.get('notification_type'):
+            queryset = queryset.filter(notification_type_id=params['notification_type'])
+        if params.get('channel'):
+            queryset = queryset.filter(channel_id=params['channel'])
+
+        # Границы дат переводим в диапазон created_at, чтобы работал индекс
+        date_from = parse_date(params.get('date_from') or '')
+        if date_from:
+            queryset = queryset.filter(
+                created_at__gte=timezone.make_aware(datetime.combine(date_from, time.min))
+            )
+        date_to = parse_date(params.get('date_to') or '')
+        if date_to:
+            queryset = queryset.filter(
+                created_at__lte=timezone.make_aware(datetime.combine(date_to, time.max))
+            )
+
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Сводка по логам: отправлено за текущий месяц, ошибок и ожидающих повтора."""
+        month_start = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        result = NotificationLog.objects.aggregate(
+            sent_this_month=Count('id', filter=Q(status='sent', created_at__gte=month_start)),
+            failed_count=Count('id', filter=Q(status='failed')),
+            retrying_count=Count('id', filter=Q(status='retrying')),
+        )
+        return Response(result)
 
     @action(detail=True, methods=['post'])
     def retry(self, request, pk=None):
@@ -879,47 +940,12 @@ class NotificationLogViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
         try:
-            # Используем новую систему уведомлений вместо старой
-            if log.channel.code == 'email':
-                from .services import EmailService
-                from django.conf import settings as django_settings
+            from .retry import send_notification_log
 
-                recipient = log.contact.value if log.contact else log.recipient_value
-                channel_settings = log.channel.settings
-
-                email_service = EmailService(
-                    smtp_host=channel_settings.get('smtp_host'),
-                    smtp_port=int(channel_settings.get('smtp_port', 587)),
-                    smtp_username=channel_settings.get('smtp_username'),
-                    smtp_password=channel_settings.get('smtp_password'),
-                    from_email=channel_settings.get('from_email'),
-                    use_tls=channel_settings.get('use_tls', True)
-                )
+            result = send_notification_log(log)
 
-                result = email_service.send_message(
-                    to_email=recipient,
-                    subject=f'{log.notification_type.name} - Faida Group',
-                    message=log.message
-                )
-
-                if 'error' in result:
-                    raise Exception(result['error'])
-
-            elif log.channel.code == 'whatsapp':
-                from .services import WhatsAppService
-
-                phone = log.contact.get_formatted_value() if log.contact else log.recipient_value
-                channel_settings = log.channel.settings
-
-                whatsapp = WhatsAppService(
-                    instance_id=channel_settings.get('instance_id'),
-                    api_token=channel_settings.get('api_token')
-                )
-
-                result = whatsapp.send_message(phone, log.message)
-
-                if 'error' in result:
-                    raise Exception(result['error'])
+            if 'error' in result:
+                raise Exception(result['error'])
 
             log.mark_as_sent()
 
@@ -3,7 +3,7 @@
 """
 
 from django.contrib import admin
-from .models import Order, OrderItem
+from .models import Order, OrderItem, StockReservation
 
 
 class OrderItemInline(admin.TabularInline):
@@ -30,7 +30,7 @@ class OrderAdmin(admin.ModelAdmin):
         'payment_method',
         'created_at',
     )
-    list_filter = ('status', 'payment_method', 'created_at')
+    list_filter = ('status', 'payment_method', 'stock_shortage', 'created_at')
     search_fields = (
         'order_number',
         'customer_name',
@@ -51,7 +51,7 @@ class OrderAdmin(admin.ModelAdmin):
             'fields': ('delivery_address', 'comment')
         }),
         ('Оплата', {
-            'fields': ('payment_method',)
+            'fields': ('payment_method', 'stock_shortage')
         }),
         ('Временные метки', {
             'fields': ('created_at', 'updated_at'),
@@ -69,3 +69,18 @@ class OrderItemAdmin(admin.ModelAdmin):
     list_filter = ('order__created_at',)
     search_fields = ('order__order_number', 'product__name')
     readonly_fields = ('subtotal',)
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    """
+    Админка для резервов товаров (только просмотр).
+    Резервы создаются и снимаются вместе с заказами.
+    """
+    list_display = ('order', 'product', 'quantity', 'status', 'expires_at', 'created_at', 'released_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('order__order_number', 'product__name')
+    readonly_fields = ('order', 'product', 'quantity', 'status', 'expires_at', 'created_at', 'released_at')
+
+    def has_add_permission(self, request):
+        return False
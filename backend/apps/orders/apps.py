@@ -9,3 +9,7 @@ class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.orders'
     verbose_name = 'Заказы'
+
+    def ready(self):
+        """Подключение сигналов при инициализации приложения"""
+        import apps.orders.signals
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.27 on 2026-10-18 23:42
+
+import datetime
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    """Продолжает нумерацию с последних номеров уже созданных заказов."""
+    Order = apps.get_model('orders', 'Order')
+    OrderNumberCounter = apps.get_model('orders', 'OrderNumberCounter')
+
+    last_numbers = {}
+    for order_number in Order.objects.values_list('order_number', flat=True).iterator():
+        try:
+            _, day, number = order_number.split('-')
+            day = datetime.datetime.strptime(day, '%Y%m%d').date()
+            number = int(number)
+        except ValueError:
+            continue
+        if number > last_numbers.get(day, 0):
+            last_numbers[day] = number
+
+    OrderNumberCounter.objects.bulk_create([
+        OrderNumberCounter(date=day, last_number=number)
+        for day, number in last_numbers.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_alter_order_payment_method'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Дата')),
+                ('last_number', models.PositiveIntegerField(default=0, verbose_name='Последний номер')),
+            ],
+            options={
+                'verbose_name': 'Счетчик номеров заказов',
+                'verbose_name_plural': 'Счетчики номеров заказов',
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
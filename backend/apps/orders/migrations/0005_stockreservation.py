@@ -0,0 +1,34 @@
+# Generated by Django 4.2.27 on 2026-10-18 23:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_reserved_quantity'),
+        ('orders', '0004_ordernumbercounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=10, verbose_name='Количество')),
+                ('status', models.CharField(choices=[('active', 'Активен'), ('released', 'Снят')], default='active', max_length=20, verbose_name='Статус')),
+                ('expires_at', models.DateTimeField(blank=True, help_text='Пусто - резерв держится до отгрузки или отмены заказа', null=True, verbose_name='Действует до')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('released_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата снятия')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='orders.order', verbose_name='Заказ')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_reservations', to='products.product', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Резерв товара',
+                'verbose_name_plural': 'Резервы товаров',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='orders_stoc_status_e8aa04_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_stockreservation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='stock_shortage',
+            field=models.BooleanField(default=False, help_text='Заказ оплачен после истечения резерва, товар требует замены или возврата оплаты', verbose_name='Не хватило остатка после оплаты'),
+        ),
+    ]
@@ -97,6 +97,13 @@ class Order(models.Model):
         verbose_name='Общая сумма'
     )
 
+    # Оплата пришла после снятия резерва, и остатка на заказ уже не хватило
+    stock_shortage = models.BooleanField(
+        default=False,
+        verbose_name='Не хватило остатка после оплаты',
+        help_text='Заказ оплачен после истечения резерва, товар требует замены или возврата оплаты'
+    )
+
     # Временные метки
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -112,42 +119,39 @@ class Order(models.Model):
         verbose_name_plural = 'Заказы'
         ordering = ['-created_at']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает статус, загруженный из базы, для отслеживания его изменения."""
+        instance = super().from_db(db, field_names, values)
+        if 'status' in instance.__dict__:
+            instance._loaded_status = instance.status
+        return instance
+
     def save(self, *args, **kwargs):
         """
         Генерация номера заказа при создании.
         Отправка уведомлений при создании или изменении статуса.
         """
-        is_new = self.pk is None
+        is_new = self._state.adding
 
-        # Сохраняем старый статус для сигнала
+        # Сохраняем старый статус для сигнала. Статус, прочитанный из базы,
+        # запоминается в from_db(), поэтому повторно заказ не загружается
         self._old_status = None
         if not is_new:
-            try:
-                old_instance = Order.objects.get(pk=self.pk)
-                self._old_status = old_instance.status
-            except Order.DoesNotExist:
-                pass
+            if hasattr(self, '_loaded_status'):
+                self._old_status = self._loaded_status
+            else:
+                self._old_status = Order.objects.filter(pk=self.pk).values_list(
+                    'status', flat=True
+                ).first()
 
         if not self.order_number:
             # Генерируем номер заказа в формате ORD-YYYYMMDD-XXXX
-            from django.utils import timezone
-            today = timezone.now().strftime('%Y%m%d')
-
-            # Получаем последний заказ за сегодня
-            last_order = Order.objects.filter(
-                order_number__startswith=f'ORD-{today}'
-            ).order_by('-order_number').first()
-
-            if last_order:
-                # Извлекаем номер и увеличиваем
-                last_number = int(last_order.order_number.split('-')[-1])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-
-            self.order_number = f'ORD-{today}-{new_number:04d}'
+            from .numbering import generate_order_number
+            self.order_number = generate_order_number()
 
         super().save(*args, **kwargs)
+        self._loaded_status = self.status
 
         # Уведомления отправляются через Django signals (см. apps/notifications/signals.py)
         # Методы send_new_order_notification() и send_status_changed_notification()
@@ -173,6 +177,31 @@ class Order(models.Model):
         return status_dict.get(self.status, self.status)
 
 
+class OrderNumberCounter(models.Model):
+    """
+    Счетчик номеров заказов за день.
+
+    Номер берется атомарным увеличением last_number (см. apps/orders/numbering.py),
+    а не поиском последнего заказа за день.
+    """
+
+    date = models.DateField(
+        unique=True,
+        verbose_name='Дата'
+    )
+    last_number = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Последний номер'
+    )
+
+    class Meta:
+        verbose_name = 'Счетчик номеров заказов'
+        verbose_name_plural = 'Счетчики номеров заказов'
+
+    def __str__(self):
+        return f"{self.date}: {self.last_number}"
+
+
 class OrderItem(models.Model):
     """
     Модель товара в заказе.
@@ -224,3 +253,67 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
+
+
+class StockReservation(models.Model):
+    """
+    Резерв остатка товара под заказ сайта.
+
+    Пока резерв активен, его количество учтено в Product.reserved_quantity.
+    Резервы неоплаченных онлайн-заказов имеют срок действия (expires_at).
+    """
+
+    STATUS_CHOICES = [
+        ('active', 'Активен'),
+        ('released', 'Снят'),
+    ]
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations',
+        verbose_name='Заказ'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.PROTECT,
+        related_name='stock_reservations',
+        verbose_name='Товар'
+    )
+    quantity = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        verbose_name='Количество'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='active',
+        verbose_name='Статус'
+    )
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Действует до',
+        help_text='Пусто - резерв держится до отгрузки или отмены заказа'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    released_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата снятия'
+    )
+
+    class Meta:
+        verbose_name = 'Резерв товара'
+        verbose_name_plural = 'Резервы товаров'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} x {self.quantity} ({self.order_id})"
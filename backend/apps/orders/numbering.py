@@ -0,0 +1,80 @@
+"""
+Генерация номеров заказов.
+
+Номер имеет вид ORD-YYYYMMDD-XXXX, где XXXX - порядковый номер заказа за день.
+Порядковый номер берется из счетчика OrderNumberCounter одной атомарной
+операцией увеличения, без чтения последнего заказа, поэтому одновременные
+оформления заказов не получают одинаковые номера.
+
+Увеличение счетчика блокирует его строку до конца транзакции. Все заказы дня
+увеличивают одну и ту же строку, поэтому номер берется до начала транзакции
+оформления заказа, в отдельной короткой транзакции из одного запроса: иначе
+все оформления заказов за день выстраивались бы в очередь за этой строкой.
+Если оформление заказа затем откатится, его номер пропадает - в номерах
+возможны пропуски.
+"""
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OrderNumberCounter
+
+ORDER_NUMBER_PREFIX = 'ORD'
+
+
+def format_order_number(day, number: int) -> str:
+    """Собирает номер заказа из даты и порядкового номера за день."""
+    return f'{ORDER_NUMBER_PREFIX}-{day:%Y%m%d}-{number:04d}'
+
+
+def generate_order_number() -> str:
+    """
+    Возвращает следующий уникальный номер заказа за сегодня.
+
+    Вызывается вне транзакции оформления заказа (см. описание модуля).
+    """
+    day = timezone.now().date()
+    return format_order_number(day, next_order_sequence(day))
+
+
+def next_order_sequence(day) -> int:
+    """Атомарно увеличивает счетчик заказов за день и возвращает новое значение."""
+    if connection.vendor == 'postgresql':
+        return _next_sequence_postgresql(day)
+    return _next_sequence_orm(day)
+
+
+def _next_sequence_postgresql(day) -> int:
+    """Один запрос INSERT ... ON CONFLICT DO UPDATE ... RETURNING."""
+    table = connection.ops.quote_name(OrderNumberCounter._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (date, last_number)
+            VALUES (%s, 1)
+            ON CONFLICT (date)
+            DO UPDATE SET last_number = {table}.last_number + 1
+            RETURNING last_number
+            """,
+            [day]
+        )
+        return cursor.fetchone()[0]
+
+
+def _next_sequence_orm(day) -> int:
+    """
+    Вариант для других СУБД: сначала UPDATE счетчика (он сразу берет блокировку
+    на запись), затем чтение значения в той же транзакции.
+    """
+    counters = OrderNumberCounter.objects.filter(date=day)
+    with transaction.atomic():
+        if not counters.update(last_number=F('last_number') + 1):
+            try:
+                with transaction.atomic():
+                    OrderNumberCounter.objects.create(date=day, last_number=1)
+                return 1
+            except IntegrityError:
+                # Счетчик за этот день только что создал другой запрос
+                counters.update(last_number=F('last_number') + 1)
+        return counters.values_list('last_number', flat=True).get()
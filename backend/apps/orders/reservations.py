@@ -0,0 +1,216 @@
+"""
+Резервирование остатков товаров под заказы сайта.
+
+Остаток товара приходит из 1С (Product.stock_quantity, свободный остаток
+выбранного склада из stocks_data) и перезаписывается каждой синхронизацией.
+Резервы сайта хранятся отдельно: в строках StockReservation и в счетчике
+Product.reserved_quantity, который синхронизация не трогает. Доступно
+к заказу stock_quantity - reserved_quantity.
+
+Резерв берется одним условным UPDATE ... WHERE stock_quantity >= reserved_quantity + qty
+сразу для всех товаров корзины: если хотя бы одного товара не хватает,
+не резервируется ничего. Резерв снимается при отгрузке или отмене заказа,
+а у неоплаченного онлайн-заказа - по истечении времени на оплату
+(release_expired_reservations вызывается планировщиком run_scheduler).
+
+Если оплата приходит после снятия резерва, hold_order_reservations резервирует
+товар заново; если остатка уже не хватает, заказ не подтверждается и
+помечается Order.stock_shortage.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.products.models import Product
+from .models import StockReservation
+
+logger = logging.getLogger(__name__)
+
+RESERVATION_SETTINGS = getattr(settings, 'STOCK_RESERVATION_SETTINGS', {})
+
+# Статусы заказа, при переходе в которые резерв снимается:
+# товар отгружен (и списан в 1С) или заказ отменен
+RELEASE_ORDER_STATUSES = ('shipping', 'delivered', 'cancelled')
+
+EXPIRED_BATCH_SIZE = 500
+
+
+class InsufficientStock(Exception):
+    """Недостаточно свободного остатка. products - товары, которых не хватило."""
+
+    def __init__(self, products):
+        self.products = products
+        names = ', '.join(f"'{product.name}'" for product in products)
+        super().__init__(f"Недостаточно остатка: {names}")
+
+
+def is_enabled() -> bool:
+    return RESERVATION_SETTINGS.get('ENABLED', True)
+
+
+def _quantity_case(quantities: dict) -> Case:
+    """CASE id WHEN ... THEN количество для обновления нескольких товаров одним запросом."""
+    return Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        default=Value(Decimal('0')),
+        output_field=models.DecimalField(max_digits=10, decimal_places=3)
+    )
+
+
+def reserve_stock(order, quantities: dict, hold: bool = False) -> list:
+    """
+    Резервирует остатки под заказ. Вызывается в транзакции создания заказа.
+
+    Args:
+        order: Сохраненный заказ
+        quantities: {product_id: Decimal количество}
+        hold: Резерв без срока действия (заказ уже оплачен)
+
+    Raises:
+        InsufficientStock: если хотя бы одного товара не хватает (ничего не резервируется)
+    """
+    if not quantities:
+        return []
+
+    condition = Q()
+    for product_id, quantity in quantities.items():
+        condition |= Q(
+            pk=product_id,
+            in_stock=True,
+            stock_quantity__gte=F('reserved_quantity') + quantity
+        )
+
+    with transaction.atomic():
+        reserved = Product.objects.filter(condition).update(
+            reserved_quantity=F('reserved_quantity') + _quantity_case(quantities)
+        )
+        if reserved != len(quantities):
+            transaction.set_rollback(True)
+
+    if reserved != len(quantities):
+        raise InsufficientStock(_find_unavailable(quantities))
+
+    expires_at = None
+    if order.payment_method == 'online' and not hold:
+        expires_at = timezone.now() + timedelta(
+            minutes=RESERVATION_SETTINGS.get('PAYMENT_TIMEOUT_MINUTES', 30)
+        )
+
+    return StockReservation.objects.bulk_create([
+        StockReservation(
+            order=order,
+            product_id=product_id,
+            quantity=quantity,
+            expires_at=expires_at
+        )
+        for product_id, quantity in quantities.items()
+    ])
+
+
+def _find_unavailable(quantities: dict) -> list:
+    """Товары, свободного остатка которых не хватает на запрошенное количество."""
+    return [
+        product
+        for product in Product.objects.filter(pk__in=quantities).order_by('id')
+        if not product.in_stock or product.available_quantity < quantities[product.pk]
+    ]
+
+
+def hold_order_reservations(order) -> list:
+    """
+    Закрепляет резервы оплаченного заказа до отгрузки.
+
+    Снимает срок действия с активных резервов и заново резервирует количество,
+    резерв которого уже снят по истечении времени на оплату. Возвращает товары,
+    которых не хватило (пустой список, если заказ обеспечен остатком).
+    """
+    StockReservation.objects.filter(order=order, status='active').update(expires_at=None)
+
+    if not is_enabled():
+        return []
+
+    missing = _missing_quantities(order)
+    if not missing:
+        return []
+
+    try:
+        reserve_stock(order, missing, hold=True)
+    except InsufficientStock as e:
+        return e.products
+
+    logger.info(f"Заказ {order.order_number} оплачен после снятия резерва, товары зарезервированы заново")
+    return []
+
+
+def _missing_quantities(order) -> dict:
+    """{product_id: количество} позиций заказа, не покрытых активными резервами."""
+    missing = defaultdict(Decimal)
+    for product_id, quantity in order.items.filter(product__isnull=False).values_list('product_id', 'quantity'):
+        missing[product_id] += Decimal(str(quantity))
+
+    for product_id, quantity in StockReservation.objects.filter(
+        order=order,
+        status='active'
+    ).values_list('product_id', 'quantity'):
+        missing[product_id] -= quantity
+
+    return {product_id: quantity for product_id, quantity in missing.items() if quantity > 0}
+
+
+def release_order_reservations(order) -> int:
+    """Снимает все активные резервы заказа."""
+    with transaction.atomic():
+        reservations = list(
+            StockReservation.objects.select_for_update().filter(order=order, status='active')
+        )
+        released = _release(reservations)
+
+    if released:
+        logger.info(f"Сняты резервы заказа {order.order_number}: {released}")
+    return released
+
+
+def release_expired_reservations(limit: int = EXPIRED_BATCH_SIZE) -> int:
+    """Снимает резервы, срок действия которых истек. Возвращает количество снятых."""
+    with transaction.atomic():
+        reservations = list(
+            StockReservation.objects.select_for_update(skip_locked=True).filter(
+                status='active',
+                expires_at__lte=timezone.now()
+            ).order_by('expires_at')[:limit]
+        )
+        released = _release(reservations)
+
+    if released:
+        logger.info(f"Сняты просроченные резервы товаров: {released}")
+    return released
+
+
+def _release(reservations: list) -> int:
+    """Возвращает количество резервов в свободный остаток. Строки должны быть заблокированы."""
+    if not reservations:
+        return 0
+
+    totals = defaultdict(Decimal)
+    for reservation in reservations:
+        totals[reservation.product_id] += reservation.quantity
+
+    Product.objects.filter(pk__in=totals).update(
+        reserved_quantity=Greatest(
+            F('reserved_quantity') - _quantity_case(totals),
+            Value(Decimal('0'))
+        )
+    )
+    StockReservation.objects.filter(
+        pk__in=[reservation.pk for reservation in reservations]
+    ).update(status='released', released_at=timezone.now())
+
+    return len(reservations)
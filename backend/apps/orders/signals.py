@@ -0,0 +1,30 @@
+"""
+Сигналы заказов: снятие резервов остатков.
+"""
+
+import logging
+
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Order
+from .reservations import RELEASE_ORDER_STATUSES, release_order_reservations
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Order)
+def release_stock_on_status_change(sender, instance, created, **kwargs):
+    """Снимает резервы при отгрузке или отмене заказа."""
+    if created:
+        return
+
+    old_status = getattr(instance, '_old_status', None)
+    if old_status != instance.status and instance.status in RELEASE_ORDER_STATUSES:
+        release_order_reservations(instance)
+
+
+@receiver(pre_delete, sender=Order)
+def release_stock_on_delete(sender, instance, **kwargs):
+    """Резервы удаляемого заказа возвращаются в свободный остаток."""
+    release_order_reservations(instance)
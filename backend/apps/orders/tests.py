@@ -0,0 +1,203 @@
+"""
+Тесты оформления заказов.
+
+Тесты параллельного оформления выполняются только на PostgreSQL: блокировки
+строк, на которых держится корректность, в SQLite не воспроизводятся.
+"""
+
+import threading
+import unittest
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.payments.models import Payment
+from apps.payments.services import YooKassaService
+from apps.products.models import Product
+
+from .models import Order, OrderNumberCounter, StockReservation
+from .numbering import format_order_number
+from .reservations import release_expired_reservations
+
+PARALLEL_BUYERS = 20
+
+requires_postgresql = unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    'Параллельное оформление заказов проверяется только на PostgreSQL'
+)
+
+
+def create_product(code: str = 'SKU-1', stock_quantity=10, price=100) -> Product:
+    return Product.objects.create(
+        code=code,
+        name=f'Товар {code}',
+        price=Decimal(price),
+        in_stock=True,
+        stock_quantity=Decimal(stock_quantity)
+    )
+
+
+def create_buyer(index: int = 0):
+    return get_user_model().objects.create_user(
+        username=f'buyer{index}',
+        email=f'buyer{index}@example.com',
+        password='buyer-password'
+    )
+
+
+def checkout(user, product_id: int, quantity=1, payment_method: str = 'cash_on_delivery'):
+    """Оформляет заказ через API, как это делает сайт."""
+    client = APIClient()
+    client.force_authenticate(user)
+    return client.post('/api/orders/', {
+        'customer_name': user.username,
+        'customer_phone': '+79280000000',
+        'delivery_address': 'г. Махачкала, ул. Ленина, 1',
+        'payment_method': payment_method,
+        'items': [{'product_id': product_id, 'quantity': quantity}],
+    }, format='json')
+
+
+def run_in_threads(func, count: int) -> list:
+    """Запускает func(index) в count потоках одновременно и возвращает результаты по порядку."""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        try:
+            barrier.wait()
+            results[index] = func(index)
+        except Exception as e:
+            results[index] = e
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class OrderNumberingTests(TestCase):
+    """Номера заказов из счетчика за день."""
+
+    def setUp(self):
+        self.product = create_product(stock_quantity=5)
+        self.user = create_buyer()
+
+    def test_checkouts_get_consecutive_numbers(self):
+        today = timezone.now().date()
+
+        numbers = [checkout(self.user, self.product.id).data['order_number'] for _ in range(3)]
+
+        self.assertEqual(numbers, [format_order_number(today, number) for number in (1, 2, 3)])
+        self.assertEqual(OrderNumberCounter.objects.get(date=today).last_number, 3)
+
+    def test_failed_checkout_leaves_gap_in_numbers(self):
+        today = timezone.now().date()
+        checkout(self.user, self.product.id)
+
+        response = checkout(self.user, self.product.id, quantity=100)
+        self.assertEqual(response.status_code, 400)
+
+        # Номер берется в отдельной транзакции до оформления и не возвращается
+        self.assertEqual(checkout(self.user, self.product.id).data['order_number'], format_order_number(today, 3))
+
+
+class LatePaymentTests(TestCase):
+    """Оплата онлайн-заказа после снятия резерва по истечении времени на оплату."""
+
+    def setUp(self):
+        self.product = create_product(stock_quantity=2)
+        self.buyer = create_buyer(1)
+        response = checkout(self.buyer, self.product.id, quantity=2, payment_method='online')
+        self.order = Order.objects.get(order_number=response.data['order_number'])
+
+        StockReservation.objects.filter(order=self.order).update(expires_at=timezone.now())
+        self.assertEqual(release_expired_reservations(), 1)
+
+    def pay(self):
+        payment = Payment.objects.create(
+            order=self.order,
+            yookassa_id=f'payment-{self.order.pk}',
+            amount=self.order.total_amount
+        )
+        YooKassaService().apply_payment_status(payment, 'succeeded', True, 'bank_card')
+        self.order.refresh_from_db()
+        self.product.refresh_from_db()
+
+    def test_late_payment_reserves_stock_again(self):
+        self.pay()
+
+        self.assertEqual(self.order.status, 'confirmed')
+        self.assertFalse(self.order.stock_shortage)
+        self.assertEqual(self.product.reserved_quantity, 2)
+        reservation = StockReservation.objects.get(order=self.order, status='active')
+        self.assertIsNone(reservation.expires_at)
+
+    def test_late_payment_after_stock_was_sold_flags_order(self):
+        other_buyer = create_buyer(2)
+        self.assertEqual(checkout(other_buyer, self.product.id, quantity=2).status_code, 201)
+
+        with self.assertLogs('apps.payments.services', 'ERROR'):
+            self.pay()
+
+        self.assertEqual(self.order.status, 'pending')
+        self.assertTrue(self.order.stock_shortage)
+        # Товар не продан дважды
+        self.assertEqual(self.product.reserved_quantity, 2)
+        self.assertFalse(StockReservation.objects.filter(order=self.order, status='active').exists())
+
+    def test_payment_in_time_keeps_existing_reservation(self):
+        product = create_product('SKU-2', stock_quantity=1)
+        response = checkout(self.buyer, product.id, payment_method='online')
+        self.order = Order.objects.get(order_number=response.data['order_number'])
+
+        self.pay()
+
+        self.assertEqual(self.order.status, 'confirmed')
+        reservations = StockReservation.objects.filter(order=self.order, status='active')
+        self.assertEqual(reservations.count(), 1)
+        self.assertIsNone(reservations.get().expires_at)
+
+
+@requires_postgresql
+class ParallelCheckoutTests(TransactionTestCase):
+    """Одновременное оформление заказов разными покупателями."""
+
+    def test_parallel_checkouts_get_unique_numbers(self):
+        product = create_product(stock_quantity=PARALLEL_BUYERS)
+        buyers = [create_buyer(index) for index in range(PARALLEL_BUYERS)]
+
+        responses = run_in_threads(lambda index: checkout(buyers[index], product.id), PARALLEL_BUYERS)
+
+        self.assertEqual([response.status_code for response in responses], [201] * PARALLEL_BUYERS)
+        today = timezone.now().date()
+        self.assertEqual(
+            sorted(response.data['order_number'] for response in responses),
+            [format_order_number(today, number) for number in range(1, PARALLEL_BUYERS + 1)]
+        )
+        self.assertEqual(Order.objects.count(), PARALLEL_BUYERS)
+
+    def test_many_buyers_of_one_sku_do_not_oversell(self):
+        stock = 5
+        product = create_product(stock_quantity=stock)
+        buyers = [create_buyer(index) for index in range(PARALLEL_BUYERS)]
+
+        responses = run_in_threads(lambda index: checkout(buyers[index], product.id), PARALLEL_BUYERS)
+
+        statuses = [response.status_code for response in responses]
+        self.assertEqual(statuses.count(201), stock)
+        self.assertEqual(statuses.count(400), PARALLEL_BUYERS - stock)
+
+        product.refresh_from_db()
+        self.assertEqual(product.reserved_quantity, stock)
+        self.assertEqual(product.available_quantity, 0)
+        self.assertEqual(StockReservation.objects.filter(product=product, status='active').count(), stock)
+        self.assertEqual(Order.objects.count(), stock)
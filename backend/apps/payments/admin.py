@@ -3,7 +3,7 @@
 """
 
 from django.contrib import admin
-from .models import Payment, PaymentSettings, Refund
+from .models import Payment, PaymentSettings, PaymentWebhookEvent, Refund
 
 
 @admin.register(PaymentSettings)
@@ -84,6 +84,9 @@ class PaymentAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_refund_totals()
+
     def refunded_amount_display(self, obj):
         return f"{obj.refunded_amount} ₽"
     refunded_amount_display.short_description = 'Возвращено'
@@ -133,3 +136,36 @@ class RefundAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         """Возвраты создаются только через API."""
         return False
+
+
+@admin.register(PaymentWebhookEvent)
+class PaymentWebhookEventAdmin(admin.ModelAdmin):
+    """Админка входящих уведомлений YooKassa."""
+
+    list_display = [
+        'event',
+        'object_id',
+        'status',
+        'attempts',
+        'received_at',
+        'processed_at',
+    ]
+    list_filter = ['status', 'event', 'received_at']
+    search_fields = ['object_id']
+    readonly_fields = [
+        'event',
+        'object_id',
+        'payload',
+        'status',
+        'attempts',
+        'error_message',
+        'received_at',
+        'available_at',
+        'locked_at',
+        'processed_at',
+    ]
+    ordering = ['-received_at']
+
+    def has_add_permission(self, request):
+        """Уведомления приходят только через webhook."""
+        return False
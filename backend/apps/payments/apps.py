@@ -5,3 +5,7 @@ class PaymentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.payments'
     verbose_name = 'Платежи'
+
+    def ready(self):
+        """Подключение сигналов при инициализации приложения"""
+        import apps.payments.signals
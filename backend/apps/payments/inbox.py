@@ -0,0 +1,182 @@
+"""
+Очередь входящих уведомлений YooKassa (inbox).
+
+Webhook не обрабатывает уведомление в запросе: record_webhook() сохраняет его
+в PaymentWebhookEvent одной вставкой и после коммита ставит в очередь Celery
+задачу process_payment_webhooks. Ответ YooKassa уходит сразу, поэтому
+повторные доставки при "шторме" ретраев не нагружают веб-процессы.
+
+Уведомление уникально по паре (событие, id объекта): повторная доставка
+того же уведомления не создает новую запись и не обрабатывается повторно.
+Исключение - уведомление, обработка которого закончилась ошибкой (failed):
+повторная доставка возвращает его в очередь.
+
+Уведомление, которое сознательно не применено (WebhookSkipped: неизвестное
+событие, платеж уже в завершенном статусе), получает статус ignored и не
+повторяется.
+
+Воркер забирает уведомления по одному через SELECT ... FOR UPDATE SKIP LOCKED
+и применяет их под блокировкой строки платежа (см. YooKassaService.process_webhook).
+Уведомления, задачу для которых не удалось поставить, обрабатываются при
+следующем запуске задачи планировщиком run_scheduler.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import PaymentWebhookEvent
+from .services import WebhookSkipped
+
+logger = logging.getLogger(__name__)
+
+INBOX_BATCH_SIZE = 50
+INBOX_MAX_ATTEMPTS = 5
+# Задержка перед повторной обработкой после ошибки (умножается на номер попытки)
+INBOX_RETRY_DELAY = timedelta(minutes=1)
+# Уведомление в статусе "обрабатывается" дольше этого времени считается брошенным
+INBOX_PROCESSING_TIMEOUT = timedelta(minutes=10)
+
+
+class InvalidWebhook(ValueError):
+    """Тело запроса не похоже на уведомление YooKassa."""
+
+
+def record_webhook(data) -> tuple:
+    """
+    Сохраняет уведомление в очередь.
+
+    Returns:
+        (PaymentWebhookEvent или None, created) - created=False для повторной доставки
+
+    Raises:
+        InvalidWebhook: если в уведомлении нет события или id объекта
+    """
+    if not isinstance(data, dict):
+        raise InvalidWebhook('Ожидается JSON-объект')
+
+    event = data.get('event')
+    payment_object = data.get('object')
+    object_id = payment_object.get('id') if isinstance(payment_object, dict) else None
+    if not event or not object_id:
+        raise InvalidWebhook('В уведомлении нет события или id объекта')
+
+    try:
+        with transaction.atomic():
+            webhook_event = PaymentWebhookEvent.objects.create(
+                event=event,
+                object_id=object_id,
+                payload=data,
+            )
+    except IntegrityError:
+        # Уведомление, которое не удалось применить, обрабатывается заново
+        requeued = PaymentWebhookEvent.objects.filter(
+            event=event,
+            object_id=object_id,
+            status='failed'
+        ).update(
+            status='pending',
+            payload=data,
+            attempts=0,
+            available_at=timezone.now(),
+            locked_at=None
+        )
+        if not requeued:
+            logger.info(f"Повторная доставка уведомления YooKassa {event} {object_id}, пропущено")
+            return None, False
+
+        logger.info(f"Повторная доставка уведомления YooKassa {event} {object_id} после ошибки, поставлено в очередь")
+        transaction.on_commit(_schedule_processing)
+        return None, False
+
+    transaction.on_commit(_schedule_processing)
+    return webhook_event, True
+
+
+def _schedule_processing():
+    """Ставит обработку очереди в Celery. Ошибка брокера не должна ломать ответ YooKassa."""
+    from .tasks import process_payment_webhooks
+
+    try:
+        process_payment_webhooks.delay()
+    except Exception as e:
+        logger.warning(f"Не удалось поставить обработку уведомлений YooKassa в Celery: {e}")
+
+
+def process_inbox(limit: int = INBOX_BATCH_SIZE) -> int:
+    """Обрабатывает до limit уведомлений. Возвращает количество обработанных."""
+    service = None
+    processed = 0
+
+    while processed < limit:
+        webhook_event = _claim_next_event()
+        if webhook_event is None:
+            break
+
+        if service is None:
+            from .services import YooKassaService
+            service = YooKassaService()
+
+        _process_event(service, webhook_event)
+        processed += 1
+
+    return processed
+
+
+def _claim_next_event():
+    """Забирает следующее уведомление в обработку или возвращает None."""
+    now = timezone.now()
+    with transaction.atomic():
+        webhook_event = PaymentWebhookEvent.objects.select_for_update(skip_locked=True).filter(
+            Q(status='pending', available_at__lte=now) |
+            Q(status='processing', locked_at__lt=now - INBOX_PROCESSING_TIMEOUT)
+        ).order_by('id').first()
+
+        if webhook_event is None:
+            return None
+
+        webhook_event.status = 'processing'
+        webhook_event.locked_at = now
+        webhook_event.attempts += 1
+        webhook_event.save(update_fields=['status', 'locked_at', 'attempts'])
+
+    return webhook_event
+
+
+def _process_event(service, webhook_event: PaymentWebhookEvent) -> bool:
+    """Применяет уведомление к платежу или возврату."""
+    try:
+        if not service.process_webhook(webhook_event.payload):
+            raise RuntimeError('Уведомление не применено, подробности в логе')
+
+    except WebhookSkipped as e:
+        logger.info(f"Уведомление YooKassa {webhook_event} пропущено: {e}")
+        PaymentWebhookEvent.objects.filter(pk=webhook_event.pk).update(
+            status='ignored',
+            error_message=str(e),
+            processed_at=timezone.now(),
+            locked_at=None
+        )
+        return True
+
+    except Exception as e:
+        logger.error(f"Ошибка обработки уведомления YooKassa {webhook_event}: {e}")
+        status = 'pending' if webhook_event.attempts < INBOX_MAX_ATTEMPTS else 'failed'
+        PaymentWebhookEvent.objects.filter(pk=webhook_event.pk).update(
+            status=status,
+            error_message=str(e),
+            available_at=timezone.now() + INBOX_RETRY_DELAY * webhook_event.attempts,
+            locked_at=None
+        )
+        return False
+
+    PaymentWebhookEvent.objects.filter(pk=webhook_event.pk).update(
+        status='processed',
+        error_message='',
+        processed_at=timezone.now(),
+        locked_at=None
+    )
+    return True
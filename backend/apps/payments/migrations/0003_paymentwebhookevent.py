@@ -0,0 +1,40 @@
+# Generated by Django 4.2.27 on 2026-10-18 23:50
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_paymentsettings_refund'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(help_text='payment.succeeded, refund.succeeded и др.', max_length=50, verbose_name='Событие')),
+                ('object_id', models.CharField(max_length=50, verbose_name='ID объекта в YooKassa')),
+                ('payload', models.JSONField(verbose_name='Данные уведомления')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'Обрабатывается'), ('processed', 'Обработано'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток обработки')),
+                ('error_message', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Получено')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Обработать не раньше')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Взято в обработку')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Обработано')),
+            ],
+            options={
+                'verbose_name': 'Уведомление YooKassa',
+                'verbose_name_plural': 'Уведомления YooKassa',
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='payments_pa_status_e90162_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='paymentwebhookevent',
+            constraint=models.UniqueConstraint(fields=('event', 'object_id'), name='payments_webhook_event_object_unique'),
+        ),
+    ]
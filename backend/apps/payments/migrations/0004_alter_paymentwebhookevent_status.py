@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_paymentwebhookevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paymentwebhookevent',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'Обрабатывается'), ('processed', 'Обработано'), ('ignored', 'Пропущено'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус'),
+        ),
+    ]
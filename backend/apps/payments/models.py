@@ -3,8 +3,11 @@
 """
 
 import os
+from decimal import Decimal
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.core.cache import cache
+from django.utils import timezone
 
 
 class PaymentSettings(models.Model):
@@ -104,6 +107,19 @@ class PaymentSettings(models.Model):
         return bool(creds['shop_id'] and creds['secret_key'] and creds['is_enabled'])
 
 
+class PaymentQuerySet(models.QuerySet):
+
+    def with_refund_totals(self):
+        """Добавляет сумму успешных возвратов (refunded_total) одним запросом."""
+        return self.annotate(
+            refunded_total=Coalesce(
+                models.Sum('refunds__amount', filter=models.Q(refunds__status='succeeded')),
+                Decimal('0'),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2)
+            )
+        )
+
+
 class Payment(models.Model):
     """
     Модель платежа через YooKassa.
@@ -173,6 +189,8 @@ class Payment(models.Model):
         verbose_name='Дата оплаты'
     )
 
+    objects = PaymentQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Платёж'
         verbose_name_plural = 'Платежи'
@@ -188,7 +206,9 @@ class Payment(models.Model):
 
     @property
     def refunded_amount(self):
-        """Возвращает общую сумму возвратов."""
+        """Возвращает общую сумму возвратов (из with_refund_totals(), если платеж загружен так)."""
+        if hasattr(self, 'refunded_total'):
+            return self.refunded_total
         return self.refunds.filter(status='succeeded').aggregate(
             total=models.Sum('amount')
         )['total'] or 0
@@ -267,3 +287,83 @@ class Refund(models.Model):
         """Возвращает статус на русском."""
         status_dict = dict(self.STATUS_CHOICES)
         return status_dict.get(self.status, self.status)
+
+
+class PaymentWebhookEvent(models.Model):
+    """
+    Входящее уведомление YooKassa (inbox).
+
+    Webhook только сохраняет уведомление и сразу отвечает YooKassa, применяет
+    его воркер (apps/payments/inbox.py). Пара (событие, id объекта) уникальна,
+    поэтому повторные доставки одного уведомления не обрабатываются повторно.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает обработки'),
+        ('processing', 'Обрабатывается'),
+        ('processed', 'Обработано'),
+        ('ignored', 'Пропущено'),
+        ('failed', 'Ошибка'),
+    ]
+
+    event = models.CharField(
+        max_length=50,
+        verbose_name='Событие',
+        help_text='payment.succeeded, refund.succeeded и др.'
+    )
+    object_id = models.CharField(
+        max_length=50,
+        verbose_name='ID объекта в YooKassa'
+    )
+    payload = models.JSONField(
+        verbose_name='Данные уведомления'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Попыток обработки'
+    )
+    error_message = models.TextField(
+        blank=True,
+        verbose_name='Ошибка'
+    )
+    received_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Получено'
+    )
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Обработать не раньше'
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взято в обработку'
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Обработано'
+    )
+
+    class Meta:
+        verbose_name = 'Уведомление YooKassa'
+        verbose_name_plural = 'Уведомления YooKassa'
+        ordering = ['-received_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['event', 'object_id'],
+                name='payments_webhook_event_object_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.object_id} ({self.status})"
@@ -0,0 +1,192 @@
+"""
+Сверка статусов платежей с YooKassa.
+
+Если webhook потерян, платеж навсегда остается в статусе pending. Задача
+reconcile_pending_payments (ставится планировщиком run_scheduler) выбирает
+платежи в незавершенных статусах, которые не менялись дольше
+STALE_AFTER_MINUTES, страницами по id и запрашивает их статус в API YooKassa.
+
+Запросы идут параллельно (не более MAX_CONCURRENCY) через общую для процесса
+HTTP-сессию с keep-alive. Изменившиеся платежи блокируются и применяются так же,
+как уведомления (YooKassaService.apply_payment_status), и записываются одним
+bulk_update; у неизменившихся и у тех, что не удалось получить (404, ошибка
+авторизации, таймаут), одним UPDATE сдвигается updated_at, чтобы следующая
+проверка была не раньше чем через STALE_AFTER_MINUTES.
+
+Планировщик ставит задачу каждые 30 секунд, поэтому одновременно выполняется
+не больше одной сверки: блокировка берется в общем кэше (cache.add) и
+снимается по завершении или по истечении LOCK_TIMEOUT, если воркер упал.
+
+Адрес API задается настройкой YOOKASSA_API_URL, поэтому сверку можно проверить
+на локальном mock-сервере.
+"""
+
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from .models import Payment, PaymentSettings
+from .status import invalidate_payment_status
+
+logger = logging.getLogger(__name__)
+
+RECONCILIATION_SETTINGS = getattr(settings, 'PAYMENT_RECONCILIATION_SETTINGS', {})
+
+# Статусы, в которых платеж еще может измениться
+UNFINISHED_STATUSES = ('pending', 'waiting_for_capture')
+
+RECONCILIATION_LOCK_KEY = 'payments:reconciliation:lock'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_api_session() -> requests.Session:
+    """Общая для процесса HTTP-сессия к API YooKassa."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=RECONCILIATION_SETTINGS.get('MAX_CONCURRENCY', 4)
+            )
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+
+def fetch_payment(yookassa_id: str, auth: tuple) -> dict:
+    """Запрашивает платеж в API YooKassa."""
+    api_url = getattr(settings, 'YOOKASSA_API_URL', 'https://api.yookassa.ru/v3').rstrip('/')
+    response = get_api_session().get(
+        f"{api_url}/payments/{yookassa_id}",
+        auth=auth,
+        timeout=RECONCILIATION_SETTINGS.get('REQUEST_TIMEOUT', 10)
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def reconcile_pending_payments(max_payments: int = None) -> dict:
+    """
+    Сверяет статусы зависших платежей с YooKassa.
+
+    Если сверка уже выполняется другим воркером, ничего не делает.
+
+    Returns:
+        dict: {'checked': ..., 'updated': ..., 'errors': ...}
+    """
+    stats = {'checked': 0, 'updated': 0, 'errors': 0}
+    if not PaymentSettings.is_configured():
+        return stats
+
+    token = uuid.uuid4().hex
+    if not cache.add(RECONCILIATION_LOCK_KEY, token, RECONCILIATION_SETTINGS.get('LOCK_TIMEOUT', 600)):
+        logger.info("Сверка платежей с YooKassa уже выполняется, запуск пропущен")
+        return stats
+
+    try:
+        _reconcile_stale_payments(max_payments, stats)
+    finally:
+        # Блокировку с истекшим сроком мог взять другой воркер - ее не трогаем
+        if cache.get(RECONCILIATION_LOCK_KEY) == token:
+            cache.delete(RECONCILIATION_LOCK_KEY)
+
+    if stats['checked']:
+        logger.info(
+            f"Сверка платежей с YooKassa: проверено {stats['checked']}, "
+            f"обновлено {stats['updated']}, ошибок {stats['errors']}"
+        )
+    return stats
+
+
+def _reconcile_stale_payments(max_payments, stats: dict) -> None:
+    """Проходит по зависшим платежам страницами по id."""
+    from .services import YooKassaService
+    service = YooKassaService()
+    credentials = PaymentSettings.get_credentials()
+    auth = (credentials['shop_id'], credentials['secret_key'])
+
+    batch_size = RECONCILIATION_SETTINGS.get('BATCH_SIZE', 100)
+    cutoff = timezone.now() - timedelta(minutes=RECONCILIATION_SETTINGS.get('STALE_AFTER_MINUTES', 15))
+    stale_payments = Payment.objects.filter(
+        status__in=UNFINISHED_STATUSES,
+        updated_at__lt=cutoff
+    ).order_by('id')
+
+    last_id = 0
+    while max_payments is None or stats['checked'] < max_payments:
+        limit = batch_size if max_payments is None else min(batch_size, max_payments - stats['checked'])
+        page = list(stale_payments.filter(id__gt=last_id).only('id', 'yookassa_id', 'status')[:limit])
+        if not page:
+            break
+        last_id = page[-1].id
+
+        _reconcile_page(service, page, auth, stats)
+        stats['checked'] += len(page)
+
+
+def _reconcile_page(service, page: list, auth: tuple, stats: dict) -> None:
+    """Запрашивает страницу платежей в YooKassa и применяет изменения."""
+    def fetch(payment):
+        try:
+            return fetch_payment(payment.yookassa_id, auth)
+        except Exception as e:
+            logger.warning(f"Не удалось получить платеж {payment.yookassa_id} из YooKassa: {e}")
+            return None
+
+    max_workers = min(RECONCILIATION_SETTINGS.get('MAX_CONCURRENCY', 4), len(page))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(fetch, page))
+
+    changed = {}
+    # Неизменившиеся и неполученные платежи проверяются снова через STALE_AFTER_MINUTES
+    postponed_ids = []
+    for payment, remote in zip(page, results):
+        if remote is None:
+            stats['errors'] += 1
+            postponed_ids.append(payment.id)
+        elif remote.get('status') != payment.status:
+            changed[payment.id] = remote
+        else:
+            postponed_ids.append(payment.id)
+
+    now = timezone.now()
+    if postponed_ids:
+        Payment.objects.filter(pk__in=postponed_ids).update(updated_at=now)
+
+    if not changed:
+        return
+
+    with transaction.atomic():
+        # Статус мог измениться webhook'ом, пока шли запросы: решение принимается под блокировкой
+        locked = list(
+            Payment.objects.select_for_update().filter(pk__in=changed).select_related('order')
+        )
+        updated = []
+        for payment in locked:
+            remote = changed[payment.id]
+            method = remote.get('payment_method') or {}
+            if service.apply_payment_status(payment, remote.get('status'), bool(remote.get('paid')), method.get('type')):
+                payment.updated_at = now
+                updated.append(payment)
+
+        Payment.objects.bulk_update(
+            updated,
+            ['status', 'paid', 'paid_at', 'payment_method_type', 'updated_at']
+        )
+        # bulk_update не отправляет post_save, кэш статуса сбрасывается явно
+        for payment in updated:
+            invalidate_payment_status(payment.order_id)
+
+    stats['updated'] += len(updated)
@@ -6,6 +6,7 @@ import logging
 import uuid
 from decimal import Decimal
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
 from yookassa import Configuration, Payment as YooPayment, Refund as YooRefund
@@ -15,16 +16,31 @@ from .models import Payment, PaymentSettings, Refund
 logger = logging.getLogger(__name__)
 
 
+class WebhookSkipped(Exception):
+    """Уведомление сознательно не применено: повторять его обработку не нужно."""
+
+
 class YooKassaService:
     """
     Сервис для создания и обработки платежей через YooKassa.
     """
 
+    # Статусы платежа, после которых уведомления его больше не меняют
+    FINAL_STATUSES = ('succeeded', 'canceled')
+
+    # Учетные данные, с которыми последний раз настраивался SDK в этом процессе
+    _configured_credentials = None
+
     def __init__(self):
         """Инициализация конфигурации YooKassa из БД или переменных окружения."""
         creds = PaymentSettings.get_credentials()
-        Configuration.account_id = creds['shop_id']
-        Configuration.secret_key = creds['secret_key']
+        credentials = (creds['shop_id'], creds['secret_key'])
+
+        # Configuration - глобальное состояние SDK, меняем его только при смене ключей
+        if YooKassaService._configured_credentials != credentials:
+            Configuration.account_id = creds['shop_id']
+            Configuration.secret_key = creds['secret_key']
+            YooKassaService._configured_credentials = credentials
 
     @staticmethod
     def is_available() -> bool:
@@ -123,6 +139,10 @@ class YooKassaService:
 
         Returns:
             True если обработка успешна
+
+        Raises:
+            WebhookSkipped: уведомление не требует применения (неизвестное событие,
+                платеж уже в завершенном статусе)
         """
         try:
             from yookassa.domain.notification import WebhookNotification
@@ -139,56 +159,107 @@ class YooKassaService:
             elif event_type.startswith('refund.'):
                 return self._process_refund_webhook(notification)
 
-            logger.warning(f"Неизвестный тип события webhook: {event_type}")
-            return True
+            raise WebhookSkipped(f"Неизвестный тип события webhook: {event_type}")
 
+        except WebhookSkipped:
+            raise
         except Exception as e:
             logger.error(f"Ошибка обработки webhook YooKassa: {e}")
             return False
 
     def _process_payment_webhook(self, notification) -> bool:
-        """Обрабатывает webhook событие платежа."""
+        """
+        Обрабатывает webhook событие платежа.
+
+        Платеж блокируется на время обработки, поэтому параллельные уведомления
+        по одному платежу применяются по очереди.
+        """
         payment_data = notification.object
 
         logger.info(f"Получен webhook YooKassa: {notification.event} для платежа {payment_data.id}")
 
-        # Находим платёж в БД
-        try:
-            payment = Payment.objects.get(yookassa_id=payment_data.id)
-        except Payment.DoesNotExist:
-            logger.error(f"Платёж {payment_data.id} не найден в БД")
+        with transaction.atomic():
+            # Находим платёж в БД
+            try:
+                payment = Payment.objects.select_for_update().get(yookassa_id=payment_data.id)
+            except Payment.DoesNotExist:
+                logger.error(f"Платёж {payment_data.id} не найден в БД")
+                return False
+
+            old_status = payment.status
+            method_type = payment_data.payment_method.type if payment_data.payment_method else None
+            if not self.apply_payment_status(payment, payment_data.status, payment_data.paid, method_type):
+                raise WebhookSkipped(
+                    f"Платёж {payment_data.id} уже в статусе {payment.status}, "
+                    f"уведомление {notification.event} не применено"
+                )
+
+            payment.save()
+
+        logger.info(f"Платёж {payment_data.id} обновлён: {old_status} -> {payment.status}")
+        return True
+
+    def apply_payment_status(self, payment: Payment, status: str, paid: bool, method_type: str = None) -> bool:
+        """
+        Применяет статус платежа из YooKassa к заблокированной строке платежа.
+        Сам платеж не сохраняет, заказ оплаченного платежа подтверждает.
+
+        Статус завершенного платежа (succeeded/canceled) не откатывается
+        уведомлениями, пришедшими не по порядку.
+
+        Returns:
+            True если платеж изменен
+        """
+        if payment.status in self.FINAL_STATUSES:
+            if status != payment.status:
+                logger.warning(
+                    f"Платёж {payment.yookassa_id} уже в статусе {payment.status}, "
+                    f"статус {status} пропущен"
+                )
             return False
 
         # Обновляем статус платежа
-        old_status = payment.status
-        payment.status = payment_data.status
+        payment.status = status
 
-        if payment_data.payment_method:
-            payment.payment_method_type = payment_data.payment_method.type
+        if method_type:
+            payment.payment_method_type = method_type
 
         # Если платёж успешен
-        if payment_data.status == 'succeeded' and payment_data.paid:
+        if status == 'succeeded' and paid:
             payment.paid = True
             payment.paid_at = timezone.now()
 
-            # Обновляем статус заказа на "confirmed"
             order = payment.order
-            order.status = 'confirmed'
-            order.save(update_fields=['status'])
 
-            logger.info(f"Заказ {order.order_number} подтверждён после оплаты")
+            # Оплаченный заказ держит резерв остатков до отгрузки. Если резерв
+            # снят по истечении времени на оплату, товар резервируется заново
+            from apps.orders.reservations import hold_order_reservations
+            shortage = hold_order_reservations(order)
+
+            if shortage:
+                # Товар уже продан другому покупателю: заказ не подтверждается,
+                # менеджер заменяет товар или возвращает оплату
+                order.stock_shortage = True
+                order.save(update_fields=['stock_shortage'])
+                names = ', '.join(f"'{product.name}'" for product in shortage)
+                logger.error(
+                    f"Заказ {order.order_number} оплачен после снятия резерва, "
+                    f"остатка не хватило: {names}"
+                )
+            else:
+                # Обновляем статус заказа на "confirmed"
+                order.status = 'confirmed'
+                order.save(update_fields=['status'])
+                logger.info(f"Заказ {order.order_number} подтверждён после оплаты")
 
             # Отправляем уведомление
             self._send_payment_notification(order, payment)
 
         # Если платёж отменён
-        elif payment_data.status == 'canceled':
+        elif status == 'canceled':
             payment.paid = False
-            logger.info(f"Платёж {payment_data.id} отменён")
-
-        payment.save()
+            logger.info(f"Платёж {payment.yookassa_id} отменён")
 
-        logger.info(f"Платёж {payment_data.id} обновлён: {old_status} -> {payment.status}")
         return True
 
     def _process_refund_webhook(self, notification) -> bool:
@@ -0,0 +1,21 @@
+"""
+Сигналы платежей: сброс кэша статуса платежа заказа.
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Payment, Refund
+from .status import invalidate_payment_status
+
+
+@receiver(post_save, sender=Payment)
+def invalidate_status_on_payment_save(sender, instance, **kwargs):
+    invalidate_payment_status(instance.order_id)
+
+
+@receiver(post_save, sender=Refund)
+def invalidate_status_on_refund_save(sender, instance, **kwargs):
+    order_id = Payment.objects.filter(pk=instance.payment_id).values_list('order_id', flat=True).first()
+    if order_id is not None:
+        invalidate_payment_status(order_id)
@@ -0,0 +1,103 @@
+"""
+Статус платежа заказа для страницы возврата после оплаты.
+
+Страница опрашивает статус, пока не придет webhook, поэтому ответ кэшируется
+на PAYMENT_STATUS_CACHE_TIMEOUT секунд. Кэш заказа сбрасывается после коммита
+любого изменения платежа или возврата (сигналы, сверка платежей), так что
+опрос видит новый статус сразу. Ответ сопровождается ETag: браузер
+перепроверяет его условным запросом и получает 304 без тела.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from apps.core.metrics import record_cache_lookup
+from apps.orders.models import Order
+from .models import Payment, Refund
+
+PAYMENT_STATUS_CACHE_TIMEOUT = 30
+
+
+def payment_status_cache_key(order_id) -> str:
+    return f'payments:status:{order_id}'
+
+
+def invalidate_payment_status(order_id) -> None:
+    """Сбрасывает кэш статуса платежа заказа после коммита текущей транзакции."""
+    key = payment_status_cache_key(order_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def get_payment_status(order_id, user):
+    """
+    Возвращает (данные статуса, etag) или None, если заказ не найден
+    или принадлежит другому пользователю.
+    """
+    key = payment_status_cache_key(order_id)
+    entry = cache.get(key)
+    record_cache_lookup('payment_status', entry is not None)
+    if entry is None:
+        entry = _build_entry(order_id)
+        if entry is None:
+            return None
+        cache.set(key, entry, PAYMENT_STATUS_CACHE_TIMEOUT)
+
+    if entry['user_id'] != user.id:
+        return None
+    return entry['data'], entry['etag']
+
+
+def _build_entry(order_id):
+    """Заказ, платеж и суммы возвратов - одним запросом; список возвратов - только если они есть."""
+    order = Order.objects.select_related('payment').annotate(
+        refunded_total=Sum('payment__refunds__amount', filter=Q(payment__refunds__status='succeeded')),
+        refunds_count=Count('payment__refunds'),
+    ).filter(id=order_id).first()
+    if order is None:
+        return None
+
+    payment = getattr(order, 'payment', None)
+    if payment is None:
+        data = {
+            'payment_id': None,
+            'status': 'not_created',
+            'status_display': 'Платёж не создан',
+            'paid': False
+        }
+    else:
+        # Сумма уже посчитана в запросе заказа, свойства платежа ее используют
+        payment.refunded_total = order.refunded_total or 0
+        refunds = []
+        if order.refunds_count:
+            refunds = [
+                {
+                    'id': r.id,
+                    'amount': str(r.amount),
+                    'status': r.status,
+                    'status_display': r.get_status_display_ru(),
+                    'reason': r.reason,
+                    'created_at': r.created_at.isoformat()
+                }
+                for r in Refund.objects.filter(payment=payment).order_by('-created_at')
+            ]
+        data = {
+            'payment_id': payment.yookassa_id,
+            'status': payment.status,
+            'status_display': payment.get_status_display_ru(),
+            'paid': payment.paid,
+            'amount': str(payment.amount),
+            'paid_at': payment.paid_at.isoformat() if payment.paid_at else None,
+            'refunded_amount': str(payment.refunded_amount),
+            'available_for_refund': str(payment.available_for_refund),
+            'refunds': refunds,
+        }
+
+    etag = hashlib.md5(
+        json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    ).hexdigest()
+    return {'user_id': order.user_id, 'data': data, 'etag': etag}
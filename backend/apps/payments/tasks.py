@@ -0,0 +1,21 @@
+"""
+Фоновые задачи платежей.
+"""
+
+from celery import shared_task
+
+
+@shared_task
+def process_payment_webhooks(limit: int = 50):
+    """Применение входящих уведомлений YooKassa из очереди PaymentWebhookEvent."""
+    from .inbox import process_inbox
+
+    return process_inbox(limit)
+
+
+@shared_task
+def reconcile_payments():
+    """Сверка статусов зависших платежей с YooKassa (на случай потерянных webhook)."""
+    from .reconciliation import reconcile_pending_payments
+
+    return reconcile_pending_payments()
@@ -0,0 +1,117 @@
+"""
+Тесты очереди входящих уведомлений YooKassa.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.orders.models import Order
+
+from .inbox import INBOX_MAX_ATTEMPTS, process_inbox, record_webhook
+from .models import Payment, PaymentWebhookEvent
+
+
+def payment_notification(yookassa_id: str, event: str = 'payment.succeeded', status: str = 'succeeded') -> dict:
+    return {
+        'type': 'notification',
+        'event': event,
+        'object': {
+            'id': yookassa_id,
+            'status': status,
+            'paid': status == 'succeeded',
+            'amount': {'value': '100.00', 'currency': 'RUB'},
+            'created_at': '2026-01-01T00:00:00.000Z',
+            'test': True,
+            'payment_method': {'type': 'bank_card', 'id': yookassa_id, 'saved': False},
+        },
+    }
+
+
+class WebhookInboxTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            username='buyer', email='buyer@example.com', password='buyer-password'
+        )
+        self.order = Order.objects.create(
+            user=user,
+            customer_name='Покупатель',
+            customer_phone='+79280000000',
+            delivery_address='г. Махачкала',
+            payment_method='online',
+            total_amount=Decimal('100')
+        )
+
+    def create_payment(self, yookassa_id: str = 'payment-1', status: str = 'pending') -> Payment:
+        return Payment.objects.create(
+            order=self.order,
+            yookassa_id=yookassa_id,
+            amount=Decimal('100'),
+            status=status
+        )
+
+    def process(self, data: dict) -> PaymentWebhookEvent:
+        record_webhook(data)
+        process_inbox()
+        return PaymentWebhookEvent.objects.get(event=data['event'], object_id=data['object']['id'])
+
+    def test_notification_is_applied(self):
+        payment = self.create_payment()
+
+        event = self.process(payment_notification(payment.yookassa_id))
+
+        self.assertEqual(event.status, 'processed')
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'succeeded')
+
+    def test_notification_for_finished_payment_is_ignored(self):
+        payment = self.create_payment(status='canceled')
+
+        with self.assertLogs('apps.payments.services', 'WARNING'):
+            event = self.process(payment_notification(payment.yookassa_id))
+
+        self.assertEqual(event.status, 'ignored')
+        self.assertEqual(event.attempts, 1)
+        self.assertIn('canceled', event.error_message)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'canceled')
+
+    def test_unknown_payment_is_retried_and_fails(self):
+        data = payment_notification('unknown-payment')
+        record_webhook(data)
+
+        with self.assertLogs('apps.payments', 'ERROR'):
+            for _ in range(INBOX_MAX_ATTEMPTS):
+                PaymentWebhookEvent.objects.update(available_at=timezone.now())
+                process_inbox()
+
+        event = PaymentWebhookEvent.objects.get()
+        self.assertEqual(event.status, 'failed')
+        self.assertEqual(event.attempts, INBOX_MAX_ATTEMPTS)
+
+    def test_redelivery_of_processed_notification_is_skipped(self):
+        payment = self.create_payment()
+        data = payment_notification(payment.yookassa_id)
+        self.process(data)
+
+        self.assertEqual(record_webhook(data), (None, False))
+
+        event = PaymentWebhookEvent.objects.get()
+        self.assertEqual(event.status, 'processed')
+        self.assertEqual(event.attempts, 1)
+
+    def test_redelivery_of_failed_notification_is_requeued(self):
+        data = payment_notification('payment-1')
+        record_webhook(data)
+        PaymentWebhookEvent.objects.update(status='failed', attempts=INBOX_MAX_ATTEMPTS)
+        payment = self.create_payment('payment-1')
+
+        event = self.process(data)
+
+        self.assertEqual(event.status, 'processed')
+        self.assertEqual(event.attempts, 1)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'succeeded')
@@ -11,7 +11,9 @@ from rest_framework.response import Response
 
 from apps.orders.models import Order
 from apps.core.models import SiteSettings
+from .inbox import InvalidWebhook, record_webhook
 from .services import YooKassaService
+from .status import get_payment_status
 from .models import Payment, PaymentSettings, Refund
 
 logger = logging.getLogger(__name__)
@@ -113,31 +115,29 @@ def webhook(request):
     """
     Webhook для получения уведомлений от YooKassa.
 
+    Уведомление только сохраняется в очередь (apps/payments/inbox.py) и
+    применяется воркером. Повторная доставка того же уведомления
+    подтверждается без повторной обработки.
+
     POST /api/payments/webhook/
     """
     try:
-        # Логируем входящий запрос
-        logger.info(f"Получен webhook от YooKassa: {request.data}")
-
-        # Обрабатываем webhook
-        service = YooKassaService()
-        success = service.process_webhook(request.data)
-
-        if success:
-            return Response({'status': 'ok'}, status=status.HTTP_200_OK)
-        else:
-            return Response(
-                {'error': 'Ошибка обработки'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
+        webhook_event, created = record_webhook(request.data)
+    except InvalidWebhook as e:
+        logger.warning(f"Некорректный webhook YooKassa: {e}")
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
-        logger.error(f"Ошибка обработки webhook: {e}")
+        logger.error(f"Ошибка сохранения webhook: {e}")
         return Response(
             {'error': str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+    if created:
+        logger.info(f"Получен webhook от YooKassa: {webhook_event.event} {webhook_event.object_id}")
+
+    return Response({'status': 'ok'}, status=status.HTTP_200_OK)
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -145,47 +145,29 @@ def payment_status(request, order_id):
     """
     Получить статус платежа для заказа.
 
+    Ответ кэшируется и сопровождается ETag: на запрос с совпадающим
+    If-None-Match возвращается 304 без тела.
+
     GET /api/payments/status/{order_id}/
     """
-    try:
-        order = Order.objects.get(id=order_id, user=request.user)
-    except Order.DoesNotExist:
+    result = get_payment_status(order_id, request.user)
+    if result is None:
         return Response(
             {'error': 'Заказ не найден'},
             status=status.HTTP_404_NOT_FOUND
         )
 
-    try:
-        payment = Payment.objects.get(order=order)
-        refunds = payment.refunds.all()
-        return Response({
-            'payment_id': payment.yookassa_id,
-            'status': payment.status,
-            'status_display': payment.get_status_display_ru(),
-            'paid': payment.paid,
-            'amount': str(payment.amount),
-            'paid_at': payment.paid_at.isoformat() if payment.paid_at else None,
-            'refunded_amount': str(payment.refunded_amount),
-            'available_for_refund': str(payment.available_for_refund),
-            'refunds': [
-                {
-                    'id': r.id,
-                    'amount': str(r.amount),
-                    'status': r.status,
-                    'status_display': r.get_status_display_ru(),
-                    'reason': r.reason,
-                    'created_at': r.created_at.isoformat()
-                }
-                for r in refunds
-            ]
-        })
-    except Payment.DoesNotExist:
-        return Response({
-            'payment_id': None,
-            'status': 'not_created',
-            'status_display': 'Платёж не создан',
-            'paid': False
-        })
+    data, etag = result
+    etag = f'"{etag}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+
+    response['ETag'] = etag
+    # Браузер хранит ответ, но перед использованием перепроверяет его по ETag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @api_view(['POST'])
@@ -38,7 +38,7 @@ class ProductAdmin(admin.ModelAdmin):
     search_fields = ('name', 'code', 'description', 'tags')
     list_editable = ('is_visible_on_site', 'in_stock', 'stock_quantity')
     readonly_fields = (
-        'code', 'created_at', 'updated_at', 'last_sync_at', 'sync_hash',
+        'code', 'reserved_quantity', 'created_at', 'updated_at', 'last_sync_at', 'sync_hash',
         'formatted_prices_data', 'formatted_stocks_data'
     )
     
@@ -50,7 +50,7 @@ class ProductAdmin(admin.ModelAdmin):
         }),
         ('Цена и наличие', {
             'fields': (
-                'price', 'currency', 'unit', 'in_stock', 'stock_quantity'
+                'price', 'currency', 'unit', 'in_stock', 'stock_quantity', 'reserved_quantity'
             )
         }),
         ('Данные из 1С (JSON)', {
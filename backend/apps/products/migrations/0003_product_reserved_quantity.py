@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_migrate_brand_to_fk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reserved_quantity',
+            field=models.DecimalField(decimal_places=3, default=0, editable=False, help_text='Сумма активных резервов (apps/orders/reservations.py). Синхронизация с 1С его не меняет', max_digits=10, verbose_name='В резерве заказов сайта'),
+        ),
+    ]
@@ -109,6 +109,14 @@ class Product(models.Model):
         verbose_name="Количество на складе",
         help_text="Основное количество для отображения (обычно свободный остаток)"
     )
+    reserved_quantity = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        default=0,
+        editable=False,
+        verbose_name="В резерве заказов сайта",
+        help_text="Сумма активных резервов (apps/orders/reservations.py). Синхронизация с 1С его не меняет"
+    )
     
     # Дополнительные характеристики товара из 1С
     is_weighted = models.BooleanField(
@@ -283,13 +291,33 @@ class Product(models.Model):
             models.Index(fields=['price']),
         ]
     
+    # Поля, которые меняются только атомарными UPDATE ... SET x = x + ...
+    COUNTER_FIELDS = ('reserved_quantity',)
+
     def __str__(self):
         return f"{self.name} ({self.code})"
+
+    def save(self, *args, **kwargs):
+        """
+        Сохранение существующего товара без явного update_fields не перезаписывает
+        счетчики: объект мог быть загружен до изменения резерва другим запросом.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def available_quantity(self):
+        """Остаток из 1С за вычетом резервов заказов сайта."""
+        return max(self.stock_quantity - self.reserved_quantity, Decimal('0'))
     
     @property
     def is_available(self):
         """Проверка доступности товара."""
-        return self.is_visible_on_site and self.in_stock and self.stock_quantity > 0
+        return self.is_visible_on_site and self.in_stock and self.available_quantity > 0
     
     @property
     def main_image(self):
@@ -381,21 +409,22 @@ class Product(models.Model):
         """Получить статус остатков с учетом настроек."""
         display_style = self.get_effective_stock_display_style()
         threshold = self.get_effective_low_stock_threshold()
+        available_quantity = self.available_quantity
 
-        if not self.in_stock or self.stock_quantity <= 0:
+        if not self.in_stock or available_quantity <= 0:
             return {'status': 'out_of_stock', 'text': 'Нет в наличии', 'quantity': 0}
 
         if display_style == 'exact':
-            formatted_qty = self.format_quantity(self.stock_quantity)
+            formatted_qty = self.format_quantity(available_quantity)
             return {
                 'status': 'in_stock',
                 'text': f'{formatted_qty} {self.unit}',
-                'quantity': self.stock_quantity
+                'quantity': available_quantity
             }
         elif display_style == 'status':
             return {'status': 'in_stock', 'text': 'В наличии', 'quantity': None}
         elif display_style == 'detailed_status':
-            if self.stock_quantity <= threshold:
+            if available_quantity <= threshold:
                 return {'status': 'low_stock', 'text': 'Мало', 'quantity': None}
             else:
                 return {'status': 'in_stock', 'text': 'В наличии', 'quantity': None}
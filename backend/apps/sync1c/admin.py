@@ -34,7 +34,7 @@ class IntegrationSourceAdmin(admin.ModelAdmin):
             'fields': ('name', 'code', 'is_active', 'show_on_site')
         }),
         ('Пути к файлам', {
-            'fields': ('json_file_path', 'media_dir_path'),
+            'fields': ('json_file_path', 'media_dir_path', 'delta_dir_path', 'last_delta_sequence'),
             'description': "Пути указываются относительно папки 'goods_data' в корне проекта."
         }),
         ('Правила по умолчанию', {
@@ -51,14 +51,14 @@ class SyncLogAdmin(admin.ModelAdmin):
     list_display = (
         'started_at', 'sync_type', 'status', 'progress_bar',
         'total_products', 'processed_products', 'created_products',
-        'updated_products', 'errors_count', 'duration'
+        'updated_products', 'deleted_products', 'errors_count', 'duration'
     )
     list_filter = ('sync_type', 'status', 'started_at')
     search_fields = ('message', 'error_details')
     readonly_fields = (
         'sync_type', 'started_at', 'finished_at', 'duration',
         'total_products', 'processed_products', 'created_products',
-        'updated_products', 'errors_count', 'source_file_path',
+        'updated_products', 'deleted_products', 'errors_count', 'source_file_path',
         'source_file_size', 'source_file_modified', 'progress_bar'
     )
     
@@ -71,7 +71,7 @@ class SyncLogAdmin(admin.ModelAdmin):
         ('Статистика', {
             'fields': (
                 'total_products', 'processed_products', 'created_products',
-                'updated_products', 'errors_count'
+                'updated_products', 'deleted_products', 'errors_count'
             )
         }),
         ('Временные метки', {
@@ -45,41 +45,14 @@ class Sync1CConfig(AppConfig):
             logger.error(f"Ошибка при автоочистке зависших синхронизаций: {e}")
 
     def _cleanup_stuck_syncs(self):
-        """Сбрасывает зависшие синхронизации."""
-        from django.utils import timezone
-        from .models import IntegrationSource, SyncLog
-
-        # Сбрасываем источники с активными статусами
-        stuck_sources = IntegrationSource.objects.filter(
-            import_status__in=['running_data', 'running_full']
-        )
-        stuck_sources_count = stuck_sources.count()
-
-        if stuck_sources_count > 0:
-            for source in stuck_sources:
-                old_status = source.import_status
-                source.import_status = 'idle'
-                source.import_error_message = f'Синхронизация прервана при запуске сервера (предыдущий статус: {old_status})'
-                source.last_error_time = timezone.now()
-                source.save()
-                logger.info(f"Сброшен статус источника {source.name}: {old_status} → idle")
-
-        # Сбрасываем зависшие логи синхронизации
-        stuck_logs = SyncLog.objects.filter(
-            status__in=['started', 'in_progress']
-        )
-        stuck_logs_count = stuck_logs.count()
+        """
+        Сбрасывает зависшие синхронизации.
+        Источник сбрасывается, только если ни один процесс не держит
+        его блокировку синхронизации (см. apps.sync1c.runner).
+        """
+        from .runner import reset_stale_syncs
 
-        if stuck_logs_count > 0:
-            stuck_logs.update(
-                status='cancelled',
-                message='Синхронизация отменена при запуске сервера',
-                finished_at=timezone.now()
-            )
-            logger.info(f"Отменено {stuck_logs_count} зависших записей синхронизации")
+        reset_count = reset_stale_syncs(ignore_lease=True)
 
-        if stuck_sources_count > 0 or stuck_logs_count > 0:
-            logger.info(
-                f"Автоочистка завершена: {stuck_sources_count} источников, "
-                f"{stuck_logs_count} логов синхронизации"
-            )
+        if reset_count > 0:
+            logger.info(f"Автоочистка завершена: сброшено {reset_count} источников")
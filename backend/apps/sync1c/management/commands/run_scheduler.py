@@ -1,15 +1,18 @@
 """
 Команда планировщика автоматической синхронизации.
-Запускает синхронизацию по расписанию для всех активных источников.
+Ставит в очередь Celery синхронизацию по расписанию для всех активных источников.
 """
 
 import time
 import logging
-import threading
 from django.core.management.base import BaseCommand
-from django.core.management import call_command
 from django.utils import timezone
 from apps.sync1c.models import IntegrationSource
+from apps.sync1c.runner import RUNNING_STATUSES, reset_stale_syncs, start_source_sync
+from apps.notifications.tasks import drain_notification_outbox, process_notification_retries
+from apps.news.views_counter import flush_view_counts
+from apps.orders.reservations import release_expired_reservations
+from apps.payments.tasks import process_payment_webhooks, reconcile_payments
 
 logger = logging.getLogger(__name__)
 
@@ -63,8 +66,26 @@ class Command(BaseCommand):
         """Проверяет расписание и запускает синхронизацию."""
         now = timezone.now()
 
-        # Обрабатываем повторные отправки уведомлений
-        self.process_notification_retries()
+        # Ставим в очередь периодические задачи уведомлений и платежей
+        self.enqueue_periodic_tasks()
+
+        # Снимаем резервы остатков неоплаченных онлайн-заказов
+        try:
+            release_expired_reservations()
+        except Exception as e:
+            logger.exception(f'Ошибка при снятии просроченных резервов товаров: {e}')
+
+        # Переносим накопленные в Redis просмотры новостей в базу
+        try:
+            flush_view_counts()
+        except Exception as e:
+            logger.exception(f'Ошибка при переносе просмотров новостей: {e}')
+
+        # Сбрасываем синхронизации, процесс которых завершился аварийно
+        try:
+            reset_stale_syncs()
+        except Exception as e:
+            logger.exception(f'Ошибка при проверке зависших синхронизаций: {e}')
 
         # Получаем все источники с включенной автосинхронизацией
         sources = IntegrationSource.objects.filter(
@@ -90,96 +111,40 @@ class Command(BaseCommand):
                 source.last_error_time = now
                 source.save()
 
-    def process_notification_retries(self):
-        """Обрабатывает повторные отправки уведомлений."""
+        # Отложенные запросы, владелец которых завершился до их выполнения
+        orphaned_requests = IntegrationSource.objects.filter(
+            is_active=True
+        ).exclude(pending_sync_type='').exclude(import_status__in=RUNNING_STATUSES)
+
+        for source in orphaned_requests:
+            start_source_sync(source, skip_media=None)
+
+    def enqueue_periodic_tasks(self):
+        """
+        Ставит в очередь повторные отправки уведомлений, обработку очередей событий
+        и уведомлений YooKassa, сверку зависших платежей.
+        """
         try:
-            call_command('process_notification_retries', '--limit', '50')
+            process_notification_retries.delay(50)
+            # События, задачу для которых не удалось поставить при коммите
+            drain_notification_outbox.delay(50)
+            # Уведомления YooKassa, задачу для которых не удалось поставить при получении
+            process_payment_webhooks.delay(50)
+            # Платежи, webhook по которым так и не пришел
+            reconcile_payments.delay()
         except Exception as e:
-            logger.exception(f'Ошибка при обработке повторных отправок уведомлений: {e}')
+            logger.exception(f'Ошибка при постановке фоновых задач уведомлений и платежей в очередь: {e}')
 
     def start_data_sync(self, source):
         """Запускает быструю синхронизацию данных."""
-        self.stdout.write(
-            self.style.SUCCESS(f'⚡ Запуск быстрой синхронизации для источника "{source.name}"')
-        )
-        
-        # Обновляем статус
-        source.import_status = 'running_data'
-        source.last_import_started = timezone.now()
-        source.import_error_message = None
-        source.save()
-        
-        # Запускаем в отдельном потоке
-        thread = threading.Thread(
-            target=self.run_sync_command,
-            args=(source, True)  # True = skip_media
-        )
-        thread.daemon = True
-        thread.start()
+        if start_source_sync(source, skip_media=True, scheduled=True):
+            self.stdout.write(
+                self.style.SUCCESS(f'⚡ Запуск быстрой синхронизации для источника "{source.name}"')
+            )
 
     def start_full_sync(self, source):
         """Запускает полную синхронизацию."""
-        self.stdout.write(
-            self.style.SUCCESS(f'🖼️ Запуск полной синхронизации для источника "{source.name}"')
-        )
-        
-        # Обновляем статус
-        source.import_status = 'running_full'
-        source.last_import_started = timezone.now()
-        source.import_error_message = None
-        source.save()
-        
-        # Запускаем в отдельном потоке
-        thread = threading.Thread(
-            target=self.run_sync_command,
-            args=(source, False)  # False = включая медиа
-        )
-        thread.daemon = True
-        thread.start()
-
-    def run_sync_command(self, source, skip_media):
-        """Выполняет команду синхронизации."""
-        try:
-            # Строим аргументы команды
-            command_args = [source.code]
-            if skip_media:
-                command_args.append('--skip-media')
-            
-            # Выполняем команду импорта
-            call_command('import_1c_data', *command_args)
-            
-            # Обновляем статус успеха
-            source.refresh_from_db()
-            source.import_status = 'completed'
-            source.last_import_completed = timezone.now()
-            
-            if skip_media:
-                source.last_data_sync = timezone.now()
-                source.schedule_next_data_sync()
-                sync_type = 'быстрая'
-            else:
-                source.last_full_sync = timezone.now()
-                source.schedule_next_full_sync()
-                # При полной синхронизации также обновляем время данных
-                source.last_data_sync = timezone.now()
-                source.schedule_next_data_sync()
-                sync_type = 'полная'
-            
-            source.save()
-            
-            self.stdout.write(
-                self.style.SUCCESS(f'✅ {sync_type.capitalize()} синхронизация "{source.name}" завершена')
-            )
-            
-        except Exception as e:
-            # Обновляем статус ошибки
-            source.refresh_from_db()
-            source.import_status = 'failed'
-            source.import_error_message = str(e)
-            source.last_error_time = timezone.now()
-            source.save()
-            
-            logger.exception(f'Ошибка синхронизации источника {source.code}: {e}')
+        if start_source_sync(source, skip_media=False, scheduled=True):
             self.stdout.write(
-                self.style.ERROR(f'❌ Ошибка синхронизации "{source.name}": {e}')
+                self.style.SUCCESS(f'🖼️ Запуск полной синхронизации для источника "{source.name}"')
             )
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync1c', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='integrationsource',
+            name='delta_dir_path',
+            field=models.CharField(blank=True, help_text="Относительный путь от 'goods_data' к папке с файлами изменений (delta_<номер>.json). Если не указан, быстрая синхронизация читает полную выгрузку.", max_length=500, verbose_name='Путь к папке с дельта-выгрузками'),
+        ),
+        migrations.AddField(
+            model_name='integrationsource',
+            name='last_delta_sequence',
+            field=models.PositiveBigIntegerField(default=0, help_text='Дельта-файлы с номером не больше этого значения считаются уже обработанными', verbose_name='Номер последней примененной дельты'),
+        ),
+        migrations.AlterField(
+            model_name='synclog',
+            name='sync_type',
+            field=models.CharField(choices=[('full', 'Полная'), ('partial', 'Частичная'), ('delta', 'Дельта')], default='full', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync1c', '0002_integrationsource_delta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='deleted_products',
+            field=models.IntegerField(default=0, verbose_name='Скрыто удаленных товаров'),
+        ),
+    ]
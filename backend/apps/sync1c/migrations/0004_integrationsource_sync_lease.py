@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync1c', '0003_synclog_deleted_products'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='integrationsource',
+            name='pending_sync_type',
+            field=models.CharField(blank=True, choices=[('', 'Нет'), ('data', 'Синхронизация данных'), ('full', 'Полная синхронизация')], default='', help_text='Запрос, поступивший во время выполнения синхронизации; выполняется сразу после нее', max_length=10, verbose_name='Отложенный запуск синхронизации'),
+        ),
+        migrations.AddField(
+            model_name='integrationsource',
+            name='sync_heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Обновляется после каждого пакета товаров. Если сигнала давно не было, синхронизация считается зависшей', null=True, verbose_name='Последний сигнал активности синхронизации'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync1c', '0004_integrationsource_sync_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='integrationsource',
+            name='sync_task_id',
+            field=models.CharField(blank=True, help_text='Идентификатор последней поставленной в очередь задачи Celery', max_length=255, verbose_name='ID задачи синхронизации'),
+        ),
+    ]
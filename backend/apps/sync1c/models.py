@@ -31,6 +31,18 @@ class IntegrationSource(models.Model):
         verbose_name="Путь к папке с медиа",
         help_text="Относительный путь к папке с медиафайлами от 'goods_data'"
     )
+    delta_dir_path = models.CharField(
+        max_length=500,
+        blank=True,
+        verbose_name="Путь к папке с дельта-выгрузками",
+        help_text="Относительный путь от 'goods_data' к папке с файлами изменений (delta_<номер>.json). "
+                  "Если не указан, быстрая синхронизация читает полную выгрузку."
+    )
+    last_delta_sequence = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Номер последней примененной дельты",
+        help_text="Дельта-файлы с номером не больше этого значения считаются уже обработанными"
+    )
 
     # Правила по умолчанию для этого источника (храним только коды)
     default_price_type = models.CharField(
@@ -98,6 +110,33 @@ class IntegrationSource(models.Model):
         blank=True,
         verbose_name="Время последней ошибки"
     )
+    sync_heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Последний сигнал активности синхронизации",
+        help_text="Обновляется после каждого пакета товаров. Если сигнала давно не было, синхронизация считается зависшей"
+    )
+    
+    PENDING_SYNC_CHOICES = [
+        ('', 'Нет'),
+        ('data', 'Синхронизация данных'),
+        ('full', 'Полная синхронизация'),
+    ]
+    
+    sync_task_id = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="ID задачи синхронизации",
+        help_text="Идентификатор последней поставленной в очередь задачи Celery"
+    )
+    pending_sync_type = models.CharField(
+        max_length=10,
+        choices=PENDING_SYNC_CHOICES,
+        blank=True,
+        default='',
+        verbose_name="Отложенный запуск синхронизации",
+        help_text="Запрос, поступивший во время выполнения синхронизации; выполняется сразу после нее"
+    )
     
     # Автоматическая синхронизация
     auto_sync_enabled = models.BooleanField(
@@ -247,6 +286,7 @@ class SyncLog(models.Model):
     SYNC_TYPES = [
         ('full', 'Полная синхронизация'),
         ('partial', 'Частичная синхронизация'),
+        ('delta', 'Синхронизация по дельтам'),
         ('products', 'Только товары'),
         ('images', 'Только изображения'),
     ]
@@ -261,7 +301,7 @@ class SyncLog(models.Model):
     
     sync_type = models.CharField(
         max_length=20, 
-        choices=[('full', 'Полная'), ('partial', 'Частичная')],
+        choices=[('full', 'Полная'), ('partial', 'Частичная'), ('delta', 'Дельта')],
         default='full'
     )
     source = models.ForeignKey(
@@ -301,6 +341,10 @@ class SyncLog(models.Model):
         default=0,
         verbose_name="Обновлено товаров"
     )
+    deleted_products = models.IntegerField(
+        default=0,
+        verbose_name="Скрыто удаленных товаров"
+    )
     errors_count = models.IntegerField(
         default=0,
         verbose_name="Количество ошибок"
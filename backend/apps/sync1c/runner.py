@@ -0,0 +1,288 @@
+"""
+Запуск синхронизации источников 1С с защитой от параллельного выполнения.
+
+Каждый источник синхронизируется не более чем одним процессом: выполнение
+защищено session-level advisory lock PostgreSQL, который автоматически
+освобождается при падении процесса вместе с его соединением. Запросы,
+пришедшие во время синхронизации, не запускают второй импорт, а объединяются
+в один отложенный запуск (IntegrationSource.pending_sync_type), который
+выполняется сразу после текущего.
+
+Сама синхронизация выполняется воркером Celery (задача apps.sync1c.tasks.sync_source),
+веб-процессы и планировщик только ставят ее в очередь через start_source_sync().
+Плановый запуск (scheduled=True) и выполнение отложенных запросов
+(skip_media=None) ставятся в очередь не более одного раза, пока задача не
+начала выполняться. Плановый запуск при выполнении пропускается, если синхронизация
+уже не нужна (ее выполнил другой запуск) или идет прямо сейчас.
+
+Пока импорт идет, после каждого пакета товаров обновляется
+IntegrationSource.sync_heartbeat_at. Источник со статусом "выполняется",
+у которого heartbeat старше SYNC_LEASE_SECONDS и блокировка свободна,
+считается упавшим и сбрасывается функцией reset_stale_syncs().
+"""
+
+import logging
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import IntegrationSource, SyncLog
+from .services import ProductImporter
+
+logger = logging.getLogger('sync1c')
+
+# Первый ключ pg_advisory_lock(int, int), второй - id источника
+SYNC_LOCK_NAMESPACE = 1001
+
+RUNNING_STATUSES = ['running_data', 'running_full']
+
+
+@contextmanager
+def source_sync_lock(source_id: int):
+    """
+    Неблокирующий захват блокировки синхронизации источника.
+
+    Возвращает True, если блокировка получена. Блокировка держится на
+    соединении текущего потока до выхода из контекста.
+    """
+    if connection.vendor != 'postgresql':
+        yield True
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s, %s)', [SYNC_LOCK_NAMESPACE, source_id])
+        acquired = cursor.fetchone()[0]
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock(%s, %s)', [SYNC_LOCK_NAMESPACE, source_id])
+            except DatabaseError:
+                # Соединение потеряно - PostgreSQL уже снял блокировку вместе с сессией
+                logger.warning(f"Не удалось явно снять блокировку синхронизации источника {source_id}")
+
+
+def _queued_cache_key(source_id: int) -> str:
+    return f'sync1c:scheduled_sync_queued:{source_id}'
+
+
+def _is_deduplicated(skip_media, scheduled: bool) -> bool:
+    """Запуски планировщика, которые не ставятся в очередь повторно."""
+    return scheduled or skip_media is None
+
+
+def start_source_sync(source: IntegrationSource, skip_media, scheduled: bool = False):
+    """
+    Ставит синхронизацию источника в очередь фоновых задач.
+
+    Быстрая синхронизация идет в очередь sync, полная - в очередь media.
+    Выполнение отложенных запросов (skip_media=None) идет в очередь по типу
+    отложенного запроса. Возвращает id задачи или None, если плановая
+    синхронизация или выполнение отложенных запросов уже стоят в очереди.
+    """
+    from .tasks import sync_source
+
+    if _is_deduplicated(skip_media, scheduled):
+        # Отметка снимается, когда воркер берет задачу; срок жизни - на случай потери задачи
+        lease_seconds = settings.SYNC_1C_SETTINGS.get('SYNC_LEASE_SECONDS', 600)
+        if not cache.add(_queued_cache_key(source.pk), skip_media, lease_seconds):
+            logger.info(f"Синхронизация источника {source.code} уже стоит в очереди")
+            return None
+
+    if skip_media is None:
+        runs_media = source.pending_sync_type == 'full'
+    else:
+        runs_media = skip_media is False
+    queue = 'media' if runs_media else 'sync'
+    result = sync_source.apply_async(
+        args=(source.pk, skip_media),
+        kwargs={'scheduled': scheduled},
+        queue=queue
+    )
+
+    IntegrationSource.objects.filter(pk=source.pk).update(sync_task_id=result.id)
+    source.sync_task_id = result.id
+
+    return result.id
+
+
+def run_source_sync(source_id: int, skip_media, scheduled: bool = False) -> bool:
+    """
+    Выполняет синхронизацию источника, если она не выполняется другим процессом.
+
+    skip_media=True - быстрая синхронизация, False - полная, None - только
+    выполнить отложенные запросы. Если блокировка занята, запрос объединяется
+    с уже ожидающим и функция возвращает False. Плановый запрос (scheduled=True)
+    при занятой блокировке отбрасывается: планировщик поставит его снова,
+    если после текущей синхронизации он еще будет нужен.
+    """
+    if _is_deduplicated(skip_media, scheduled):
+        cache.delete(_queued_cache_key(source_id))
+
+    requested = skip_media
+
+    while True:
+        with source_sync_lock(source_id) as acquired:
+            if not acquired:
+                if scheduled:
+                    logger.info(f"Синхронизация источника {source_id} уже выполняется, плановый запуск пропущен")
+                elif requested is not None:
+                    _queue_pending_sync(source_id, requested)
+                    logger.info(f"Синхронизация источника {source_id} уже выполняется, запрос поставлен в очередь")
+                return False
+
+            while requested is not None:
+                _execute_sync(source_id, requested, scheduled=scheduled)
+                # Отложенные запросы пришли от пользователя и выполняются без проверки расписания
+                scheduled = False
+                requested = _pop_pending_sync(source_id)
+
+        # Запрос мог прийти между последней проверкой очереди и снятием блокировки
+        requested = _pop_pending_sync(source_id)
+        if requested is None:
+            return True
+
+
+def _queue_pending_sync(source_id: int, skip_media: bool) -> None:
+    """Ставит синхронизацию в очередь. Полная синхронизация поглощает быструю."""
+    if skip_media:
+        IntegrationSource.objects.filter(pk=source_id, pending_sync_type='').update(pending_sync_type='data')
+    else:
+        IntegrationSource.objects.filter(pk=source_id).update(pending_sync_type='full')
+
+
+def _pop_pending_sync(source_id: int):
+    """Забирает отложенный запрос. Возвращает skip_media или None, если очередь пуста."""
+    with transaction.atomic():
+        pending = IntegrationSource.objects.select_for_update().filter(
+            pk=source_id
+        ).values_list('pending_sync_type', flat=True).first()
+
+        if not pending:
+            return None
+
+        IntegrationSource.objects.filter(pk=source_id).update(pending_sync_type='')
+
+    return pending == 'data'
+
+
+def _execute_sync(source_id: int, skip_media: bool, scheduled: bool = False) -> None:
+    """Выполняет одну синхронизацию и обновляет статус источника."""
+    source = IntegrationSource.objects.get(pk=source_id)
+
+    if not source.is_active:
+        logger.info(f"Источник {source.code} неактивен, синхронизация пропущена")
+        return
+
+    # Плановая задача могла дождаться воркера уже после того, как синхронизацию
+    # выполнил другой запуск и перенес время следующей
+    is_due = source.is_data_sync_due() if skip_media else source.is_full_sync_due()
+    if scheduled and not is_due:
+        logger.info(f"Плановая синхронизация источника {source.code} уже выполнена, повторный запуск пропущен")
+        return
+
+    now = timezone.now()
+    source.import_status = 'running_data' if skip_media else 'running_full'
+    source.last_import_started = now
+    source.sync_heartbeat_at = now
+    source.import_error_message = None
+    source.save(update_fields=['import_status', 'last_import_started', 'sync_heartbeat_at', 'import_error_message'])
+
+    def heartbeat():
+        IntegrationSource.objects.filter(pk=source_id).update(sync_heartbeat_at=timezone.now())
+
+    try:
+        ProductImporter(heartbeat=heartbeat).import_from_source(source, skip_media=skip_media)
+    except Exception as e:
+        source.refresh_from_db()
+        source.import_status = 'failed'
+        source.import_error_message = str(e)
+        source.last_error_time = timezone.now()
+        source.sync_heartbeat_at = None
+        source.save()
+        logger.exception(f"Ошибка синхронизации источника {source.code}: {e}")
+        return
+
+    source.refresh_from_db()
+    now = timezone.now()
+    source.import_status = 'completed'
+    source.last_import_completed = now
+    source.import_error_message = None
+    source.sync_heartbeat_at = None
+
+    # Полная синхронизация также обновляет время синхронизации данных
+    source.last_data_sync = now
+    source.schedule_next_data_sync()
+    if not skip_media:
+        source.last_full_sync = now
+        source.schedule_next_full_sync()
+
+    source.save()
+
+    sync_name = 'быстрая' if skip_media else 'полная'
+    logger.info(f"{sync_name.capitalize()} синхронизация источника {source.code} завершена")
+
+
+def is_source_sync_running(source_id: int) -> bool:
+    """Проверяет, держит ли какой-либо процесс блокировку синхронизации источника."""
+    with source_sync_lock(source_id) as acquired:
+        return not acquired
+
+
+def reset_stale_syncs(ignore_lease: bool = False) -> int:
+    """
+    Сбрасывает синхронизации, процесс которых завершился аварийно.
+
+    Кандидаты - источники со статусом "выполняется" без heartbeat дольше
+    SYNC_LEASE_SECONDS (или все такие источники при ignore_lease=True).
+    Сбрасываются только те, чью блокировку никто не держит.
+    Возвращает количество сброшенных источников.
+    """
+    lease_seconds = settings.SYNC_1C_SETTINGS.get('SYNC_LEASE_SECONDS', 600)
+    candidates = IntegrationSource.objects.filter(import_status__in=RUNNING_STATUSES)
+
+    if not ignore_lease:
+        deadline = timezone.now() - timedelta(seconds=lease_seconds)
+        candidates = candidates.filter(
+            Q(sync_heartbeat_at__lt=deadline) |
+            Q(sync_heartbeat_at__isnull=True, last_import_started__lt=deadline) |
+            Q(sync_heartbeat_at__isnull=True, last_import_started__isnull=True)
+        )
+
+    reset_count = 0
+    for source in candidates:
+        if is_source_sync_running(source.pk):
+            logger.warning(
+                f"Синхронизация источника {source.code} не подавала сигнал активности "
+                f"дольше {lease_seconds} сек, но процесс еще выполняется"
+            )
+            continue
+
+        old_status = source.import_status
+        source.import_status = 'idle'
+        source.import_error_message = f'Синхронизация прервана (предыдущий статус: {old_status})'
+        source.last_error_time = timezone.now()
+        source.sync_heartbeat_at = None
+        source.save()
+
+        SyncLog.objects.filter(
+            source=source,
+            status__in=['started', 'in_progress']
+        ).update(
+            status='cancelled',
+            message='Синхронизация прервана: процесс завершился аварийно',
+            finished_at=timezone.now()
+        )
+
+        logger.info(f"Сброшен статус зависшей синхронизации источника {source.name}: {old_status} → idle")
+        reset_count += 1
+
+    return reset_count
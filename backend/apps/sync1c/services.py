@@ -6,41 +6,63 @@ import json
 import hashlib
 import logging
 import os
+import re
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from django.conf import settings
 from django.core.files import File
 from django.core.files.storage import default_storage
-from django.db import transaction
+from django.db import connection, transaction
 from django.utils import timezone as django_timezone
 from PIL import Image
 from decimal import Decimal
 
 from apps.products.models import Product, ProductImage, Brand
 from apps.categories.models import Category
+from apps.core.metrics import (
+    IMAGE_PROCESSING_SECONDS,
+    IMAGES_PROCESSED,
+    SYNC_DURATION_SECONDS,
+    SYNC_PRODUCTS,
+    SYNC_PRODUCTS_PER_SECOND,
+)
 from .models import SyncLog, SyncError, IntegrationSource
 
 logger = logging.getLogger('sync1c')
 
+# Имя дельта-файла: delta_<порядковый номер>.json
+DELTA_FILE_RE = re.compile(r'^delta_(\d+)\.json$')
+
+# Сколько примеров сохранять в SyncError для каждой найденной проблемы целостности
+INTEGRITY_SAMPLE_SIZE = 10
+
 
 class ProductImporter:
     """Сервис для импорта товаров из 1С."""
     
-    def __init__(self):
+    def __init__(self, heartbeat=None):
         self.source = None
         self.sync_log = None
         self.processed_count = 0
         self.created_count = 0
         self.updated_count = 0
+        self.deleted_count = 0
         self.errors = []
         self.skip_media = False
+        # Вызывается после каждого пакета товаров, чтобы отметить, что синхронизация жива
+        self.heartbeat = heartbeat
     
     def import_from_source(self, source: IntegrationSource, skip_media: bool = False) -> SyncLog:
         """Импорт товаров из указанного источника данных 1С."""
         self.source = source
         self.skip_media = skip_media
         
+        # Быстрая синхронизация при настроенной папке дельт читает только изменения
+        if skip_media and self.source.delta_dir_path:
+            return self.import_deltas_from_source(source)
+        
         # Полный путь к файлу JSON
         goods_data_dir = settings.GOODS_DATA_DIR
         file_path = goods_data_dir / self.source.json_file_path
@@ -106,6 +128,9 @@ class ProductImporter:
             # Выполняем проверки целостности данных
             self._perform_integrity_checks()
             
+            # Дельты, вошедшие в полную выгрузку, повторно применять не нужно
+            self._reconcile_delta_sequence(file_stat.st_mtime)
+            
             # Завершаем синхронизацию
             self._finish_sync('completed')
             
@@ -116,6 +141,162 @@ class ProductImporter:
         
         return self.sync_log
     
+    def import_deltas_from_source(self, source: IntegrationSource) -> SyncLog:
+        """
+        Быстрая синхронизация по дельта-выгрузкам 1С.
+        
+        Обрабатывает только файлы delta_<номер>.json с номером больше
+        source.last_delta_sequence. Файл содержит измененные товары ("Изменено")
+        и коды удаленных товаров ("Удалено"); полная выгрузка не читается.
+        """
+        self.source = source
+        self.skip_media = True
+        
+        delta_dir = settings.GOODS_DATA_DIR / self.source.delta_dir_path
+        
+        self.sync_log = SyncLog.objects.create(
+            sync_type='delta',
+            status='started',
+            source=self.source,
+            source_file_path=str(delta_dir)
+        )
+        
+        try:
+            delta_files = self._list_delta_files(after_sequence=self.source.last_delta_sequence)
+            
+            if not delta_files:
+                logger.info(f"Новых дельт для источника {self.source.code} нет")
+                self._finish_sync('completed')
+                return self.sync_log
+            
+            self.sync_log.status = 'in_progress'
+            self.sync_log.save(update_fields=['status'])
+            
+            logger.info(
+                f"Начинаем синхронизацию по дельтам: {len(delta_files)} файлов "
+                f"(с №{delta_files[0][0]} по №{delta_files[-1][0]})"
+            )
+            
+            batch_size = settings.SYNC_1C_SETTINGS.get('BATCH_SIZE', 100)
+            
+            for sequence, delta_path in delta_files:
+                changed_products, deleted_codes = self._read_delta_file(delta_path)
+                
+                self.sync_log.total_products += len(changed_products)
+                
+                for i in range(0, len(changed_products), batch_size):
+                    self._process_products_batch(changed_products[i:i + batch_size])
+                
+                if deleted_codes:
+                    self.deleted_count += self._hide_deleted_products(deleted_codes)
+                
+                # Фиксируем номер после каждого файла, чтобы при сбое не начинать сначала
+                self._save_delta_sequence(sequence)
+                
+                self.sync_log.processed_products = self.processed_count
+                self.sync_log.save(update_fields=['total_products', 'processed_products'])
+                
+                logger.info(
+                    f"Применена дельта №{sequence}: изменено {len(changed_products)}, "
+                    f"удалено {len(deleted_codes)}"
+                )
+            
+            self._finish_sync('completed')
+            
+        except Exception as e:
+            logger.error(f"Ошибка синхронизации по дельтам: {str(e)}")
+            self._finish_sync('failed', str(e))
+            raise
+        
+        return self.sync_log
+    
+    def _list_delta_files(self, after_sequence: int = 0) -> List[Tuple[int, Path]]:
+        """Список дельта-файлов источника с номером больше after_sequence, по возрастанию."""
+        
+        if not self.source.delta_dir_path:
+            return []
+        
+        delta_dir = settings.GOODS_DATA_DIR / self.source.delta_dir_path
+        if not os.path.isdir(delta_dir):
+            logger.warning(f"Папка с дельтами {delta_dir} не найдена")
+            return []
+        
+        delta_files = []
+        for entry in os.scandir(delta_dir):
+            match = DELTA_FILE_RE.match(entry.name)
+            if match and entry.is_file():
+                sequence = int(match.group(1))
+                if sequence > after_sequence:
+                    delta_files.append((sequence, Path(entry.path)))
+        
+        delta_files.sort()
+        return delta_files
+    
+    def _read_delta_file(self, delta_path: Path) -> Tuple[List[Dict], List[str]]:
+        """
+        Чтение дельта-файла.
+        
+        Формат: {"Изменено": [<товар как в полной выгрузке>, ...], "Удалено": ["<Код>", ...]}.
+        Массив верхнего уровня считается списком измененных товаров.
+        """
+        with open(delta_path, 'r', encoding='utf-8-sig') as f:
+            data = json.load(f)
+        
+        if isinstance(data, list):
+            return data, []
+        
+        if not isinstance(data, dict):
+            raise ValueError(f"Некорректный формат дельта-файла {delta_path.name}")
+        
+        changed_products = data.get('Изменено') or []
+        deleted_codes = []
+        for item in data.get('Удалено') or []:
+            # Поддерживаем как строки с кодом, так и объекты {"Код": ...}
+            code = item.get('Код') if isinstance(item, dict) else item
+            if code:
+                deleted_codes.append(str(code))
+        
+        return changed_products, deleted_codes
+    
+    def _hide_deleted_products(self, product_codes: List[str]) -> int:
+        """Скрывает товары источника с указанными кодами. Возвращает число скрытых."""
+        
+        deleted_products = Product.objects.filter(
+            source=self.source,
+            code__in=product_codes,
+            is_visible_on_site=True
+        )
+        affected_category_ids = list(deleted_products.values_list('category_id', flat=True))
+        hidden_count = deleted_products.update(is_visible_on_site=False, updated_at=django_timezone.now())
+        
+        if hidden_count:
+            logger.info(f"Помечено как невидимых {hidden_count} товаров, удаленных в 1С")
+            self._hide_empty_categories(affected_category_ids)
+        
+        return hidden_count
+    
+    def _save_delta_sequence(self, sequence: int) -> None:
+        """Сохраняет номер последней примененной дельты."""
+        self.source.last_delta_sequence = sequence
+        IntegrationSource.objects.filter(pk=self.source.pk).update(last_delta_sequence=sequence)
+    
+    def _reconcile_delta_sequence(self, export_mtime: float) -> None:
+        """
+        Сверка дельт после чтения полной выгрузки.
+        
+        Дельты, записанные не позже полной выгрузки, уже учтены в ней:
+        отмечаем их примененными. Более новые дельты остаются для быстрой синхронизации.
+        """
+        last_covered = None
+        for sequence, delta_path in self._list_delta_files(after_sequence=self.source.last_delta_sequence):
+            if delta_path.stat().st_mtime > export_mtime:
+                break
+            last_covered = sequence
+        
+        if last_covered is not None:
+            self._save_delta_sequence(last_covered)
+            logger.info(f"Дельты до №{last_covered} включительно учтены полной выгрузкой")
+    
     def _process_products_batch(self, products_batch: List[Dict]) -> None:
         """Обработка пакета товаров."""
         
@@ -123,6 +304,9 @@ class ProductImporter:
             for product_data in products_batch:
                 self._process_single_product(product_data)
                 self.processed_count += 1
+        
+        if self.heartbeat:
+            self.heartbeat()
     
     def _process_single_product(self, product_data: Dict) -> Tuple[Product, bool]:
         """Обработка одного товара."""
@@ -479,7 +663,20 @@ class ProductImporter:
         return normalized
     
     def _create_product_image(self, product: Product, image_file: Path, is_main: bool = False, file_hash: str = None, order: int = 0) -> ProductImage:
-        """Создание изображения товара."""
+        """Создание изображения товара с учетом в метриках обработки изображений."""
+        started = time.perf_counter()
+        try:
+            product_image = self._save_optimized_image(product, image_file, is_main, file_hash, order)
+        except Exception:
+            IMAGES_PROCESSED.inc(result='error')
+            raise
+
+        IMAGE_PROCESSING_SECONDS.observe(time.perf_counter() - started)
+        IMAGES_PROCESSED.inc(result='success')
+        return product_image
+
+    def _save_optimized_image(self, product: Product, image_file: Path, is_main: bool, file_hash: Optional[str], order: int) -> ProductImage:
+        """Оптимизация изображения и сохранение записи ProductImage."""
         
         # Открываем и оптимизируем изображение
         with Image.open(image_file) as img:
@@ -561,7 +758,7 @@ class ProductImporter:
         Гибкое определение цены и остатков с учетом правил.
         Иерархия приоритетов:
         1. Ручные настройки в конкретном товаре (product.selected_price/stock_code).
-        2. Правила по умолчанию из источника (self.source.default_price/warehouse_name).
+        2. Правила по умолчанию из источника (self.source.default_price_type/default_warehouse).
         """
         prices = product_data.get('Цены', [])
         stocks = product_data.get('Остатки', [])
@@ -580,10 +777,11 @@ class ProductImporter:
                     selected_price_found = True
                     break
         
-        # Приоритет 2: Правило из источника
-        if not selected_price_found and self.source.default_price_type_name:
+        # Приоритет 2: Правило из источника.
+        # Сравниваем по коду: default_price_type_name перечитывает всю выгрузку при каждом обращении
+        if not selected_price_found and self.source.default_price_type:
             for price_info in prices:
-                if price_info.get('ВидЦены') == self.source.default_price_type_name:
+                if price_info.get('КодЦены') == self.source.default_price_type:
                     price = Decimal(price_info.get('Цена', 0))
                     break
 
@@ -597,10 +795,10 @@ class ProductImporter:
                     selected_stock_found = True
                     break
         
-        # Приоритет 2: Правило из источника
-        if not selected_stock_found and self.source.default_warehouse_name:
+        # Приоритет 2: Правило из источника (по коду склада)
+        if not selected_stock_found and self.source.default_warehouse:
             for stock_info in stocks:
-                if stock_info.get('Склад') == self.source.default_warehouse_name:
+                if stock_info.get('КодСклада') == self.source.default_warehouse:
                     stock_quantity = Decimal(stock_info.get('СвободныйОстаток', 0))
                     break
         
@@ -651,6 +849,7 @@ class ProductImporter:
         self.sync_log.processed_products = self.processed_count
         self.sync_log.created_products = self.created_count
         self.sync_log.updated_products = self.updated_count
+        self.sync_log.deleted_products = self.deleted_count
         self.sync_log.errors_count = len(self.errors)
         
         if error_message:
@@ -661,31 +860,68 @@ class ProductImporter:
         else:
             self.sync_log.message = f"Успешно обработано {self.processed_count} товаров"
         
+        if self.deleted_count:
+            self.sync_log.message += f", скрыто удаленных: {self.deleted_count}"
+        
         self.sync_log.save()
+
+        source_code = self.source.code if self.source else ''
+        duration = self.sync_log.duration.total_seconds()
+        SYNC_DURATION_SECONDS.observe(duration, source=source_code, status=status)
+        SYNC_PRODUCTS.inc(self.processed_count, source=source_code)
+        if duration > 0:
+            SYNC_PRODUCTS_PER_SECOND.set(round(self.processed_count / duration, 2), source=source_code)
         
         logger.info(f"Синхронизация завершена со статусом: {status}")
         logger.info(f"Обработано: {self.processed_count}, создано: {self.created_count}, обновлено: {self.updated_count}")
     
     def _handle_deleted_products(self, current_product_codes: set) -> None:
-        """Обработка товаров, удаленных из 1С."""
+        """
+        Обработка товаров, удаленных из 1С.
         
-        # Получаем все товары этого источника, которые есть в базе, но не в 1С
-        existing_products = Product.objects.filter(
-            source=self.source,
-            is_visible_on_site=True
-        ).exclude(code__in=current_product_codes)
+        Коды из выгрузки передаются одним параметром-массивом, и видимые товары
+        источника, которых в нем нет, скрываются одним UPDATE с анти-соединением.
+        """
         
-        deleted_count = 0
-        for product in existing_products:
-            # Помечаем товар как невидимый вместо удаления
-            product.is_visible_on_site = False
-            product.save()
-            deleted_count += 1
-            
-            logger.info(f"Товар {product.code} ({product.name}) помечен как невидимый - удален из 1С")
+        if connection.vendor == 'postgresql':
+            product_table = Product._meta.db_table
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {product_table} AS p
+                    SET is_visible_on_site = false, updated_at = %s
+                    WHERE p.source_id = %s
+                      AND p.is_visible_on_site
+                      AND NOT EXISTS (
+                          SELECT 1 FROM unnest(%s::varchar[]) AS current_codes(code)
+                          WHERE current_codes.code = p.code
+                      )
+                    RETURNING p.category_id
+                    """,
+                    [django_timezone.now(), self.source.pk, list(current_product_codes)]
+                )
+                affected_category_ids = [row[0] for row in cursor.fetchall()]
+        else:
+            deleted_products = Product.objects.filter(
+                source=self.source,
+                is_visible_on_site=True
+            ).exclude(code__in=current_product_codes)
+            affected_category_ids = list(deleted_products.values_list('category_id', flat=True))
+            deleted_products.update(is_visible_on_site=False, updated_at=django_timezone.now())
+        
+        deleted_count = len(affected_category_ids)
+        self.deleted_count += deleted_count
         
         if deleted_count > 0:
             logger.info(f"Помечено как невидимых {deleted_count} товаров, удаленных из 1С")
+            self._hide_empty_categories(affected_category_ids)
+    
+    def _hide_empty_categories(self, category_ids) -> None:
+        """Однократный пересчет видимости категорий, из которых были скрыты товары."""
+        
+        hidden_count = Category.hide_empty_categories({pk for pk in category_ids if pk})
+        if hidden_count:
+            logger.info(f"Скрыто {hidden_count} категорий без видимых товаров")
     
     def _handle_deleted_categories(self, groups_data: List[Dict]) -> None:
         """Обработка категорий, удаленных из 1С."""
@@ -729,119 +965,134 @@ class ProductImporter:
                 self._collect_category_codes(subgroups, codes_set)
     
     def _perform_integrity_checks(self) -> None:
-        """Выполнение проверок целостности данных после синхронизации."""
-        
-        logger.info("Начинаем проверки целостности данных...")
+        """
+        Выполнение проверок целостности данных после синхронизации.
         
-        # Проверяем товары без категорий
-        self._check_products_without_categories()
+        Проверки товаров выполняются одним агрегирующим запросом, проверка
+        изображений - одним обходом папки медиа со сравнением множеств путей.
+        Найденные проблемы сохраняются в SyncError (с примерами товаров).
+        На быстрой синхронизации проверки выполняются только если включен
+        SYNC_1C_SETTINGS['INTEGRITY_CHECKS_ON_QUICK_SYNC'].
+        """
         
-        # Проверяем товары с некорректными ценами
-        self._check_products_with_invalid_prices()
+        if self.skip_media and not settings.SYNC_1C_SETTINGS.get('INTEGRITY_CHECKS_ON_QUICK_SYNC', False):
+            return
         
-        # Проверяем товары с отрицательными остатками
-        self._check_products_with_negative_stock()
+        logger.info("Начинаем проверки целостности данных...")
         
-        # Проверяем изображения без файлов
-        self._check_images_without_files()
+        findings = self._check_products_integrity()
+        findings += self._check_image_files()
         
-        # Проверяем дубликаты товаров
-        self._check_duplicate_products()
+        if findings:
+            SyncError.objects.bulk_create(findings)
         
-        logger.info("Проверки целостности данных завершены")
+        logger.info(f"Проверки целостности данных завершены, записано замечаний: {len(findings)}")
     
-    def _check_products_without_categories(self) -> None:
-        """Проверка товаров без категорий."""
-        
-        products_without_category = Product.objects.filter(
-            source=self.source,
-            category__isnull=True,
-            is_visible_on_site=True
-        )
-        
-        count = products_without_category.count()
-        if count > 0:
-            logger.warning(f"Найдено {count} товаров без категории")
-            
-            # Логируем первые 10 товаров для примера
-            for product in products_without_category[:10]:
-                logger.warning(f"Товар без категории: {product.code} - {product.name}")
-    
-    def _check_products_with_invalid_prices(self) -> None:
-        """Проверка товаров с некорректными ценами."""
+    def _check_products_integrity(self) -> List[SyncError]:
+        """Проверка товаров источника одним агрегирующим запросом."""
+        
+        from django.db.models import Count, Q
+        
+        visible = Q(is_visible_on_site=True)
+        checks = {
+            'integrity_no_category': (
+                visible & Q(category__isnull=True),
+                "Товар без категории",
+            ),
+            'integrity_invalid_price': (
+                visible & Q(price__lte=0),
+                "Товар с нулевой или отрицательной ценой",
+            ),
+            'integrity_negative_stock': (
+                visible & Q(stock_quantity__lt=0),
+                "Товар с отрицательным остатком",
+            ),
+        }
         
-        products_with_zero_price = Product.objects.filter(
-            source=self.source,
-            price__lte=0,
-            is_visible_on_site=True
+        source_products = Product.objects.filter(source=self.source)
+        totals = source_products.aggregate(
+            total=Count('id'),
+            distinct_codes=Count('code', distinct=True),
+            **{error_type: Count('id', filter=condition) for error_type, (condition, _) in checks.items()}
         )
         
-        count = products_with_zero_price.count()
-        if count > 0:
-            logger.warning(f"Найдено {count} товаров с нулевой или отрицательной ценой")
+        findings = []
+        for error_type, (condition, description) in checks.items():
+            count = totals[error_type]
+            if not count:
+                continue
             
-            # Логируем первые 10 товаров для примера
-            for product in products_with_zero_price[:10]:
-                logger.warning(f"Товар с некорректной ценой: {product.code} - {product.name} (цена: {product.price})")
-    
-    def _check_products_with_negative_stock(self) -> None:
-        """Проверка товаров с отрицательными остатками."""
-        
-        products_with_negative_stock = Product.objects.filter(
-            source=self.source,
-            stock_quantity__lt=0,
-            is_visible_on_site=True
-        )
-        
-        count = products_with_negative_stock.count()
-        if count > 0:
-            logger.warning(f"Найдено {count} товаров с отрицательными остатками")
+            logger.warning(f"{description}: найдено {count}")
             
-            # Логируем первые 10 товаров для примера
-            for product in products_with_negative_stock[:10]:
-                logger.warning(f"Товар с отрицательным остатком: {product.code} - {product.name} (остаток: {product.stock_quantity})")
+            # Сохраняем первые товары для примера
+            for code, name in source_products.filter(condition).values_list('code', 'name')[:INTEGRITY_SAMPLE_SIZE]:
+                findings.append(SyncError(
+                    sync_log=self.sync_log,
+                    product_code=code,
+                    error_type=error_type,
+                    error_message=f"{description}: {name} (всего найдено: {count})",
+                ))
+        
+        duplicates_count = totals['total'] - totals['distinct_codes']
+        if duplicates_count:
+            logger.warning(f"Найдено {duplicates_count} дубликатов товаров по коду")
+            findings.append(SyncError(
+                sync_log=self.sync_log,
+                error_type='integrity_duplicate_code',
+                error_message=f"Найдено {duplicates_count} дубликатов товаров по коду",
+            ))
+        
+        return findings
     
-    def _check_images_without_files(self) -> None:
-        """Проверка изображений без файлов."""
-        
-        from django.core.files.storage import default_storage
-        
-        broken_images = []
+    def _check_image_files(self) -> List[SyncError]:
+        """
+        Проверка файлов изображений: один обход папки products в хранилище
+        и сравнение с путями из БД как множеств (вместо exists() на каждое изображение).
+        """
         
-        # Получаем все изображения товаров этого источника
-        product_images = ProductImage.objects.filter(
+        try:
+            images_root = Path(default_storage.path('products'))
+        except NotImplementedError:
+            logger.info("Хранилище медиа не файловое, проверка файлов изображений пропущена")
+            return []
+        
+        media_root = images_root.parent
+        files_on_disk = set()
+        if images_root.is_dir():
+            for dir_path, _, file_names in os.walk(images_root):
+                relative_dir = Path(dir_path).relative_to(media_root).as_posix()
+                for file_name in file_names:
+                    files_on_disk.add(f"{relative_dir}/{file_name}")
+        
+        source_images = ProductImage.objects.filter(
             product__source=self.source
-        ).select_related('product')
-        
-        for image in product_images:
-            if image.image and not default_storage.exists(image.image.name):
-                broken_images.append(image)
-        
-        if broken_images:
-            logger.warning(f"Найдено {len(broken_images)} изображений без файлов")
-            
-            # Логируем первые 10 изображений для примера
-            for image in broken_images[:10]:
-                logger.warning(f"Изображение без файла: {image.product.code} - {image.image.name}")
-    
-    def _check_duplicate_products(self) -> None:
-        """Проверка дубликатов товаров по коду."""
-        
-        from django.db.models import Count
-        
-        # Находим дубликаты по коду в рамках одного источника
-        duplicates = Product.objects.filter(
-            source=self.source
-        ).values('code').annotate(
-            count=Count('id')
-        ).filter(count__gt=1)
-        
-        if duplicates:
-            logger.warning(f"Найдено {len(duplicates)} групп дубликатов товаров")
-            
-            for duplicate in duplicates:
-                products = Product.objects.filter(
-                    source=self.source,
-                    code=duplicate['code']
-                )
-                logger.warning(f"Дубликаты товара с кодом {duplicate['code']}: {[p.id for p in products]}")
\ No newline at end of file
+        ).exclude(image='').values_list('image', 'product__code')
+        
+        missing = [(path, code) for path, code in source_images if path not in files_on_disk]
+        
+        findings = []
+        if missing:
+            logger.warning(f"Найдено {len(missing)} изображений без файлов")
+            for path, code in missing[:INTEGRITY_SAMPLE_SIZE]:
+                findings.append(SyncError(
+                    sync_log=self.sync_log,
+                    product_code=code,
+                    error_type='integrity_missing_image_file',
+                    error_message=f"Изображение без файла: {path} (всего найдено: {len(missing)})",
+                ))
+        
+        # Файлы, на которые не ссылается ни одно изображение (по всем источникам)
+        referenced = set(ProductImage.objects.exclude(image='').values_list('image', flat=True))
+        orphan_files = files_on_disk - referenced
+        if orphan_files:
+            logger.warning(f"Найдено {len(orphan_files)} файлов изображений без записей в БД")
+            findings.append(SyncError(
+                sync_log=self.sync_log,
+                error_type='integrity_orphan_image_file',
+                error_message=(
+                    f"Файлов без записей в БД: {len(orphan_files)}. Примеры: "
+                    + ", ".join(sorted(orphan_files)[:INTEGRITY_SAMPLE_SIZE])
+                ),
+            ))
+        
+        return findings
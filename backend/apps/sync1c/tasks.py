@@ -0,0 +1,26 @@
+"""
+Фоновые задачи синхронизации с 1С.
+"""
+
+from celery import shared_task
+from django.db import InterfaceError, OperationalError
+
+from .runner import run_source_sync
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(OperationalError, InterfaceError),
+    retry_backoff=True,
+    max_retries=3,
+)
+def sync_source(self, source_id: int, skip_media, scheduled: bool = False):
+    """
+    Синхронизация источника 1С.
+
+    Быстрая синхронизация выполняется в очереди sync, полная - в очереди media
+    (маршрут выбирается в runner.start_source_sync). Повторяется только при
+    сбоях соединения с БД; ошибки импорта записываются в источник.
+    Плановый запуск (scheduled=True) пропускается, если синхронизация уже не нужна.
+    """
+    return run_source_sync(source_id, skip_media, scheduled=scheduled)
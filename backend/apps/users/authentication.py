@@ -0,0 +1,178 @@
+"""
+JWT-аутентификация с кэшем пользователей.
+
+Стандартный JWTAuthentication на каждый запрос читает пользователя из таблицы
+users. CachedJWTAuthentication берет пользователя из общего кэша (Redis)
+и обращается к базе только при промахе. В кэше хранятся только поля из
+CACHED_USER_FIELDS, хеш пароля туда не попадает; остальные поля загружаются
+из базы при первом обращении (отложенные поля Django).
+
+Актуальность записи определяется версией пользователя в кэше. После коммита
+любого сохранения или удаления пользователя (сигналы в apps/users/signals.py)
+версия меняется, и записи со старой версией больше не принимаются. Поэтому
+запрос, который прочитал пользователя из базы до коммита изменения и записал
+его в кэш после, не вернет устаревшие роль или статус блокировки.
+
+Отзыв токенов: revoke_user_tokens() запоминает время, не позже которого
+выданные пользователю токены больше не принимаются. iat токена хранится
+с точностью до секунды, поэтому отзываются и токены, выданные в ту же секунду.
+Отметка, версия и пользователь читаются из кэша одним запросом get_many.
+Refresh-токены проверяются по той же отметке в RevocableTokenRefreshSerializer
+(SIMPLE_JWT['TOKEN_REFRESH_SERIALIZER']), иначе отозванная сессия получила бы
+новый access-токен через /api/token/refresh/.
+"""
+
+import logging
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from apps.core.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_TIMEOUT = 60 * 5
+# Версия живет дольше записи: запись без версии считается устаревшей
+USER_VERSION_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Поля для проверок аутентификации и прав, а также поля профиля из /api/users/me/,
+# чтобы ответ не догружал их из базы по одному
+CACHED_USER_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'phone', 'role',
+    'is_active', 'is_staff', 'is_superuser', 'date_joined', 'last_login',
+)
+
+
+def user_cache_key(user_id) -> str:
+    return f'users:auth:{user_id}'
+
+
+def user_version_cache_key(user_id) -> str:
+    return f'users:auth_version:{user_id}'
+
+
+def revoked_before_cache_key(user_id) -> str:
+    return f'users:tokens_revoked_before:{user_id}'
+
+
+def invalidate_cached_user(user_id) -> None:
+    """Помечает кэш пользователя устаревшим после коммита текущей транзакции."""
+    key = user_version_cache_key(user_id)
+
+    def bump_version():
+        try:
+            cache.set(key, uuid.uuid4().hex, USER_VERSION_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Не удалось сбросить кэш пользователя {user_id}: {e}")
+
+    transaction.on_commit(bump_version)
+
+
+def revoke_user_tokens(user_id) -> None:
+    """Отзывает все access- и refresh-токены пользователя, выданные до текущего момента."""
+    # Отметка хранится, пока не истечет самый долгоживущий из отозванных токенов
+    lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+    cache.set(revoked_before_cache_key(user_id), int(time.time()), int(lifetime.total_seconds()))
+
+
+def is_token_revoked(token, revoked_before) -> bool:
+    """Проверяет, выдан ли токен не позже отметки отзыва."""
+    return revoked_before is not None and token.get('iat', 0) <= revoked_before
+
+
+def _read_user(user_id):
+    """Читает из базы поля пользователя, которые хранятся в кэше."""
+    return get_user_model().objects.only(*CACHED_USER_FIELDS).filter(
+        **{api_settings.USER_ID_FIELD: user_id}
+    ).first()
+
+
+def _user_from_cache(data: dict):
+    """Собирает пользователя из полей, сохраненных в кэше. Остальные поля отложены."""
+    model = get_user_model()
+    field_names = [field.attname for field in model._meta.concrete_fields if field.attname in data]
+    return model.from_db(DEFAULT_DB_ALIAS, field_names, [data[name] for name in field_names])
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """Обновление токенов, которое не принимает отозванные refresh-токены."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.get(api_settings.USER_ID_CLAIM)
+
+        try:
+            revoked_before = cache.get(revoked_before_cache_key(user_id))
+        except Exception as e:
+            # Без кэша обновление работает как стандартное
+            logger.warning(f"Кэш пользователей недоступен: {e}")
+            revoked_before = None
+
+        if is_token_revoked(refresh, revoked_before):
+            raise InvalidToken('Токен отозван')
+
+        return super().validate(attrs)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, который берет пользователя из кэша."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Токен не содержит идентификатор пользователя')
+
+        user_key = user_cache_key(user_id)
+        version_key = user_version_cache_key(user_id)
+        revoked_key = revoked_before_cache_key(user_id)
+        try:
+            cached = cache.get_many([user_key, version_key, revoked_key])
+        except Exception as e:
+            # Без кэша аутентификация работает как стандартная
+            logger.warning(f"Кэш пользователей недоступен: {e}")
+            cached = None
+
+        user = None
+        if cached is not None:
+            if is_token_revoked(validated_token, cached.get(revoked_key)):
+                raise AuthenticationFailed('Токен отозван', code='token_revoked')
+
+            entry = cached.get(user_key)
+            version = cached.get(version_key)
+            if entry is not None and version is not None and entry['version'] == version:
+                user = _user_from_cache(entry['fields'])
+            record_cache_lookup('jwt_user', user is not None)
+
+        if user is None:
+            if cached is not None and version is None:
+                # Версия запоминается до чтения из базы: изменение, закоммиченное
+                # после чтения, сменит ее, и записанный ниже пользователь не будет принят
+                cache.add(version_key, uuid.uuid4().hex, USER_VERSION_CACHE_TIMEOUT)
+                version = cache.get(version_key)
+
+            user = _read_user(user_id)
+            if user is None:
+                raise AuthenticationFailed('Пользователь не найден', code='user_not_found')
+
+            if cached is not None and version is not None:
+                fields = {name: getattr(user, name) for name in CACHED_USER_FIELDS}
+                cache.set(user_key, {'version': version, 'fields': fields}, USER_CACHE_TIMEOUT)
+
+        if not user.is_active:
+            raise AuthenticationFailed('Пользователь неактивен', code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Хеш пароля не кэшируется и при этой проверке читается из базы
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed('Пароль пользователя изменен', code='password_changed')
+
+        return user
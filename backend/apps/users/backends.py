@@ -4,7 +4,6 @@
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
-from django.db.models import Q
 
 
 User = get_user_model()
@@ -17,6 +16,10 @@ class EmailOrUsernameBackend(ModelBackend):
     Пользователь может войти, указав:
     - username (shamil_abdullaev)
     - email (shamil@example.com)
+
+    Наследует ModelBackend, поэтому проверяет и права доступа. Отдельный
+    ModelBackend в AUTHENTICATION_BACKENDS не нужен: при неудачном входе
+    он повторил бы поиск и хэширование пароля.
     """
 
     def authenticate(self, request, username=None, password=None, **kwargs):
@@ -34,19 +37,22 @@ class EmailOrUsernameBackend(ModelBackend):
         if username is None or password is None:
             return None
 
-        try:
-            # Ищем пользователя по username или email (case-insensitive для email)
-            user = User.objects.get(
-                Q(username__iexact=username) | Q(email__iexact=username)
-            )
-        except User.DoesNotExist:
-            # Выполняем hash пароля даже если пользователь не найден
-            # (защита от timing attacks)
+        # В username не может быть "@" (см. username_validator), поэтому по виду
+        # идентификатора ищем только по одному полю, через индекс по UPPER(поле)
+        if '@' in username:
+            lookup = {'email__iexact': username}
+        else:
+            lookup = {'username__iexact': username}
+
+        users = list(User.objects.filter(**lookup)[:2])
+        if len(users) != 1:
+            # Пользователь не найден (или email совпал у нескольких без учета регистра).
+            # Выполняем hash пароля, чтобы время ответа не выдавало существование
+            # пользователя (защита от timing attacks)
             User().set_password(password)
             return None
-        except User.MultipleObjectsReturned:
-            # Не должно произойти, т.к. username и email уникальны
-            return None
+
+        user = users[0]
 
         # Проверяем пароль
         if user.check_password(password) and self.user_can_authenticate(user):
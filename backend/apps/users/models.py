@@ -4,6 +4,7 @@
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Upper
 from django.core.validators import RegexValidator
 
 
@@ -69,6 +70,12 @@ class User(AbstractUser):
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+        indexes = [
+            # Вход ищет пользователя без учета регистра (username__iexact / email__iexact),
+            # на PostgreSQL это UPPER(...) = UPPER(...), обычные уникальные индексы не подходят
+            models.Index(Upper('username'), name='user_username_upper_idx'),
+            models.Index(Upper('email'), name='user_email_upper_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         """
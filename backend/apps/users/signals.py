@@ -4,12 +4,14 @@
 """
 import logging
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from djoser import utils
 
-from apps.notifications.services import NotificationDispatcher
+from apps.notifications.outbox import enqueue_notification
 from apps.core.models import SiteSettings
+from .authentication import invalidate_cached_user, revoke_user_tokens
 from .models import User
 
 logger = logging.getLogger(__name__)
@@ -54,15 +56,46 @@ def handle_new_user_registration(sender, instance, created, **kwargs):
                 'site_url': site_url,
             }
 
-            # Отправляем уведомления через систему правил
+            # Ставим уведомления в очередь, отправка выполняется воркером после коммита
             # 1. Письмо активации самому пользователю
-            NotificationDispatcher.send_notification('user_activation', context)
-            logger.info(f"Письмо активации для {instance.username} успешно отправлено.")
+            enqueue_notification('user_activation', context)
+            logger.info(f"Письмо активации для {instance.username} поставлено в очередь.")
 
             # 2. Уведомление администратору о новой регистрации
-            NotificationDispatcher.send_notification('user_registration', context)
-            logger.info(f"Уведомление о регистрации {instance.username} отправлено администраторам.")
+            enqueue_notification('user_registration', context)
+            logger.info(f"Уведомление о регистрации {instance.username} поставлено в очередь.")
 
         except Exception as e:
             logger.error(f"Ошибка при отправке уведомлений для {instance.username}: {e}")
 
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_cache(sender, instance, **kwargs):
+    """Сбрасывает кэш пользователя для JWT-аутентификации."""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_password_change(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Отзывает токены пользователя после коммита смены пароля.
+
+    Срабатывает при любой смене пароля: в админке, в профиле, при сбросе
+    пароля через djoser. set_password() запоминает новый пароль в
+    instance._password до конца save(), поэтому смена видна здесь.
+    """
+    if created or instance._password is None:
+        return
+    if update_fields is not None and 'password' not in update_fields:
+        return
+
+    user_id = instance.pk
+
+    def revoke():
+        try:
+            revoke_user_tokens(user_id)
+        except Exception as e:
+            logger.warning(f"Не удалось отозвать токены пользователя {user_id}: {e}")
+
+    transaction.on_commit(revoke)
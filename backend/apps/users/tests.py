@@ -1,3 +1,290 @@
+"""
+Тесты аутентификации пользователей.
+"""
+
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import authentication
+from .authentication import (
+    CachedJWTAuthentication,
+    RevocableTokenRefreshSerializer,
+    revoke_user_tokens,
+    revoked_before_cache_key,
+    user_cache_key,
+)
+from .backends import EmailOrUsernameBackend
+
+User = get_user_model()
+
+
+def create_user(username: str = 'customer', password: str = 'customer-password', email: str = None, **fields):
+    user = User.objects.create_user(
+        username=username,
+        email=email or f'{username}@example.com',
+        password=password,
+        **fields
+    )
+    User.objects.filter(pk=user.pk).update(is_active=True)
+    user.refresh_from_db()
+    return user
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """Пользователь из кэша и его сброс после изменений."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.token = AccessToken.for_user(self.user)
+        self.authentication = CachedJWTAuthentication()
+
+    def test_user_is_read_from_database_once(self):
+        with self.assertNumQueries(1):
+            self.authentication.get_user(self.token)
+
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, self.user.email)
+
+    def test_password_hash_is_not_cached(self):
+        self.authentication.get_user(self.token)
+
+        entry = cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn('password', entry['fields'])
+        self.assertNotIn(self.user.password, repr(entry))
+
+    def test_saving_cached_user_keeps_password(self):
+        self.authentication.get_user(self.token)
+        user = self.authentication.get_user(self.token)
+
+        user.phone = '+79280000000'
+        user.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.phone, '+79280000000')
+        self.assertTrue(self.user.check_password('customer-password'))
+
+    def test_change_is_visible_after_commit(self):
+        self.authentication.get_user(self.token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = 'moderator'
+            self.user.save()
+
+        self.assertEqual(self.authentication.get_user(self.token).role, 'moderator')
+
+    def test_user_read_before_concurrent_commit_is_not_reused(self):
+        read_user = authentication._read_user
+
+        def read_then_block(user_id):
+            user = read_user(user_id)
+            # Другой запрос блокирует пользователя и коммитит изменение
+            # между чтением из базы и записью в кэш
+            with self.captureOnCommitCallbacks(execute=True):
+                User.objects.filter(pk=user_id).update(is_active=False)
+                authentication.invalidate_cached_user(user_id)
+            return user
+
+        with mock.patch.object(authentication, '_read_user', side_effect=read_then_block):
+            self.authentication.get_user(self.token)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+    def test_token_issued_in_second_of_revocation_is_rejected(self):
+        revoke_user_tokens(self.user.pk)
+        self.token['iat'] = cache.get(revoked_before_cache_key(self.user.pk))
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+    def test_token_issued_after_revocation_is_accepted(self):
+        revoke_user_tokens(self.user.pk)
+        self.token['iat'] = cache.get(revoked_before_cache_key(self.user.pk)) + 1
+
+        self.assertEqual(self.authentication.get_user(self.token).pk, self.user.pk)
+
+    def test_revoked_refresh_token_is_rejected(self):
+        refresh = RefreshToken.for_user(self.user)
+        revoke_user_tokens(self.user.pk)
+
+        serializer = RevocableTokenRefreshSerializer(data={'refresh': str(refresh)})
+        with self.assertRaises(InvalidToken):
+            serializer.is_valid()
+
+
+class PasswordChangeRevocationTests(TestCase):
+    """Отзыв токенов при смене пароля."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+
+    def revoked_before(self):
+        return cache.get(revoked_before_cache_key(self.user.pk))
+
+    def test_new_user_tokens_are_not_revoked(self):
+        self.assertIsNone(self.revoked_before())
+
+    def test_self_service_change_revokes_tokens_after_commit(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = client.post('/api/users-management/change_password/', {
+                'current_password': 'customer-password',
+                'new_password': 'new-customer-password',
+            }, format='json')
+            self.assertEqual(response.status_code, 200)
+            # До коммита старые токены еще принимаются
+            self.assertIsNone(self.revoked_before())
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNotNone(self.revoked_before())
+
+    def test_password_reset_revokes_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('reset-password')
+            self.user.save()
+
+        self.assertIsNotNone(self.revoked_before())
+
+    def test_save_without_password_change_keeps_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Иван'
+            self.user.save()
+            self.user.set_password('unsaved-password')
+            self.user.save(update_fields=['first_name'])
+
+        self.assertIsNone(self.revoked_before())
+
+
+class EmailOrUsernameBackendTests(TestCase):
+    """Вход по email или username."""
+
+    def setUp(self):
+        self.user = create_user('Shamil_A')
+        self.backend = EmailOrUsernameBackend()
+
+    def authenticate(self, username, password='customer-password'):
+        with CaptureQueriesContext(connection) as queries:
+            user = self.backend.authenticate(None, username=username, password=password)
+        self.assertEqual(len(queries), 1)
+        return user, queries[0]['sql']
+
+    def test_login_by_username_searches_only_username(self):
+        user, sql = self.authenticate('shamil_a')
+
+        self.assertEqual(user, self.user)
+        where = sql.split('WHERE', 1)[1]
+        self.assertIn('"username"', where)
+        self.assertNotIn('"email"', where)
+
+    def test_login_by_email_searches_only_email(self):
+        user, sql = self.authenticate('SHAMIL_A@example.com')
+
+        self.assertEqual(user, self.user)
+        where = sql.split('WHERE', 1)[1]
+        self.assertIn('"email"', where)
+        self.assertNotIn('"username"', where)
+
+    def test_wrong_password_is_rejected(self):
+        user, _ = self.authenticate('shamil_a', 'wrong-password')
+
+        self.assertIsNone(user)
+
+    def test_inactive_user_is_rejected(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        user, _ = self.authenticate('shamil_a')
+
+        self.assertIsNone(user)
+
+    def test_unknown_user_still_hashes_password(self):
+        with mock.patch.object(User, 'set_password', autospec=True) as set_password:
+            user, _ = self.authenticate('unknown@example.com', 'some-password')
+
+        self.assertIsNone(user)
+        set_password.assert_called_once_with(mock.ANY, 'some-password')
+
+    def test_email_matching_several_users_is_rejected(self):
+        # Уникальность email в базе учитывает регистр
+        create_user('other', email='shamil_a@EXAMPLE.com')
+
+        with mock.patch.object(User, 'set_password', autospec=True) as set_password:
+            user, _ = self.authenticate('shamil_a@example.com')
+
+        self.assertIsNone(user)
+        set_password.assert_called_once()
+
+
+class EmailOrUsernameBackendBenchmark(TestCase):
+    """Поиск пользователя при входе и время ответа для существующих и несуществующих логинов."""
+
+    USERS = 20000
+    LOOKUPS = 200
+    LOGINS = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(username=f'user{index}', email=f'user{index}@example.com', password='!')
+            for index in range(cls.USERS)
+        )
+        cls.user = create_user('benchmark')
+
+    def measure(self, func, repeat: int) -> float:
+        started = time.perf_counter()
+        for index in range(repeat):
+            func(index)
+        return (time.perf_counter() - started) / repeat
+
+    def test_lookup_by_one_field(self):
+        def split_lookup(index):
+            list(User.objects.filter(email__iexact=f'USER{index * 97}@example.com')[:2])
+
+        def combined_lookup(index):
+            identifier = f'USER{index * 97}@example.com'
+            list(User.objects.filter(Q(username__iexact=identifier) | Q(email__iexact=identifier))[:2])
+
+        split = self.measure(split_lookup, self.LOOKUPS)
+        combined = self.measure(combined_lookup, self.LOOKUPS)
+
+        print(
+            f"\nПоиск пользователя среди {self.USERS} ({connection.vendor}): "
+            f"по одному полю {split * 1000:.2f} мс, username OR email {combined * 1000:.2f} мс"
+        )
+        if connection.vendor == 'postgresql':
+            # Индексы по UPPER(поле) используются только на PostgreSQL
+            self.assertLess(split, combined)
+
+    def test_unknown_user_takes_as_long_as_wrong_password(self):
+        backend = EmailOrUsernameBackend()
+
+        def login(identifier):
+            return lambda index: backend.authenticate(None, username=identifier, password='wrong-password')
+
+        existing = self.measure(login('benchmark@example.com'), self.LOGINS)
+        unknown = self.measure(login('nobody@example.com'), self.LOGINS)
 
-# Create your tests here.
+        print(
+            f"\nВход с неверным паролем: существующий пользователь {existing * 1000:.0f} мс, "
+            f"несуществующий {unknown * 1000:.0f} мс"
+        )
+        # Время определяется хэшированием пароля, а не наличием пользователя
+        self.assertGreater(unknown, existing / 2)
+        self.assertLess(unknown, existing * 2)
@@ -0,0 +1,19 @@
+"""
+Конфигурация Celery для проекта Faida Group.
+
+Фоновые задачи разнесены по очередям с отдельными воркерами:
+- sync: быстрая синхронизация с 1С (только данные);
+- media: полная синхронизация с 1С (данные + обработка изображений);
+- notifications: отправка уведомлений;
+- payments: применение уведомлений YooKassa (обслуживает воркер уведомлений).
+Веб-процессы только ставят задачи в очередь и сами импорт не выполняют.
+"""
+
+import os
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+app = Celery('faida_store')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -56,12 +56,12 @@ AUTH_USER_MODEL = 'users.User'
 
 # Кастомные бэкенды аутентификации
 AUTHENTICATION_BACKENDS = [
-    'apps.users.backends.EmailOrUsernameBackend',  # Вход по email или username
-    'django.contrib.auth.backends.ModelBackend',  # Стандартный бэкенд (fallback)
+    'apps.users.backends.EmailOrUsernameBackend',  # Вход по email или username (включает ModelBackend)
 ]
 
 # Middleware
 MIDDLEWARE = [
+    'apps.core.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -70,6 +70,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.core.profiling.QueryProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -116,6 +117,26 @@ CACHES = {
     }
 }
 
+# Очереди фоновых задач (Celery + Redis)
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', REDIS_URL)
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', REDIS_URL)
+CELERY_TIMEZONE = 'Europe/Moscow'
+CELERY_TASK_DEFAULT_QUEUE = 'sync'
+CELERY_TASK_ROUTES = {
+    'apps.sync1c.tasks.*': {'queue': 'sync'},
+    'apps.notifications.tasks.*': {'queue': 'notifications'},
+    'apps.payments.tasks.*': {'queue': 'payments'},
+}
+CELERY_TASK_ACKS_LATE = True  # Задача подтверждается после выполнения и переживает перезапуск воркера
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Длинные задачи не должны резервироваться впрок
+CELERY_TASK_TRACK_STARTED = True
+CELERY_RESULT_EXTENDED = True
+CELERY_RESULT_EXPIRES = 60 * 60 * 24  # Результаты задач храним сутки
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'visibility_timeout': 60 * 60 * 6,  # Полная синхронизация может идти несколько часов
+}
+
 # Валидация паролей (кастомные валидаторы с русскими сообщениями)
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -165,7 +186,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 24,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -192,6 +213,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=90),  # 90 дней для refresh token
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # Не принимает refresh-токены, отозванные revoke_user_tokens()
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.authentication.RevocableTokenRefreshSerializer',
 }
 
 # Настройки CORS для фронтенда
@@ -250,6 +273,33 @@ SYNC_1C_SETTINGS = {
     'MEDIA_DIR_PATH': GOODS_DATA_DIR / 'pp' / 'export_media',
     'BATCH_SIZE': 100,  # Размер batch для импорта
     'AUTO_SYNC_INTERVAL': 300,  # Интервал автосинхронизации в секундах
+    'INTEGRITY_CHECKS_ON_QUICK_SYNC': False,  # Проверки целостности на быстрой синхронизации
+    'SYNC_LEASE_SECONDS': 600,  # Через сколько секунд без heartbeat синхронизация считается зависшей
+}
+
+# Хранение логов уведомлений (команда compact_notification_logs)
+NOTIFICATION_LOG_SETTINGS = {
+    'COMPACT_AFTER_DAYS': 30,  # Через сколько дней текст сообщения выносится в общую таблицу текстов
+    'RETENTION_DAYS': 180,  # Через сколько дней завершенные логи удаляются
+}
+
+STOCK_RESERVATION_SETTINGS = {
+    'ENABLED': True,  # Резервировать остатки при оформлении заказа
+    'PAYMENT_TIMEOUT_MINUTES': 30,  # Сколько держится резерв неоплаченного онлайн-заказа
+}
+
+# Профилирование SQL-запросов API (Server-Timing, лог, бюджеты запросов ViewSet)
+QUERY_PROFILING_SETTINGS = {
+    'ENABLED': os.getenv('QUERY_PROFILING', 'False').lower() in ['true', '1', 'yes', 'on'],
+    'SERVER_TIMING': True,  # Добавлять заголовок Server-Timing
+    'ENFORCE_BUDGETS': os.getenv('QUERY_BUDGETS_ENFORCED', 'False').lower() in ['true', '1', 'yes', 'on'],  # Для CI
+    'DUPLICATE_THRESHOLD': 3,  # Сколько одинаковых запросов считается N+1
+}
+
+# Метрики Prometheus на /metrics (значения хранятся в Redis, общие для всех процессов)
+METRICS_SETTINGS = {
+    'ENABLED': os.getenv('METRICS_ENABLED', 'True').lower() in ['true', '1', 'yes', 'on'],
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),  # Bearer-токен для сборщика; без токена /metrics доступен только в DEBUG
 }
 
 # Настройки логирования
@@ -273,6 +323,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'apps.core.profiling': {
+            'handlers': ['file', 'console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -331,4 +386,13 @@ DJOSER = {
 
 # Настройки YooKassa (платежная система)
 YOOKASSA_SHOP_ID = os.getenv('YOOKASSA_SHOP_ID', '')
-YOOKASSA_SECRET_KEY = os.getenv('YOOKASSA_SECRET_KEY', '')
\ No newline at end of file
+YOOKASSA_SECRET_KEY = os.getenv('YOOKASSA_SECRET_KEY', '')
+YOOKASSA_API_URL = os.getenv('YOOKASSA_API_URL', 'https://api.yookassa.ru/v3')  # Можно указать локальный mock API
+
+PAYMENT_RECONCILIATION_SETTINGS = {
+    'STALE_AFTER_MINUTES': 15,  # Через сколько минут без изменений платеж проверяется в YooKassa
+    'BATCH_SIZE': 100,  # Платежей на страницу выборки
+    'MAX_CONCURRENCY': 4,  # Параллельных запросов к API YooKassa
+    'REQUEST_TIMEOUT': 10,  # Таймаут запроса к API в секундах
+    'LOCK_TIMEOUT': 600,  # Срок блокировки сверки в секундах (если воркер упал)
+}
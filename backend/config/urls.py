@@ -10,6 +10,7 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 from rest_framework_simplejwt.views import TokenRefreshView
 from apps.api.views import CustomTokenObtainPairView
+from apps.core.views import metrics_view
 
 urlpatterns = [
     # Админка Django
@@ -30,6 +31,9 @@ urlpatterns = [
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+
+    # Метрики Prometheus
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Настройка для обслуживания медиа файлов в режиме разработки
@@ -939,12 +939,20 @@ const RulesTabWrapper: React.FC = () => {
 // ==================== LOGS TAB ====================
 
 const LogsTab: React.FC = () => {
-    const { data: logs, isLoading } = useNotificationLogs();
-    const retryNotification = useRetryNotification();
-
     const [statusFilter, setStatusFilter] = useState<string>('all');
     const [searchQuery, setSearchQuery] = useState<string>('');
 
+    // Статус фильтруется на сервере, логи подгружаются страницами
+    const {
+        data,
+        isLoading,
+        hasNextPage,
+        fetchNextPage,
+        isFetchingNextPage,
+    } = useNotificationLogs(statusFilter);
+    const logs = data?.pages.flatMap(page => page.results);
+    const retryNotification = useRetryNotification();
+
     const handleRetry = async (logId: number) => {
         try {
             await retryNotification.mutateAsync(logId);
@@ -954,13 +962,8 @@ const LogsTab: React.FC = () => {
         }
     };
 
-    // Фильтрация логов
+    // Фильтрация загруженных логов
     const filteredLogs = logs?.filter(log => {
-        // Фильтр по статусу
-        if (statusFilter !== 'all' && log.status !== statusFilter) {
-            return false;
-        }
-
         // Поиск по названию, получателю
         if (searchQuery) {
             const query = searchQuery.toLowerCase();
@@ -1041,7 +1044,7 @@ const LogsTab: React.FC = () => {
             )}
 
             <div className="space-y-3">
-                {filteredLogs.slice(0, 50).map((log) => (
+                {filteredLogs.map((log) => (
                     <div key={log.id} className="border border-gray-200 rounded-lg p-4 hover:bg-gray-50 transition-colors">
                         <div className="flex flex-col sm:flex-row sm:items-start sm:justify-between gap-3">
                             <div className="flex-1 min-w-0">
@@ -1099,6 +1102,19 @@ const LogsTab: React.FC = () => {
                 ))}
             </div>
 
+            {hasNextPage && (
+                <div className="flex justify-center">
+                    <button
+                        onClick={() => fetchNextPage()}
+                        disabled={isFetchingNextPage}
+                        className="btn-secondary text-sm flex items-center space-x-2"
+                    >
+                        {isFetchingNextPage && <FaSpinner className="w-3 h-3 animate-spin" />}
+                        <span>Загрузить ещё</span>
+                    </button>
+                </div>
+            )}
+
             {filteredLogs.length === 0 && (
                 <div className="text-center py-12 text-gray-500">
                     <FaHistory className="w-12 h-12 mx-auto mb-3 text-gray-400" />
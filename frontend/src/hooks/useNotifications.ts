@@ -2,7 +2,7 @@
  * React Query хуки для работы с API уведомлений
  */
 
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { adminClient } from '../api/adminClient';
 import type {
     NotificationCategory,
@@ -11,7 +11,8 @@ import type {
     NotificationTemplate,
     NotificationContact,
     NotificationRule,
-    NotificationLog,
+    NotificationLogPage,
+    NotificationLogStats,
     ContactTemplate
 } from '../types/notifications';
 
@@ -196,13 +197,25 @@ export const useSendTestToContact = () => {
 
 // ==================== Логи ====================
 
-export const useNotificationLogs = () => {
-    return useQuery({
-        queryKey: ['notification-logs'],
-        queryFn: async () => {
-            const response = await adminClient.get<NotificationLog[]>(`${NOTIFICATIONS_BASE}/logs/`);
+export const useNotificationLogs = (status: string = 'all') => {
+    return useInfiniteQuery({
+        queryKey: ['notification-logs', status],
+        queryFn: async ({ pageParam }) => {
+            // Следующие страницы запрашиваем по курсору из ссылки next
+            const response = await adminClient.get<NotificationLogPage>(`${NOTIFICATIONS_BASE}/logs/`, {
+                params: {
+                    ...(status !== 'all' ? { status } : {}),
+                    ...(pageParam ? { cursor: pageParam } : {}),
+                },
+            });
             return response.data;
         },
+        // Ссылка next абсолютная (http://backend:8000/api/...) и недоступна из браузера,
+        // поэтому из нее берется только значение cursor
+        getNextPageParam: (lastPage) => {
+            if (!lastPage.next) return undefined;
+            return new URL(lastPage.next, window.location.origin).searchParams.get('cursor') || undefined;
+        },
         refetchInterval: 30000, // Обновлять каждые 30 секунд
     });
 };
@@ -405,27 +418,19 @@ export const useNotificationStats = () => {
     return useQuery({
         queryKey: ['notification-stats'],
         queryFn: async () => {
-            // Загружаем все данные для подсчета статистики
-            const [types, channels, logs] = await Promise.all([
+            // Счетчики по логам считает сервер, сами логи не загружаем
+            const [types, channels, logStats] = await Promise.all([
                 adminClient.get<NotificationType[]>(`${NOTIFICATIONS_BASE}/types/`),
                 adminClient.get<NotificationChannel[]>(`${NOTIFICATIONS_BASE}/channels/`),
-                adminClient.get<NotificationLog[]>(`${NOTIFICATIONS_BASE}/logs/`),
+                adminClient.get<NotificationLogStats>(`${NOTIFICATIONS_BASE}/logs/stats/`),
             ]);
 
             return {
                 totalTypes: types.data.length,
                 activeChannels: channels.data.filter(c => c.is_active).length,
-                sentThisMonth: logs.data.filter(log => {
-                    const logDate = new Date(log.created_at);
-                    const now = new Date();
-                    return (
-                        logDate.getMonth() === now.getMonth() &&
-                        logDate.getFullYear() === now.getFullYear() &&
-                        log.status === 'sent'
-                    );
-                }).length,
-                failedCount: logs.data.filter(log => log.status === 'failed').length,
-                retryingCount: logs.data.filter(log => log.status === 'retrying').length,
+                sentThisMonth: logStats.data.sent_this_month,
+                failedCount: logStats.data.failed_count,
+                retryingCount: logStats.data.retrying_count,
             };
         },
         refetchInterval: 60000, // Обновлять каждую минуту
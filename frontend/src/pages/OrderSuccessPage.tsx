@@ -38,6 +38,19 @@ const OrderSuccessPage: React.FC = () => {
         }
     }, [clearCart]);
 
+    const fetchPaymentStatus = async (orderId: number, token: string) => {
+        try {
+            // Сервер отвечает с ETag, браузер перепроверяет ответ и получает 304 без тела
+            const paymentResponse = await axios.get(
+                `/api/payments/status/${orderId}/`,
+                { headers: { 'Authorization': `Bearer ${token}` } }
+            );
+            setPaymentStatus(paymentResponse.data);
+        } catch (err) {
+            console.error('Ошибка получения статуса платежа:', err);
+        }
+    };
+
     useEffect(() => {
         const fetchOrderAndPaymentStatus = async () => {
             const token = localStorage.getItem('access_token');
@@ -61,15 +74,7 @@ const OrderSuccessPage: React.FC = () => {
 
                     // Если онлайн-оплата - проверяем статус платежа
                     if (order.payment_method === 'online') {
-                        try {
-                            const paymentResponse = await axios.get(
-                                `/api/payments/status/${order.id}/`,
-                                { headers: { 'Authorization': `Bearer ${token}` } }
-                            );
-                            setPaymentStatus(paymentResponse.data);
-                        } catch (err) {
-                            console.error('Ошибка получения статуса платежа:', err);
-                        }
+                        await fetchPaymentStatus(order.id, token);
                     }
                 }
             } catch (err) {
@@ -80,16 +85,22 @@ const OrderSuccessPage: React.FC = () => {
         };
 
         fetchOrderAndPaymentStatus();
+    }, [orderNumber]);
+
+    // Для онлайн-оплаты обновляем только статус платежа каждые 5 секунд (webhook может прийти с задержкой)
+    useEffect(() => {
+        const token = localStorage.getItem('access_token');
+        const isWaiting = paymentStatus?.status === 'pending' || paymentStatus?.status === 'waiting_for_capture';
+        if (!token || !orderInfo || orderInfo.payment_method !== 'online' || !isWaiting) {
+            return;
+        }
 
-        // Для онлайн-оплаты обновляем статус каждые 5 секунд (webhook может прийти с задержкой)
         const interval = setInterval(() => {
-            if (orderInfo?.payment_method === 'online' && paymentStatus?.status === 'pending') {
-                fetchOrderAndPaymentStatus();
-            }
+            fetchPaymentStatus(orderInfo.id, token);
         }, 5000);
 
         return () => clearInterval(interval);
-    }, [orderNumber, orderInfo?.payment_method, paymentStatus?.status]);
+    }, [orderInfo, paymentStatus?.status]);
 
     // Компонент статуса оплаты
     const PaymentStatusBadge = () => {
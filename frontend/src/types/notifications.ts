@@ -117,3 +117,15 @@ export interface NotificationLog {
     created_at: string;
     updated_at: string;
 }
+
+export interface NotificationLogPage {
+    next: string | null;
+    previous: string | null;
+    results: NotificationLog[];
+}
+
+export interface NotificationLogStats {
+    sent_this_month: number;
+    failed_count: number;
+    retrying_count: number;
+}